@@ -0,0 +1,131 @@
+"""
+Compare the Playwright tool backends: npx @playwright/mcp over stdio vs native.
+
+For each backend the benchmark measures
+    session_start   MCPToolManager.load_servers (process spawn + handshake, or a new context)
+    navigate        browser_navigate to a local sample app
+    snapshot        browser_snapshot
+    click           browser_click on the app's "Add" button (ref taken from the snapshot)
+    type            browser_type into the app's text box
+
+The sample app is served from a local HTTP server, so nothing leaves the
+machine. A backend that cannot start (no npx, no Chromium) is reported and
+skipped. Unlike bench_hot_paths this is a comparison, not a regression gate:
+it needs real browsers and its numbers are machine-specific.
+
+Usage:
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --backends native --rounds 10
+"""
+import argparse
+import asyncio
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from kairos.app.browser import close_shared_browser
+from kairos.app.mcp_node import DEFAULT_CONFIG_PATH, MCPToolManager, load_config
+
+from benchmarks.samples import serve_sample_app
+
+REF_FOR_RE = r'{role} "{name}"[^\n]*\[ref=([^\]]+)\]'
+START_TIMEOUT = 60.0  # npx may try to download @playwright/mcp
+
+
+def backend_config(backend: str) -> dict:
+    config = load_config(DEFAULT_CONFIG_PATH)
+    config.setdefault("defaults", {})["backend"] = backend
+    return config
+
+
+def _text(result) -> str:
+    return "\n".join(getattr(block, "text", "") for block in getattr(result, "content", []))
+
+
+def _ref(snapshot: str, role: str, name: str) -> str:
+    match = re.search(REF_FOR_RE.format(role=role, name=re.escape(name)), snapshot)
+    if not match:
+        raise RuntimeError(f"{role} '{name}' not found in snapshot")
+    return match.group(1)
+
+
+async def _call(manager: MCPToolManager, tool: str, arguments: dict) -> str:
+    success, out = await manager.call_tool(tool, arguments)
+    if not success or getattr(out, "isError", False):
+        raise RuntimeError(f"{tool} failed: {out['error'] if not success else _text(out)}")
+    return _text(out)
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000}
+
+
+async def bench_backend(backend: str, url: str, rounds: int) -> Dict[str, Dict[str, float]]:
+    config = backend_config(backend)
+    timings: Dict[str, List[float]] = {k: [] for k in ("session_start", "navigate", "snapshot", "click", "type")}
+    for _ in range(rounds):
+        manager = MCPToolManager()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(manager.load_servers(config), START_TIMEOUT)
+        except BaseException:
+            await manager.cleanup()
+            raise
+        timings["session_start"].append(time.perf_counter() - start)
+        try:
+            for name, tool, arguments in (("navigate", "browser_navigate", {"url": url}),
+                                          ("snapshot", "browser_snapshot", {})):
+                start = time.perf_counter()
+                snapshot = await _call(manager, tool, arguments)
+                timings[name].append(time.perf_counter() - start)
+
+            textbox = _ref(snapshot, "textbox", "New todo")
+            start = time.perf_counter()
+            await _call(manager, "browser_type", {"element": "New todo", "ref": textbox, "text": "Buy milk"})
+            timings["type"].append(time.perf_counter() - start)
+
+            snapshot = await _call(manager, "browser_snapshot", {})
+            start = time.perf_counter()
+            await _call(manager, "browser_click", {"element": "Add", "ref": _ref(snapshot, "button", "Add")})
+            timings["click"].append(time.perf_counter() - start)
+        finally:
+            await manager.cleanup()
+    return {name: _stats(samples) for name, samples in timings.items()}
+
+
+async def run(backends: List[str], rounds: int) -> int:
+    server = serve_sample_app()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    results = {}
+    try:
+        for backend in backends:
+            try:
+                results[backend] = await bench_backend(backend, url, rounds)
+            except Exception as e:
+                print(f"⚠️ {backend}: skipped ({str(e).splitlines()[0] if str(e) else type(e).__name__})")
+        await close_shared_browser()
+    finally:
+        server.shutdown()
+
+    if not results:
+        print("❌ No backend could run")
+        return 1
+    print(f"{'case':<16}" + "".join(f"{b + ' median':>16}{b + ' best':>14}" for b in results))
+    for case in ("session_start", "navigate", "snapshot", "type", "click"):
+        row = "".join(f"{r[case]['median_ms']:>14.1f}ms{r[case]['min_ms']:>12.1f}ms" for r in results.values())
+        print(f"{case:<16}{row}")
+    return 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", nargs="*", default=["mcp", "native"], choices=["mcp", "native"])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args.backends, args.rounds))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
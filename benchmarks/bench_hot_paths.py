@@ -0,0 +1,120 @@
+"""
+Offline microbenchmarks for the non-LLM hot paths Kairos owns.
+
+Cases:
+    normalise_large_tool_output   ClaudeClient._normalise on a big CallToolResult
+    truncate_1mb                  ClaudeClient._truncate on a 1 MB tool output
+    schema_to_model_all_tools     _schema_to_model for every Playwright MCP tool
+    wrap_mcp_tool_all_tools       _wrap_mcp_tool setup for every Playwright MCP tool
+    parse_test_plan_150           Evaluator._parse_test_plan on a 150-feature response
+    mcp_call_tool_roundtrip       MCPToolManager.call_tool against a local stub stdio server
+
+Nothing here talks to Vertex or the network. Results are compared against the
+stored baselines in benchmarks/baselines.json; the script exits non-zero if a
+case is still slower than its baseline by more than the tolerance after being
+re-measured.
+
+Usage:
+    python -m benchmarks.bench_hot_paths                   # compare against baselines
+    python -m benchmarks.bench_hot_paths --save-baseline   # record new baselines
+    python -m benchmarks.bench_hot_paths --tolerance 0.3 --only parse_test_plan_150
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from kairos.app.evaluator import Evaluator
+from kairos.app.mcp_node import MCPToolManager
+from kairos.app.providers.claude_client import ClaudeClient
+
+from benchmarks.harness import (compare, confirm, load_baselines, measure, measure_async, save_baselines,
+                                tolerance_from_env)
+from benchmarks.samples import large_tool_result, load_tool_documentation, test_plan_response
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+STUB_SERVER = os.path.join(os.path.dirname(__file__), "stub_mcp_server.py")
+STUB_CONFIG = {
+    "defaults": {},
+    "servers": [{"name": "playwright-stub", "type": "python", "path": STUB_SERVER}],
+}
+
+
+def sync_cases():
+    # Only the helpers are exercised, so skip the Vertex client and plan cache setup in __init__
+    client = ClaudeClient.__new__(ClaudeClient)
+    evaluator = Evaluator.__new__(Evaluator)
+
+    tool_output = large_tool_result()
+    big_text = "x" * (1024 * 1024)
+    documentation = load_tool_documentation()
+    plan_response = test_plan_response(150)
+
+    return {
+        "normalise_large_tool_output": lambda: client._normalise(tool_output),
+        "truncate_1mb": lambda: client._truncate(big_text),
+        "schema_to_model_all_tools": lambda: [
+            client._schema_to_model(name, meta["parameters_dict"]) for name, meta in documentation.items()
+        ],
+        "wrap_mcp_tool_all_tools": lambda: [
+            client._wrap_mcp_tool(name, meta) for name, meta in documentation.items()
+        ],
+        "parse_test_plan_150": lambda: evaluator._parse_test_plan(plan_response),
+    }
+
+
+async def mcp_roundtrip(rounds: int):
+    manager = MCPToolManager()
+    await manager.load_servers(STUB_CONFIG)
+    try:
+        async def call():
+            success, out = await manager.call_tool("browser_click", {"element": "Add button", "ref": "e3"})
+            if not success:
+                raise RuntimeError(out["error"])
+
+        return await measure_async(call, rounds=rounds)
+    finally:
+        await manager.cleanup()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite benchmarks/baselines.json")
+    parser.add_argument("--tolerance", type=float, default=None, help="allowed relative slowdown (default 0.5)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--only", nargs="*", help="run only these cases")
+    args = parser.parse_args(argv)
+
+    cases = sync_cases()
+
+    def run_case(name):
+        if name == "mcp_call_tool_roundtrip":
+            return asyncio.run(mcp_roundtrip(args.rounds))
+        return measure(cases[name], rounds=args.rounds)
+
+    names = [n for n in [*cases, "mcp_call_tool_roundtrip"] if not args.only or n in args.only]
+    results = {name: run_case(name) for name in names}
+
+    if args.save_baseline:
+        baselines = load_baselines(BASELINES)
+        baselines.update(results)
+        save_baselines(BASELINES, baselines)
+        compare(results, {})
+        print(f"\n💾 Baselines written to {BASELINES}")
+        return 0
+
+    baselines = load_baselines(BASELINES)
+    tolerance = tolerance_from_env(args.tolerance)
+    confirm(results, baselines, tolerance, run_case)
+    regressions = compare(results, baselines, tolerance)
+    if regressions:
+        print("\n❌ Benchmark regression:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("\n✅ No regressions against baselines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,118 @@
+"""
+Benchmark the HTML reduction stage on a set of sample pages.
+
+Usage:
+    python -m benchmarks.bench_html_reducer                 # built-in sample pages
+    python -m benchmarks.bench_html_reducer page.html URL   # your own pages
+"""
+import base64
+import random
+import sys
+import time
+
+import requests
+
+from kairos.app.html_reducer import reduce_html
+
+
+def _svg_icon(rng: random.Random) -> str:
+    path = " ".join(f"L{rng.uniform(0, 24):.3f} {rng.uniform(0, 24):.3f}" for _ in range(120))
+    return f'<svg class="icon" viewBox="0 0 24 24" aria-hidden="true"><path d="M0 0 {path}Z"/></svg>'
+
+
+def _base64_image(rng: random.Random, size: int) -> str:
+    data = base64.b64encode(rng.randbytes(size)).decode()
+    return f'<img class="thumb" src="data:image/png;base64,{data}" alt="product photo">'
+
+
+def _vendor_script(rng: random.Random, size: int) -> str:
+    body = ";".join(f"var _{i}=function(a,b){{return a*{rng.randint(1, 99)}+b}}" for i in range(size // 40))
+    return f"<script>{body}</script>"
+
+
+def _app_script(features: int) -> str:
+    lines = []
+    for i in range(features):
+        lines.append(f"function handleFeature{i}(event) {{\n  const el = document.getElementById('feature-{i}');\n"
+                     f"  el.classList.toggle('active');\n  renderList{i}();\n}}")
+        lines.append(f"const renderList{i} = () => {{\n  document.querySelector('#list-{i}').innerHTML = '';\n}};")
+        lines.append(f"document.getElementById('btn-{i}').addEventListener('click', handleFeature{i});")
+    return "<script>\n" + "\n".join(lines) + "\n</script>"
+
+
+def sample_pages():
+    """Synthetic pages shaped like typical generated single-file apps."""
+    rng = random.Random(0)
+    pages = {}
+    for name, features, icons, images, vendor_kb in [
+        ("todo_small", 4, 6, 0, 0),
+        ("shop_medium", 12, 30, 8, 40),
+        ("dashboard_large", 30, 80, 20, 200),
+    ]:
+        sections = []
+        for i in range(features):
+            sections.append(
+                f"""
+                <!-- feature {i} -->
+                <section id="feature-{i}" class="card feature" style="padding: 12px; margin: 4px">
+                    <h2 class="card-title">Feature {i}</h2>
+                    {_svg_icon(rng)}
+                    <label for="input-{i}">Value {i}</label>
+                    <input id="input-{i}" name="value{i}" type="text" placeholder="Enter value {i}" data-track="x{i}">
+                    <button id="btn-{i}" class="btn btn-primary" onclick="handleFeature{i}(event)">Apply</button>
+                    <ul id="list-{i}" class="list">{''.join(f'<li class="item">Item {j}</li>' for j in range(5))}</ul>
+                </section>"""
+            )
+        icons_html = "".join(_svg_icon(rng) for _ in range(icons))
+        images_html = "".join(_base64_image(rng, 6000) for _ in range(images))
+        vendor = _vendor_script(rng, vendor_kb * 1024) if vendor_kb else ""
+        pages[name] = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <title>{name}</title>
+    <style>
+        /* generated styles */
+        .card {{ border: 1px solid #ddd; border-radius: 8px; }}
+        .btn-primary {{ background: #1f77b4; color: white; }}
+        .active {{ outline: 2px solid #1f77b4; }}
+    </style>
+    {vendor}
+</head>
+<body>
+    <nav class="navbar">{icons_html}</nav>
+    <main>{''.join(sections)}</main>
+    <div class="gallery">{images_html}</div>
+    {_app_script(features)}
+</body>
+</html>"""
+    return pages
+
+
+def load_pages(sources):
+    pages = {}
+    for source in sources:
+        if source.startswith(("http://", "https://")):
+            pages[source] = requests.get(source, timeout=30).text
+        else:
+            with open(source, "r", encoding="utf-8") as f:
+                pages[source] = f.read()
+    return pages
+
+
+def main(argv):
+    pages = load_pages(argv) if argv else sample_pages()
+    print(f"{'page':<40} {'lvl':>3} {'bytes':>10} {'reduced':>10} {'ratio':>6} {'~tokens':>9} {'~reduced':>9} {'ms':>7}")
+    for name, html in pages.items():
+        for level in range(4):
+            start = time.perf_counter()
+            reduction = reduce_html(html, level)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(
+                f"{name[:40]:<40} {level:>3} {reduction.original_bytes:>10} {reduction.reduced_bytes:>10} "
+                f"{reduction.ratio:>6.2f} {reduction.original_tokens:>9} {reduction.reduced_tokens:>9} {elapsed:>7.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
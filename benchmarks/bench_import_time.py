@@ -0,0 +1,97 @@
+"""
+Import-time benchmark for the kairos entry points, with a regression threshold.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` and the
+cumulative import time is compared against its budget. Modules that must stay
+lazy (langchain, the vendor SDKs, numpy, the MCP SDK) are also checked for: if
+any of them is loaded by importing an entry point, that is a regression even
+when the timing happens to be under budget.
+
+Exits non-zero on any regression, so it can gate CI.
+
+Usage:
+    python -m benchmarks.bench_import_time [runs] [--threshold-ms N]
+"""
+import re
+import statistics
+import subprocess
+import sys
+
+# Configuration constants
+DEFAULT_RUNS = 5
+# Cumulative import budget per entry point, in milliseconds
+BUDGETS_MS = {
+    "kairos": 600,
+    "kairos.kairos": 600,
+    "kairos.server": 1500,
+}
+# Loaded on first use only; never as a side effect of importing an entry point
+DEFERRED_MODULES = ["langchain", "langchain_google_vertexai", "anthropic", "numpy", "mcp"]
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(module: str):
+    """Import ``module`` in a fresh interpreter; return (cumulative µs, top-level modules loaded)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise Exception(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative = 0
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative = int(match.group(2))
+    return cumulative, loaded
+
+
+def main(argv):
+    runs = DEFAULT_RUNS
+    threshold = None
+    args = list(argv)
+    if "--threshold-ms" in args:
+        i = args.index("--threshold-ms")
+        threshold = float(args[i + 1])
+        del args[i:i + 2]
+    if args:
+        runs = int(args[0])
+
+    failures = []
+    for module, budget in BUDGETS_MS.items():
+        budget = threshold if threshold is not None else budget
+        timings = []
+        loaded = set()
+        for _ in range(runs):
+            cumulative, loaded = measure(module)
+            timings.append(cumulative / 1000)
+        median = statistics.median(timings)
+        eager = [m for m in DEFERRED_MODULES if m in loaded]
+
+        status = "ok"
+        if median > budget:
+            status = "SLOW"
+            failures.append(f"{module}: {median:.1f} ms > {budget:.0f} ms budget")
+        if eager:
+            status = "EAGER"
+            failures.append(f"{module}: imports {', '.join(eager)} at import time")
+        print(f"{module:<16} median {median:8.1f} ms  (min {min(timings):7.1f}, budget {budget:6.0f})  {status}")
+
+    if failures:
+        print("\n❌ Import-time regression:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ Import times within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,52 @@
+"""
+Microbenchmark per-run agent tool setup, before and after the compiled tool registry.
+
+"before" compiles every Playwright MCP tool (args model + StructuredTool) and
+converts it to a model tool schema on every run, as run_evaluation_with_tools
+used to. "after" goes through the process-wide ToolRegistry, which only
+compiles schemas it has not seen.
+
+Usage:
+    python -m benchmarks.bench_tool_setup [runs]
+"""
+import sys
+import time
+
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from kairos.app.providers.claude_client import ClaudeClient
+from kairos.app.providers.tool_registry import ToolRegistry
+
+from benchmarks.samples import load_tool_documentation
+
+
+def main(argv):
+    runs = int(argv[0]) if argv else 200
+    documentation = load_tool_documentation()
+    # Only the tool helpers are exercised, so skip the Vertex client setup in __init__
+    client = ClaudeClient.__new__(ClaudeClient)
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        tools = [client._wrap_mcp_tool(name, meta) for name, meta in documentation.items()]
+        [convert_to_openai_tool(t) for t in tools]
+    before = (time.perf_counter() - start) / runs
+
+    registry = ToolRegistry()
+    schemas = {}
+    start = time.perf_counter()
+    for _ in range(runs):
+        tools = registry.get_tools(documentation, client._wrap_mcp_tool)
+        key = registry.toolset_key(tools)
+        if key not in schemas:
+            schemas[key] = [convert_to_openai_tool(t) for t in tools]
+    after = (time.perf_counter() - start) / runs
+
+    print(f"tools per run:      {len(documentation)}")
+    print(f"before (per run):   {before * 1000:8.3f} ms")
+    print(f"after (per run):    {after * 1000:8.3f} ms")
+    print(f"speedup:            {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
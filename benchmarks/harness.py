@@ -0,0 +1,136 @@
+"""
+Minimal timing harness for the offline benchmark suite.
+
+Each case is timed over several rounds (after a warm-up) and reported as the
+median and best time per call. Results can be stored as baselines in a JSON
+file; later runs are compared against them on the best round, which is far
+less sensitive to noisy neighbours than the median, with a relative tolerance.
+A case that looks slower is re-measured before it counts as a regression, so
+one noisy run does not fail the gate.
+"""
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Configuration constants
+DEFAULT_ROUNDS = 7
+DEFAULT_TOLERANCE = 0.5  # allowed slowdown vs baseline (0.5 = 50% slower)
+MIN_ROUND_SECONDS = 0.1  # calls per round are scaled so a round takes at least this long
+CONFIRM_ATTEMPTS = 2  # re-measurements of a slower-looking case before it counts as a regression
+
+
+def _calls_per_round(fn: Callable[[], Any]) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_ROUND_SECONDS or number >= 1_000_000:
+            return number
+        number *= 2
+
+
+def _summarise(per_call: List[float], number: int) -> Dict[str, Any]:
+    return {
+        "median_ms": round(statistics.median(per_call) * 1000, 4),
+        "min_ms": round(min(per_call) * 1000, 4),
+        "rounds": len(per_call),
+        "calls_per_round": number,
+    }
+
+
+def measure(fn: Callable[[], Any], rounds: int = DEFAULT_ROUNDS) -> Dict[str, Any]:
+    """Time a synchronous callable."""
+    number = _calls_per_round(fn)
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - start) / number)
+    return _summarise(per_call, number)
+
+
+async def measure_async(fn: Callable[[], Awaitable[Any]], rounds: int = DEFAULT_ROUNDS,
+                        number: int = 20) -> Dict[str, Any]:
+    """Time an async callable on the running loop; ``number`` awaits per round."""
+    await fn()
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        per_call.append((time.perf_counter() - start) / number)
+    return _summarise(per_call, number)
+
+
+def load_baselines(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baselines(path: str, results: Dict[str, Dict[str, Any]]):
+    payload = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def best_of(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep whichever of two measurements of the same case had the faster best round."""
+    return second if second["min_ms"] < first["min_ms"] else first
+
+
+def slower_cases(results: Dict[str, Dict[str, Any]], baselines: Dict[str, Any],
+                 tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Names of the cases whose best round is beyond ``tolerance`` of their baseline."""
+    slower = []
+    for name, result in results.items():
+        baseline = baselines.get(name, {}).get("min_ms")
+        if baseline and result["min_ms"] / baseline - 1 > tolerance:
+            slower.append(name)
+    return slower
+
+
+def confirm(results: Dict[str, Dict[str, Any]], baselines: Dict[str, Any], tolerance: float,
+            remeasure: Callable[[str], Dict[str, Any]], attempts: int = CONFIRM_ATTEMPTS):
+    """Re-measure slower-looking cases in place, keeping each case's best measurement."""
+    for _ in range(attempts):
+        slower = slower_cases(results, baselines, tolerance)
+        if not slower:
+            return
+        for name in slower:
+            print(f"🔁 {name} looks slower than its baseline, measuring again")
+            results[name] = best_of(results[name], remeasure(name))
+
+
+def compare(results: Dict[str, Dict[str, Any]], baselines: Dict[str, Any],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Print a results table and return the cases that regressed beyond ``tolerance``."""
+    regressions = []
+    print(f"{'case':<34} {'median':>12} {'best':>12} {'baseline':>12} {'change':>8}")
+    for name, result in results.items():
+        baseline = baselines.get(name, {}).get("min_ms")
+        median, best = result["median_ms"], result["min_ms"]
+        if baseline:
+            change = best / baseline - 1
+            flag = "  ❌" if change > tolerance else ""
+            print(f"{name:<34} {median:>10.3f}ms {best:>10.3f}ms {baseline:>10.3f}ms {change:>+7.0%}{flag}")
+            if change > tolerance:
+                regressions.append(f"{name}: {best:.3f} ms vs baseline {baseline:.3f} ms ({change:+.0%})")
+        else:
+            print(f"{name:<34} {median:>10.3f}ms {best:>10.3f}ms {'-':>12} {'new':>8}")
+    return regressions
+
+
+def tolerance_from_env(default: Optional[float] = None) -> float:
+    value = os.getenv("KAIROS_BENCH_TOLERANCE")
+    return float(value) if value else (default if default is not None else DEFAULT_TOLERANCE)
@@ -0,0 +1,174 @@
+"""
+Deterministic, realistically shaped inputs for the offline benchmarks.
+
+Shapes follow what Playwright MCP and the test plan LLM actually return:
+accessibility snapshots wrapped in markdown, tool results with nested content
+blocks, and test plan responses with prose around a fenced JSON array.
+"""
+import json
+import os
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Union
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+ROLES = ["button", "link", "textbox", "checkbox", "heading", "listitem", "img", "combobox", "cell"]
+
+
+def load_tool_documentation() -> Dict[str, Dict[str, Any]]:
+    """Playwright MCP tool listing in the shape of MCPToolManager.return_documentation()"""
+    with open(os.path.join(FIXTURES_DIR, "playwright_tools.json"), "r") as f:
+        tools = json.load(f)
+    return {
+        t["name"]: {
+            "documentation": f"Description: {t['description']}",
+            "parameters": f"{t['inputSchema']}",
+            "server": "playwright",
+            "parameters_dict": t["inputSchema"],
+        }
+        for t in tools
+    }
+
+
+def snapshot_yaml(nodes: int, seed: int = 0) -> str:
+    """An accessibility tree with ``nodes`` elements, nested a few levels deep."""
+    rng = random.Random(seed)
+    lines = []
+    ref = 1
+    while ref <= nodes:
+        lines.append(f'- region "Section {ref}" [ref=e{ref}]:')
+        ref += 1
+        for _ in range(rng.randint(3, 8)):
+            if ref > nodes:
+                break
+            role = rng.choice(ROLES)
+            lines.append(f'  - {role} "{role.title()} item {ref}" [ref=e{ref}]')
+            ref += 1
+            if role == "listitem" and ref <= nodes:
+                lines.append(f'    - link "Details {ref}" [ref=e{ref}] [cursor=pointer]')
+                ref += 1
+    return "\n".join(lines)
+
+
+def page_state_text(nodes: int, seed: int = 0, url: str = "http://localhost:8080/index.html") -> str:
+    """Text block of a Playwright MCP action result, including the page snapshot."""
+    return (
+        "### Ran Playwright code\n```js\nawait page.getByRole('button', { name: 'Add' }).click();\n```\n\n"
+        f"### Page state\n- Page URL: {url}\n- Page Title: Sample App\n"
+        f"- Page Snapshot:\n```yaml\n{snapshot_yaml(nodes, seed)}\n```"
+    )
+
+
+def network_requests(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "url": f"http://localhost:8080/api/items/{i}?page={rng.randint(1, 50)}",
+            "method": rng.choice(["GET", "POST"]),
+            "status": rng.choice([200, 200, 200, 304, 404]),
+            "timing": {"start": i * 3.5, "duration": rng.uniform(1, 120)},
+            "headers": {"content-type": "application/json", "cache-control": "no-cache"},
+        }
+        for i in range(count)
+    ]
+
+
+def large_tool_result(nodes: int = 2000, requests: int = 500) -> Any:
+    """A CallToolResult with a big snapshot block and nested structured content."""
+    from mcp.types import CallToolResult, TextContent
+
+    return CallToolResult(
+        content=[
+            TextContent(type="text", text=page_state_text(nodes)),
+            TextContent(type="text", text=json.dumps({"console": ["[log] ready"] * 50})),
+        ],
+        structuredContent={"requests": network_requests(requests)},
+        isError=False,
+    )
+
+
+def test_plan_response(features: int = 150, seed: int = 0) -> str:
+    """An LLM test plan response: prose, then a fenced JSON array of features."""
+    rng = random.Random(seed)
+    plan = []
+    for i in range(features):
+        action = rng.choice(["add", "remove", "filter", "sort", "edit"])
+        steps = rng.randint(3, 8)
+        plan.append({
+            "Test_feature": f"Feature {i}: {action} items",
+            "Description": f"Verify that the user can {action} items from section {i} of the app.",
+            "Actions": [f"Click the 'Action {i}-{j}' button" for j in range(steps)],
+            "Assertions": [f"Item {i}-{j} is shown with the updated state" for j in range(steps)],
+        })
+    return (
+        "Here is a comprehensive test plan covering the requested functionality.\n\n"
+        f"```json\n{json.dumps(plan, indent=2)}\n```\n\n"
+        "Each feature is independent and can be executed in isolation."
+    )
+
+
+SAMPLE_APP = b"""<!doctype html>
+<html><head><title>Bench Todo</title></head>
+<body>
+  <nav><a href="/">Todos</a> <a href="/about">About</a></nav>
+  <h1>Todos</h1>
+  <input id="todo" aria-label="New todo" placeholder="What needs doing?">
+  <button id="add" onclick="add()">Add</button>
+  <ul id="list"></ul>
+  <script>
+    function add() {
+      const input = document.getElementById('todo');
+      const li = document.createElement('li');
+      li.textContent = input.value || 'Untitled';
+      document.getElementById('list').appendChild(li);
+      input.value = '';
+    }
+  </script>
+</body></html>"""
+
+SAMPLE_ABOUT = b"""<!doctype html>
+<html><head><title>About Bench Todo</title></head>
+<body>
+  <nav><a href="/">Todos</a> <a href="/about">About</a></nav>
+  <h1>About</h1>
+  <div role="tablist">
+    <button role="tab" onclick="show('team')">Team</button>
+    <button role="tab" onclick="show('faq')">FAQ</button>
+  </div>
+  <p id="panel">Pick a tab.</p>
+  <script>
+    function show(tab) {
+      document.getElementById('panel').textContent = tab === 'team' ? 'Two people.' : 'No questions yet.';
+    }
+  </script>
+</body></html>"""
+
+# Path -> page body, or a callable returning it per request (for pages that change between loads)
+SAMPLE_PAGES: Dict[str, Union[bytes, Callable[[], bytes]]] = {"/": SAMPLE_APP, "/about": SAMPLE_ABOUT}
+
+
+def serve_sample_app(pages: Optional[Dict[str, Union[bytes, Callable[[], bytes]]]] = None) -> ThreadingHTTPServer:
+    """Serve the sample app (``SAMPLE_PAGES`` unless ``pages`` is given) on a free local port from a daemon thread"""
+    pages = SAMPLE_PAGES if pages is None else pages
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            page = pages.get(self.path.split("?")[0])
+            if page is None:
+                self.send_error(404)
+                return
+            body = page() if callable(page) else page
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,70 @@
+"""
+Stub Playwright MCP server over stdio, for offline round-trip benchmarks.
+
+Exposes a handful of Playwright MCP tool names and answers every call with a
+canned page-state snapshot of ``KAIROS_STUB_SNAPSHOT_NODES`` elements (default
+300), so call_tool measures transport and (de)serialisation cost only.
+
+Usage (normally launched by MCPToolManager from a config):
+    python benchmarks/stub_mcp_server.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from mcp.server.fastmcp import FastMCP
+except ImportError:
+    # mcp 2.x renamed FastMCP
+    from mcp.server.mcpserver import MCPServer as FastMCP
+
+from benchmarks.samples import page_state_text
+
+SNAPSHOT_NODES = int(os.getenv("KAIROS_STUB_SNAPSHOT_NODES", "300"))
+
+server = FastMCP("playwright-stub", log_level="WARNING")
+state = {"url": "about:blank", "actions": 0}
+
+
+def _page_state() -> str:
+    return page_state_text(SNAPSHOT_NODES, seed=state["actions"] % 3, url=state["url"])
+
+
+@server.tool()
+def browser_navigate(url: str) -> str:
+    """Navigate to a URL"""
+    state["url"] = url
+    state["actions"] += 1
+    return _page_state()
+
+
+@server.tool()
+def browser_snapshot() -> str:
+    """Capture accessibility snapshot of the current page"""
+    return _page_state()
+
+
+@server.tool()
+def browser_click(element: str, ref: str) -> str:
+    """Perform click on a web page"""
+    state["actions"] += 1
+    return _page_state()
+
+
+@server.tool()
+def browser_type(element: str, ref: str, text: str, submit: bool = False) -> str:
+    """Type text into editable element"""
+    state["actions"] += 1
+    return _page_state()
+
+
+@server.tool()
+def browser_close() -> str:
+    """Close the page"""
+    state["url"] = "about:blank"
+    return "Browser closed"
+
+
+if __name__ == "__main__":
+    server.run()
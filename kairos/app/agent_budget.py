@@ -0,0 +1,121 @@
+"""
+Step budgets and loop detection for agent runs.
+
+A shard's agent gets a turn budget derived from its test plan: a few turns per
+feature plus turns per action and assertion (counted from ``Steps`` or, without
+them, from the ``Actions`` and ``Assertions`` text). While the agent runs, a
+``StepMonitor`` watches its tool calls for the same call repeating with the
+same result, or a short cycle of calls that leaves the page unchanged. The
+first loop only earns the agent a notice in the tool output; if it keeps
+looping the run is stopped with ``AgentStopped`` and a partial result is
+generated from the steps taken so far.
+"""
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configuration constants
+DEFAULT_AGENT_STEPS = 50  # runs without a test plan (qualitative evaluation)
+MIN_AGENT_STEPS = 12
+MAX_AGENT_STEPS = 80
+FEATURE_BASE_STEPS = 4  # navigate, snapshot, recover from one surprise, report
+STEPS_PER_ACTION = 2  # the action and a look at its effect
+STEPS_PER_ASSERTION = 1
+LOOP_REPEATS = 3  # a call or cycle seen this many times in a row is a loop
+MAX_CYCLE_LENGTH = 4
+MAX_LOGGED_ARGUMENT_CHARS = 200
+MAX_LOGGED_OUTCOME_CHARS = 400
+
+# Status of a feature whose assertions were not all checked before the run was stopped
+INCOMPLETE_STATUS = "INCOMPLETE"
+# Output of AgentExecutor when max_iterations runs out
+STOPPED_OUTPUT_PREFIX = "Agent stopped due to"
+
+_ITEM_SPLIT_RE = re.compile(r"\n+|;\s*|(?:^|\s)\d+[.)]\s+")
+
+
+class AgentStopped(Exception):
+    """Raised from a tool call to end an agent run that keeps looping."""
+
+
+def _count_items(value: Any) -> int:
+    """Number of entries in an Actions/Assertions field given as a list or as free text."""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, str):
+        return len([item for item in _ITEM_SPLIT_RE.split(value) if item and item.strip(" -*•.,")])
+    return 0
+
+
+def feature_step_budget(feature: Any) -> int:
+    """Agent turns allowed for one test plan feature."""
+    if not isinstance(feature, dict):
+        return FEATURE_BASE_STEPS
+    steps = feature.get("Steps") if isinstance(feature.get("Steps"), list) else []
+    actions = max(sum(1 for s in steps if isinstance(s, dict) and "action" in s), _count_items(feature.get("Actions")))
+    assertions = max(sum(1 for s in steps if isinstance(s, dict) and "expect" in s),
+                     _count_items(feature.get("Assertions")))
+    return FEATURE_BASE_STEPS + STEPS_PER_ACTION * actions + STEPS_PER_ASSERTION * assertions
+
+
+def step_budget(test_plan: List[Any]) -> int:
+    """Agent turns allowed for a shard: the sum of its features' budgets within the global bounds."""
+    return max(MIN_AGENT_STEPS, min(MAX_AGENT_STEPS, sum(feature_step_budget(f) for f in test_plan)))
+
+
+class StepMonitor:
+    """Watches the tool calls of one agent run for loops and keeps a short log of them."""
+
+    def __init__(self, budget: int = DEFAULT_AGENT_STEPS):
+        self.budget = budget
+        self.steps: List[Dict[str, str]] = []
+        self.loops = 0
+        self._history: List[Tuple[str, str, str]] = []  # (tool, arguments, outcome hash) since the last notice
+
+    def record(self, tool: str, arguments: Dict[str, Any], outcome: str) -> Optional[str]:
+        """Record a tool call and its output text.
+
+        Returns a notice for the agent when a loop is first seen and raises
+        ``AgentStopped`` when the agent loops again after it.
+        """
+        args = json.dumps(arguments, sort_keys=True, default=str)
+        self.steps.append({
+            "tool": tool,
+            "arguments": args[:MAX_LOGGED_ARGUMENT_CHARS],
+            "outcome": outcome[:MAX_LOGGED_OUTCOME_CHARS],
+        })
+        self._history.append((tool, args, hashlib.sha256(outcome.encode("utf-8")).hexdigest()))
+
+        loop = self._find_loop()
+        if loop is None:
+            return None
+        self.loops += 1
+        self._history.clear()
+        if self.loops > 1:
+            raise AgentStopped(f"agent kept looping after a warning: {loop}")
+        return (
+            f"NOTICE: {loop}. Repeating it will not make progress. Try a different approach; if the remaining "
+            f"assertions cannot be verified, stop and give the final JSON now, treating them as not verified."
+        )
+
+    def _find_loop(self) -> Optional[str]:
+        history = self._history
+        for period in range(1, MAX_CYCLE_LENGTH + 1):
+            window = period * LOOP_REPEATS
+            if len(history) < window:
+                break
+            tail = history[-window:]
+            if all(tail[i] == tail[i % period] for i in range(window)):
+                if period == 1:
+                    return f"{tail[0][0]} was called {LOOP_REPEATS} times in a row with the same arguments and result"
+                cycle = " → ".join(step[0] for step in tail[:period])
+                return f"the cycle {cycle} repeated {LOOP_REPEATS} times without changing its results"
+        return None
+
+    def describe(self) -> str:
+        """The calls made so far, one numbered line each, for the partial-result prompt."""
+        return "\n".join(
+            f"{i}. {s['tool']}({s['arguments']}) → {' '.join(s['outcome'].split())}"
+            for i, s in enumerate(self.steps, 1)
+        )
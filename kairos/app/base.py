@@ -1,33 +1,56 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable, Awaitable, AsyncIterator
 from .models import LLMProvider
-from .mcp_node import MCPToolManager
+from .mcp_node import DEFAULT_CONFIG_PATH, MCPToolManager
+from .mcp_pool import MCPSessionPool, get_session_pool
+
+# Receives progress events such as {"event": "tool_call", "tool": ..., "input": ...}
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# Stages an evaluation sends LLM requests for; each can be routed to its own model
+PLANNING = "planning"  # test plan generation
+NAVIGATION = "navigation"  # agent turns that drive the browser
+JUDGMENT = "judgment"  # assertion verdicts and the final summary JSON
+STAGES = (PLANNING, NAVIGATION, JUDGMENT)
 
 class LLMClient(ABC):
-    def __init__(self, llm_model_name: str, temperature: float = 0.1, **kwargs):
+    def __init__(self, llm_model_name: str, temperature: float = 0.1,
+                 stage_models: Optional[Dict[str, str]] = None, **kwargs):
         self.llm_model_name = llm_model_name
         self.temperature = temperature
-        self.mcp_manager: List[MCPToolManager] = [None, None]
-        self.playwright_config_path = str("./kairos/playwright.config.yml")
+        self.stage_models = {stage: model for stage, model in (stage_models or {}).items() if model}
+        unknown = set(self.stage_models) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown model stages: {', '.join(sorted(unknown))}")
+        self.playwright_config_path = DEFAULT_CONFIG_PATH
         self.config = kwargs
+
+    def model_for(self, stage: str) -> str:
+        """Model used for ``stage``; stages without their own model use ``llm_model_name``"""
+        return self.stage_models.get(stage, self.llm_model_name)
     
-    async def initialize_mcp(self, thread_id: Optional[int] = None):
-        """Initialize MCP tool manager"""
-        try:
-            self.mcp_manager[thread_id] = MCPToolManager()
-            await self.mcp_manager[thread_id].load_from_config(self.playwright_config_path)
-        except Exception as e:
-            print(f"Warning: Failed to initialize MCP: {e}")
-            self.mcp_manager = None
+    @property
+    def session_pool(self) -> MCPSessionPool:
+        """Process-wide pool of warm MCP sessions for the running event loop"""
+        return get_session_pool(self.playwright_config_path)
     
     @abstractmethod
     async def generate_response(self, prompt: str, system_prompt: str, **kwargs) -> str:
-        """Generate a response from the LLM."""
+        """Generate a response from the LLM; ``stage`` (default planning) selects the model."""
         pass
     
+    async def stream_response(self, prompt: str, system_prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Yield the response text as it is generated; providers without streaming yield it in one piece."""
+        yield await self.generate_response(prompt, system_prompt, **kwargs)
+
     @abstractmethod
-    async def run_evaluation_with_tools(self, evaluation_prompt: str, thread_id: Optional[int] = None) -> str:
-        """Run evaluation using MCP tools"""
+    async def run_evaluation_with_tools(self, evaluation_prompt: str, system_prompt: Optional[str] = None,
+                                        on_event: Optional[EventCallback] = None,
+                                        manager: Optional[MCPToolManager] = None,
+                                        max_steps: Optional[int] = None) -> str:
+        """Run evaluation using MCP tools; ``system_prompt`` holds static instructions eligible for prompt caching,
+        ``on_event`` receives tool-call events while the agent runs, ``manager`` reuses an already leased
+        MCP session instead of leasing one from the pool and ``max_steps`` caps the agent's turns"""
         pass
     
     @abstractmethod
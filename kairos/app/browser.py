@@ -0,0 +1,102 @@
+"""
+Shared local headless Chromium for code paths that drive Playwright directly.
+
+One browser process is launched per event loop and reused; every user gets
+its own isolated ``BrowserContext`` (separate cookies, storage and pages),
+which is far cheaper than a browser per run. Python Playwright is an optional
+dependency and is imported on first use.
+"""
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+# Configuration constants
+BROWSER_HEADLESS = os.getenv("KAIROS_BROWSER_HEADLESS", "true").lower() not in ("0", "false", "no")
+BROWSER_EXECUTABLE = os.getenv("KAIROS_CHROMIUM_PATH") or None  # use a system Chromium instead of Playwright's
+DEFAULT_VIEWPORT = {"width": 1280, "height": 800}
+
+
+class SharedBrowser:
+    """A lazily launched Chromium shared by all tasks on one event loop."""
+
+    def __init__(self, headless: bool = BROWSER_HEADLESS, executable_path: Optional[str] = BROWSER_EXECUTABLE):
+        self.headless = headless
+        self.executable_path = executable_path
+        self.contexts_opened = 0
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self):
+        async with self._lock:
+            if self.running:
+                return
+            try:
+                from playwright.async_api import async_playwright
+            except ImportError:
+                raise Exception("Python Playwright is not installed; run `pip install playwright && playwright install chromium`")
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                executable_path=self.executable_path,
+            )
+
+    async def new_context(self, **options) -> Any:
+        """Open a fresh isolated browser context; the caller closes it."""
+        await self.start()
+        context = await self._browser.new_context(**{"viewport": DEFAULT_VIEWPORT, **options})
+        self.contexts_opened += 1
+        return context
+
+    @asynccontextmanager
+    async def context(self, **options):
+        """Yield a fresh isolated browser context, closed when the block exits."""
+        context = await self.new_context(**options)
+        try:
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Warning: Error closing browser context: {e}")
+
+    async def close(self):
+        async with self._lock:
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception as e:
+                    print(f"Warning: Error closing shared browser: {e}")
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def stats(self):
+        return {"running": self.running, "contexts_opened": self.contexts_opened}
+
+
+_browsers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SharedBrowser]" = weakref.WeakKeyDictionary()
+
+
+def get_shared_browser() -> SharedBrowser:
+    """Return the browser shared by every task on the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _browsers:
+        _browsers[loop] = SharedBrowser()
+    return _browsers[loop]
+
+
+async def close_shared_browser():
+    """Shut down the browser bound to the running event loop, if any."""
+    browser = _browsers.pop(asyncio.get_running_loop(), None)
+    if browser is not None:
+        await browser.close()
@@ -0,0 +1,281 @@
+"""
+Crawl-once capture of an app's reachable states.
+
+Before any agent runs, the app is crawled once in the shared local headless
+browser (see ``browser.py``). Starting from the app URL, every navigation-like
+element (links, nav buttons, tabs, menu items) is clicked breadth-first; each
+distinct resulting state, identified by its URL and accessibility tree, is
+recorded with its DOM, accessibility snapshot, a screenshot and the console
+messages seen while reaching it, plus the click path that reaches it.
+
+Captures are cached on disk per app and page content, so the test planner,
+qualitative agents and feature agents of the same build all read the same
+capture and spend their turns on judgment rather than exploration.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from .browser import get_shared_browser
+
+# Configuration constants
+DEFAULT_STORE_DIR = os.path.join(os.getenv("KAIROS_CACHE_DIR", ".kairos_cache"), "captures")
+MAX_STATES = 20
+MAX_DEPTH = 3  # clicks from the start page
+MAX_CLICKS_PER_STATE = 25
+MAX_PAGE_LOADS = 150
+SETTLE_MS = 300  # wait after a click for client-side rendering
+CLICK_TIMEOUT_MS = 3000
+NAVIGATION_TIMEOUT_MS = 30000
+MAX_STATE_PROMPT_CHARS = 3000
+MAX_CAPTURE_PROMPT_CHARS = 24000
+MAX_CONSOLE_MESSAGES = 50
+
+# Elements whose click is expected to move to another page or view
+NAVIGATION_SELECTOR = "a[href], nav button, [role=tab], [role=menuitem], [role=link], [data-page], [data-view], [data-tab]"
+
+
+def _state_key(url: str, aria: str) -> str:
+    return hashlib.sha256(f"{url.split('#')[0]}\n{aria}".encode("utf-8")).hexdigest()[:16]
+
+
+def _same_origin(url: str, app_url: str) -> bool:
+    a, b = urlsplit(url), urlsplit(app_url)
+    return (a.scheme, a.netloc) == (b.scheme, b.netloc)
+
+
+class Capture:
+    """The captured states of one app build."""
+
+    def __init__(self, app_url: str, states: List[Dict[str, Any]], directory: str,
+                 duration: float = 0.0, cached: bool = False):
+        self.app_url = app_url
+        self.states = states
+        self.directory = directory
+        self.duration = duration
+        self.cached = cached
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "states": len(self.states),
+            "cached": self.cached,
+            "directory": self.directory,
+            "duration_seconds": round(self.duration, 3),
+            "console_errors": sum(len(s["console_errors"]) for s in self.states),
+        }
+
+    def prompt_context(self, max_chars: int = MAX_CAPTURE_PROMPT_CHARS) -> str:
+        """The states as prompt text: URL, how to reach them, console errors and accessibility tree."""
+        parts = []
+        used = 0
+        for index, state in enumerate(self.states):
+            path = _describe(state["path"])
+            aria = state["aria"]
+            if len(aria) > MAX_STATE_PROMPT_CHARS:
+                aria = aria[:MAX_STATE_PROMPT_CHARS] + "\n# … truncated"
+            errors = "; ".join(state["console_errors"][:5]) or "none"
+            part = (
+                f"#### State {index + 1}: {state['title'] or 'untitled'} ({state['url']})\n"
+                f"Reached by: {path}\nConsole errors: {errors}\n```yaml\n{aria}\n```\n"
+            )
+            if used + len(part) > max_chars:
+                parts.append(f"… {len(self.states) - index} more states omitted\n")
+                break
+            parts.append(part)
+            used += len(part)
+        return "".join(parts)
+
+
+async def _reach(page: Any, app_url: str, path: List[Dict[str, Any]]):
+    """Load the start page and replay the clicks of ``path``."""
+    await page.goto(app_url, wait_until="load", timeout=NAVIGATION_TIMEOUT_MS)
+    for step in path:
+        await page.locator(NAVIGATION_SELECTOR).nth(step["index"]).click(timeout=CLICK_TIMEOUT_MS)
+        await page.wait_for_load_state("load")
+        await page.wait_for_timeout(SETTLE_MS)
+
+
+def _describe(path: List[Dict[str, Any]]) -> str:
+    return " → ".join(step["label"] for step in path) or "start page"
+
+
+def _first_line(error: Exception) -> str:
+    return str(error).splitlines()[0] if str(error) else type(error).__name__
+
+
+async def _label(locator: Any) -> str:
+    try:
+        text = " ".join((await locator.inner_text(timeout=CLICK_TIMEOUT_MS)).split())
+    except Exception:
+        text = ""
+    return f"click '{text[:60]}'" if text else "click (unlabelled element)"
+
+
+async def crawl_app(app_url: str, directory: str, max_states: int = MAX_STATES,
+                    max_depth: int = MAX_DEPTH) -> Capture:
+    """Crawl ``app_url`` breadth-first in the shared browser and write screenshots into ``directory``."""
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    states: List[Dict[str, Any]] = []
+    seen = set()
+    console: List[Dict[str, str]] = []
+    loads = 0
+
+    async with get_shared_browser().context() as context:
+        page = await context.new_page()
+        page.on("console", lambda m: console.append({"type": m.type, "text": m.text}))
+        page.on("pageerror", lambda e: console.append({"type": "error", "text": str(e)}))
+
+        async def record(path: List[Dict[str, Any]]) -> bool:
+            """Record the page as a state if it is new; returns whether it was."""
+            aria = await page.locator("body").aria_snapshot()
+            key = _state_key(page.url, aria)
+            if key in seen:
+                return False
+            seen.add(key)
+            screenshot = os.path.join(directory, f"state_{len(states) + 1}.png")
+            await page.screenshot(path=screenshot, full_page=True)
+            messages = console[-MAX_CONSOLE_MESSAGES:]
+            states.append({
+                "url": page.url,
+                "title": await page.title(),
+                "path": path,
+                "aria": aria,
+                "dom": await page.content(),
+                "screenshot": screenshot,
+                "console": messages,
+                "console_errors": [m["text"] for m in messages if m["type"] == "error"],
+            })
+            return True
+
+        # Only the start page is required; any other state that cannot be reached again is skipped
+        console.clear()
+        await _reach(page, app_url, [])
+        loads += 1
+        await record([])
+        queue = deque([[]])
+        while queue and len(states) < max_states and loads < MAX_PAGE_LOADS:
+            path = queue.popleft()
+            if len(path) >= max_depth:
+                continue
+            loads += 1
+            try:
+                await _reach(page, app_url, path)
+                count = min(await page.locator(NAVIGATION_SELECTOR).count(), MAX_CLICKS_PER_STATE)
+            except Exception as e:
+                # Dynamic pages shift element indices between loads, so a recorded path may not replay
+                print(f"Warning: capture skipped a branch that no longer replays ({_describe(path)}): {_first_line(e)}")
+                continue
+            for index in range(count):
+                if len(states) >= max_states or loads >= MAX_PAGE_LOADS:
+                    break
+                try:
+                    target = page.locator(NAVIGATION_SELECTOR).nth(index)
+                    href = await target.evaluate("e => e.href || ''")
+                    if href and not _same_origin(href, app_url):
+                        continue
+                    step = {"index": index, "label": await _label(target)}
+                    console.clear()
+                    await target.click(timeout=CLICK_TIMEOUT_MS)
+                    await page.wait_for_load_state("load")
+                    await page.wait_for_timeout(SETTLE_MS)
+                    if _same_origin(page.url, app_url) and await record(path + [step]):
+                        queue.append(path + [step])
+                except Exception:
+                    pass  # hidden, detached or unclickable element
+                # Return to the state being explored before trying the next element
+                loads += 1
+                try:
+                    await _reach(page, app_url, path)
+                except Exception as e:
+                    print(f"Warning: capture left a branch that no longer replays ({_describe(path)}): {_first_line(e)}")
+                    break
+        await page.close()
+
+    return Capture(app_url, states, directory, duration=time.perf_counter() - started)
+
+
+class CaptureStore:
+    """On-disk captures, one directory per app and page content (screenshots plus capture.json)."""
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def make_key(app_id: str, html: str) -> str:
+        payload = json.dumps({"app_id": app_id, "html": hashlib.sha256(html.encode("utf-8")).hexdigest()})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _dir(self, key: str) -> str:
+        return os.path.join(self.store_dir, key)
+
+    def get(self, key: str) -> Optional[Capture]:
+        try:
+            with open(os.path.join(self._dir(key), "capture.json"), "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return Capture(entry["app_url"], entry["states"], self._dir(key), entry.get("duration", 0.0), cached=True)
+
+    def put(self, key: str, capture: Capture):
+        path = os.path.join(self._dir(key), "capture.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump({"app_url": capture.app_url, "duration": capture.duration, "states": capture.states}, f)
+        os.replace(path + ".tmp", path)
+
+    async def get_or_capture(self, app_id: str, app_url: str, html: str) -> Capture:
+        """Return the stored capture for this build, crawling the app once if there is none."""
+        key = self.make_key(app_id, html)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:  # concurrent evaluations of one build share a single crawl
+            capture = self.get(key)
+            if capture is not None:
+                return capture
+            try:
+                capture = await crawl_app(app_url, self._dir(key))
+            except Exception:
+                shutil.rmtree(self._dir(key), ignore_errors=True)
+                raise
+            self.put(key, capture)
+            return capture
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len([n for n in os.listdir(self.store_dir) if os.path.isdir(self._dir(n))])}
+
+
+_capture_store: Optional[CaptureStore] = None
+
+
+def get_capture_store() -> CaptureStore:
+    """Return the process-wide capture store."""
+    global _capture_store
+    if _capture_store is None:
+        _capture_store = CaptureStore()
+    return _capture_store
+
+
+_current_capture: ContextVar[Optional[Capture]] = ContextVar("kairos_capture", default=None)
+
+
+def current_capture() -> Optional[Capture]:
+    return _current_capture.get()
+
+
+@contextmanager
+def use_capture(capture: Optional[Capture]):
+    """Make ``capture`` available to every prompt built inside the block (including child tasks)."""
+    token = _current_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _current_capture.reset(token)
@@ -1,56 +1,135 @@
 import asyncio
 import json
 import re
-import requests
 import time
-import threading
-from typing import List, Dict, Any
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Tuple
 
-from .base import LLMClient
+from .base import LLMClient, EventCallback, PLANNING
 from .models import UserInput, EvaluationResult, EvaluationType
-from .prompts import evaluation_prompt_template, QUALITATIVE_EVAL_PROMPT, test_plan_system_prompt, test_plan_prompt
+from .prompts import evaluation_prompt_template, replay_resume_prompt, QUALITATIVE_EVAL_SYSTEM_PROMPT, QUALITATIVE_EVAL_INPUT, QUALITATIVE_RUBRIC_FIELDS, qualitative_system_prompt, capture_context_prompt, test_plan_system_prompt, test_plan_prompt, TEST_PLAN_PROMPT_VERSION
+from .plan_cache import TestPlanCache, get_plan_cache
+from .plan_stream import TestPlanStreamParser, parse_test_plan_items
+from .run_store import IncrementalPlan, RunStore, get_run_store, plan_incremental_run
+from .html_reducer import reduce_html
+from .usage import track_usage
+from .tracing import add_span, metrics, span, track_trace
+from .shards import ShardExecutor, split_test_plan
+from .parsing import extract_json_block, parse_feature_verdicts, validate_rubric_scores
+from .mcp_node import MCPToolManager
+from .agent_budget import INCOMPLETE_STATUS, step_budget
+from .browser import get_shared_browser
+from .capture import Capture, CaptureStore, current_capture, get_capture_store, use_capture
+from .plan_compiler import CompiledFeature, CompileError, FeatureRun, compile_feature, run_compiled_feature
+from .trajectory import (
+    ReplayOutcome, TrajectoryRecorder, TrajectoryStore, describe_steps, get_trajectory_store, record_trajectory,
+    replay_trajectory
+)
+
+# Configuration constants
+COMPILED_MAX_CONCURRENCY = 8  # browser contexts running compiled features at once
+# Rubrics scored together by one agent when qualitative rubrics run in parallel
+QUALITATIVE_RUBRIC_GROUPS = [
+    ["visual_ux", "content_quality"],
+    ["content_grounding", "data_consistency"],
+    ["navigation"],
+    ["feature_coverage"],
+]
 
 class Evaluator:
-    def __init__(self, llm_client: LLMClient):
+    def __init__(self, llm_client: LLMClient, plan_cache: TestPlanCache = None,
+                 trajectory_store: TrajectoryStore = None, run_store: RunStore = None,
+                 capture_store: CaptureStore = None):
         self.llm_client = llm_client
+        self.plan_cache = plan_cache or get_plan_cache()
+        self.trajectory_store = trajectory_store or get_trajectory_store()
+        self.run_store = run_store or get_run_store()
+        self.capture_store = capture_store or get_capture_store()
 
-    async def evaluate(self, user_input: UserInput) -> EvaluationResult:
+    async def evaluate(self, user_input: UserInput, on_event: Optional[EventCallback] = None) -> EvaluationResult:
         """
         Evaluate the user query and return the result.
+
+        If ``on_event`` is given it is awaited with progress events (test plan ready,
+        shard started, tool calls, per-feature verdicts) and finally the summary.
         """
         start_time = time.time()
         
-        try:
-            if user_input.evaluation_type == EvaluationType.QUALITATIVE:
-                result = await self._run_qualitative_evaluation(user_input)
-            elif user_input.evaluation_type == EvaluationType.FEATURE_CORRECTNESS:
-                result = await self._run_feature_correctness_evaluation(user_input)
-            else:
-                raise ValueError(f"Unsupported evaluation type: {user_input.evaluation_type}")
+        with track_usage() as usage, track_trace() as trace:
+            try:
+                capture = await self._get_capture(user_input) if user_input.use_capture else None
+                with use_capture(capture):
+                    if user_input.evaluation_type == EvaluationType.QUALITATIVE:
+                        result = await self._run_qualitative_evaluation(user_input, on_event)
+                    elif user_input.evaluation_type == EvaluationType.FEATURE_CORRECTNESS:
+                        result = await self._run_feature_correctness_evaluation(user_input, on_event)
+                    else:
+                        raise ValueError(f"Unsupported evaluation type: {user_input.evaluation_type}")
+                if capture is not None:
+                    result.raw_response = {**(result.raw_response or {}), "capture": capture.summary()}
+                    
+                execution_time = time.time() - start_time
+                result.execution_time_seconds = execution_time
+                result.token_usage = usage.as_dict()
+                result.spans = trace.as_list()
+                result.stage_usage = trace.stage_usage()
                 
-            execution_time = time.time() - start_time
-            result.execution_time_seconds = execution_time
-            return result
-            
+            except Exception as e:
+                execution_time = time.time() - start_time
+                result = EvaluationResult(
+                    evaluation_type=user_input.evaluation_type,
+                    provider_used=self.llm_client.provider,
+                    success=False,
+                    error_message=str(e),
+                    execution_time_seconds=execution_time,
+                    token_usage=usage.as_dict(),
+                    spans=trace.as_list(),
+                    stage_usage=trace.stage_usage()
+                )
+
+        metrics.observe_evaluation(result.evaluation_type.value, result.success, result.execution_time_seconds)
+
+        await self._emit(on_event, "summary", result=result.model_dump(mode="json"))
+        return result
+
+    async def _get_capture(self, user_input: UserInput) -> Optional[Capture]:
+        """Crawl the app once per build (or reuse the stored capture); None if it cannot be captured"""
+        try:
+            html_content = await self._fetch_html_content(user_input.app_url)
+            with span("capture") as capture_span:
+                capture = await self.capture_store.get_or_capture(
+                    user_input.app_id or user_input.app_url, user_input.app_url, html_content
+                )
+                capture_span.set(states=len(capture.states), cached=capture.cached)
         except Exception as e:
-            execution_time = time.time() - start_time
-            return EvaluationResult(
-                evaluation_type=user_input.evaluation_type,
-                provider_used=self.llm_client.provider,
-                success=False,
-                error_message=str(e),
-                execution_time_seconds=execution_time
-            )
+            print(f"Warning: App capture unavailable, agents will explore the app themselves: {str(e).splitlines()[0]}")
+            return None
+        print(f"📸 Captured {len(capture.states)} app states{' (cached)' if capture.cached else ''}")
+        return capture
+
+    def _capture_context(self) -> str:
+        """Prompt text describing the captured app states, if this evaluation has a capture"""
+        capture = current_capture()
+        return capture_context_prompt.format(states=capture.prompt_context()) if capture else ""
 
-    async def _run_qualitative_evaluation(self, user_input: UserInput) -> EvaluationResult:
+    async def _emit(self, on_event: Optional[EventCallback], event: str, **data):
+        """Send a progress event to the caller, if it asked for them"""
+        if on_event:
+            await on_event({"event": event, **data})
+
+    async def _run_qualitative_evaluation(self, user_input: UserInput, on_event: Optional[EventCallback] = None) -> EvaluationResult:
         """Run qualitative evaluation"""
+        if user_input.parallel_rubrics:
+            return await self._run_parallel_rubric_evaluation(user_input, on_event)
         try:
-            # Create evaluation prompt
-            evaluation_prompt = QUALITATIVE_EVAL_PROMPT.replace('{user_query}', user_input.user_query)
-            evaluation_prompt = evaluation_prompt.replace('{app_url}', user_input.app_url)
+            # Create evaluation prompt; the static rubric text goes in the cacheable system prompt
+            evaluation_prompt = QUALITATIVE_EVAL_INPUT.replace('{user_query}', user_input.user_query)
+            evaluation_prompt = evaluation_prompt.replace('{app_url}', user_input.app_url) + self._capture_context()
             
             # Run evaluation
-            response = await self.llm_client.run_evaluation_with_tools(evaluation_prompt, 0)
+            response = await self.llm_client.run_evaluation_with_tools(
+                evaluation_prompt, system_prompt=QUALITATIVE_EVAL_SYSTEM_PROMPT, on_event=on_event
+            )
             
             
             return EvaluationResult(
@@ -69,48 +148,146 @@ class Evaluator:
                 error_message=f"Qualitative evaluation failed: {str(e)}"
             )
 
-    async def _run_feature_correctness_evaluation(self, user_input: UserInput) -> EvaluationResult:
+    async def _run_parallel_rubric_evaluation(self, user_input: UserInput,
+                                              on_event: Optional[EventCallback] = None) -> EvaluationResult:
+        """Score each rubric group with its own agent and browser session concurrently, then merge the results"""
+        evaluation_prompt = QUALITATIVE_EVAL_INPUT.replace('{user_query}', user_input.user_query)
+        evaluation_prompt = evaluation_prompt.replace('{app_url}', user_input.app_url) + self._capture_context()
+
+        async def run_group(group: List[str], index: int) -> Dict[str, Any]:
+            group_on_event = self._shard_on_event(on_event, index)
+            await self._emit(group_on_event, "rubric_started", rubrics=group)
+            with span("rubric_group", rubrics=",".join(group)) as group_span:
+                try:
+                    # Every group gets a session even when the pool is smaller than the fan-out
+                    async with self.llm_client.session_pool.lease(overflow=True) as manager:
+                        response = await self.llm_client.run_evaluation_with_tools(
+                            evaluation_prompt, system_prompt=qualitative_system_prompt(group),
+                            on_event=group_on_event, manager=manager
+                        )
+                except Exception as e:
+                    group_span.set(success=False)
+                    await self._emit(group_on_event, "rubric_finished", rubrics=group, success=False, error=str(e))
+                    return {"rubrics": group, "success": False, "error": str(e)}
+                scores, problems = validate_rubric_scores(
+                    extract_json_block(response), {r: QUALITATIVE_RUBRIC_FIELDS[r] for r in group}
+                )
+                group_span.set(success=True, problems=len(problems))
+            await self._emit(group_on_event, "rubric_finished", rubrics=group, success=True, scores=scores)
+            return {"rubrics": group, "success": True, "scores": scores, "problems": problems, "response": response}
+
+        # All groups run at once so the wall-clock time is that of the slowest one
+        max_concurrency = user_input.max_concurrency or len(QUALITATIVE_RUBRIC_GROUPS)
+        groups = await ShardExecutor(max_concurrency).run(QUALITATIVE_RUBRIC_GROUPS, run_group)
+
+        merged: Dict[str, Any] = {}
+        problems: List[str] = []
+        for group in groups:
+            if group["success"]:
+                merged.update(group["scores"])
+                problems += group["problems"]
+            else:
+                problems += [f"{rubric}: agent failed: {group['error']}" for rubric in group["rubrics"]]
+        if not merged:
+            return EvaluationResult(
+                evaluation_type=user_input.evaluation_type,
+                provider_used=self.llm_client.provider,
+                success=False,
+                error_message=f"Qualitative evaluation failed: {'; '.join(problems)}"
+            )
+
+        feedback = json.dumps({r: merged[r] for r in QUALITATIVE_RUBRIC_FIELDS if r in merged}, indent=2)
+        return EvaluationResult(
+            evaluation_type=user_input.evaluation_type,
+            provider_used=self.llm_client.provider,
+            success=True,
+            qualitative_feedback=feedback,
+            raw_response={
+                "response": feedback,
+                "validation_errors": problems,
+                "groups": [{k: v for k, v in g.items() if k != "scores"} for g in groups],
+            }
+        )
+
+    async def _run_feature_correctness_evaluation(self, user_input: UserInput, on_event: Optional[EventCallback] = None) -> EvaluationResult:
         """Run feature correctness evaluation with test plan"""
         try:
             # Step 1: Get HTML content
             html_content = await self._fetch_html_content(user_input.app_url)
-            
-            # Step 2: Create test plan
-            test_plan_response = await self.llm_client.generate_response(
-                test_plan_prompt.format(user_query=user_input.user_query, html_content=html_content),
-                test_plan_system_prompt
+            with span("html_reduce", level=user_input.html_reduction_level) as reduce_span:
+                reduction = reduce_html(html_content, user_input.html_reduction_level)
+                reduce_span.set(original_bytes=reduction.original_bytes, reduced_bytes=reduction.reduced_bytes)
+            print(
+                f"✂️ HTML reduced {reduction.original_bytes} → {reduction.reduced_bytes} bytes "
+                f"(~{reduction.original_tokens} → ~{reduction.reduced_tokens} tokens)"
             )
             
-            # Step 3: Parse test plan
-            test_plan_json = self._parse_test_plan(test_plan_response)
+            planner_html = reduction.html + self._capture_context()
 
-            print(f"🧪 Test Plan: {test_plan_json}")
-            
-            # Step 4: Split test plan for parallel execution (if needed)
-            if len(test_plan_json) > 4:  # Only split if many tests
-                mid_point = len(test_plan_json) // 2
-                test_plan_half1 = test_plan_json[:mid_point]
-                test_plan_half2 = test_plan_json[mid_point:]
-                
-                # Run in parallel
-                results = await self._run_parallel_evaluations(
-                    test_plan_half1, test_plan_half2, user_input.app_url
+            # Step 2 + 3: Reuse the previous run's plan if the page barely changed, else create
+            # and parse a test plan (or reuse a cached one)
+            app_id = user_input.app_id or user_input.app_url
+            incremental = None
+            if user_input.incremental:
+                with span("incremental_diff") as diff_span:
+                    incremental = plan_incremental_run(
+                        self.run_store.get(app_id), user_input.user_query, reduction.html,
+                        user_input.html_reduction_level, TEST_PLAN_PROMPT_VERSION
+                    )
+                    diff_span.set(applied=incremental is not None)
+                    if incremental is not None:
+                        diff_span.set(changed_lines=len(incremental.diff.changed), rerun=len(incremental.rerun))
+
+            results: List[EvaluationResult] = []
+            malformed: List[Dict[str, Any]] = []
+            if incremental is not None:
+                test_plan_json, cached = incremental.test_plan, True
+                await self._announce_test_plan(test_plan_json, cached, on_event)
+                results, remaining = await self._carry_forward(incremental, on_event)
+            elif user_input.stream_plan:
+                # Features are executed as they stream out of the planner; nothing is left afterwards
+                test_plan_json, cached, results, malformed = await self._stream_and_run_test_plan(
+                    user_input, planner_html, on_event
                 )
+                remaining = []
             else:
-                # Run single evaluation
-                result1 = await self._run_single_evaluation(test_plan_json, user_input.app_url, 0)
-                return EvaluationResult(
-                evaluation_type=user_input.evaluation_type,
-                provider_used=self.llm_client.provider,
-                success=True,
-                raw_response={"result1": result1}
-            )
+                test_plan_json, cached = await self._get_test_plan(user_input, planner_html)
+                await self._announce_test_plan(test_plan_json, cached, on_event)
+                remaining = test_plan_json
             
+            # Step 4: Run compilable features as Playwright scripts; the rest go to the agent
+            if remaining and user_input.compiled_plans:
+                compiled_results, remaining = await self._run_compiled_features(remaining, user_input, on_event)
+                results += compiled_results
+
+            # Step 5: Shard the remaining test plan and run shards concurrently
+            if remaining:
+                results += await self._run_sharded_evaluations(remaining, user_input, on_event)
+
+            if user_input.incremental:
+                self.run_store.put(
+                    app_id, user_input.user_query, reduction.html, user_input.html_reduction_level,
+                    TEST_PLAN_PROMPT_VERSION, test_plan_json, self._result_verdicts(results)
+                )
+            
+            raw_response = {
+                "results": results,
+                "test_plan_cached": cached,
+                "html_reduction": reduction.model_dump(exclude={"html"}),
+            }
+            if malformed:
+                raw_response["malformed_test_plan_items"] = malformed
+            if incremental is not None:
+                raw_response["incremental"] = {
+                    "changed_lines": len(incremental.diff.changed),
+                    "rerun": [f.get("Test_feature") for f in incremental.rerun if isinstance(f, dict)],
+                    "carried_forward": [v.get("feature_name") for v in incremental.carried],
+                }
             return EvaluationResult(
                 evaluation_type=user_input.evaluation_type,
                 provider_used=self.llm_client.provider,
                 success=True,
-                raw_response={"results": results}
+                raw_response=raw_response
             )
             
         except Exception as e:
@@ -121,53 +298,384 @@ class Evaluator:
                 error_message=f"Feature correctness evaluation failed: {str(e)}"
             )
 
-    async def _run_parallel_evaluations(self, test_plan_half1: List[Dict], 
-                                       test_plan_half2: List[Dict], 
-                                       url: str) -> List[EvaluationResult]:
-        """Run two evaluation halves in parallel using threading"""
+    async def _get_test_plan(self, user_input: UserInput, html_content: str) -> Tuple[List[Dict], bool]:
+        """Return the parsed test plan and whether it came from the cache"""
+        cache_key = self._test_plan_cache_key(user_input, html_content)
+        if user_input.use_plan_cache:
+            with span("test_plan_cache_lookup") as lookup_span:
+                test_plan_json = self.plan_cache.get(cache_key)
+                lookup_span.set(hit=test_plan_json is not None)
+            if test_plan_json is not None:
+                return test_plan_json, True
 
-        def run_agent_sync(test_plan, thread_id):
-            """Wrapper to run async evaluation in a thread"""
-            return asyncio.run(self._run_single_evaluation(test_plan, url, thread_id))
-        
-        # Create and start threads
-        results = [None, None]
-        
-        def thread_1():
-            results[0] = run_agent_sync(test_plan_half1, 0)
-        
-        def thread_2():
-            results[1] = run_agent_sync(test_plan_half2, 1)
-        
-        # Start both threads
-        t1 = threading.Thread(target=thread_1)
-        t2 = threading.Thread(target=thread_2)
-        
-        t1.start()
-        t2.start()
-        
-        # Wait for both to complete
-        t1.join()
-        t2.join()
-        
-        return [results[0], results[1]]
+        with span("test_plan_llm"):
+            test_plan_response = await self.llm_client.generate_response(
+                test_plan_prompt.format(user_query=user_input.user_query, html_content=html_content),
+                test_plan_system_prompt,
+                stage=PLANNING
+            )
+        with span("test_plan_parse", response_chars=len(test_plan_response)) as parse_span:
+            test_plan_json = self._parse_test_plan(test_plan_response)
+            parse_span.set(features=len(test_plan_json))
+
+        if user_input.use_plan_cache:
+            self.plan_cache.put(cache_key, test_plan_json)
+        return test_plan_json, False
+
+    async def _announce_test_plan(self, test_plan: List[Dict], cached: bool, on_event: Optional[EventCallback] = None):
+        print(f"🧪 Test Plan{' (cached)' if cached else ''}: {test_plan}")
+        await self._emit(
+            on_event, "test_plan_ready",
+            cached=cached,
+            features=[f.get("Test_feature") for f in test_plan if isinstance(f, dict)]
+        )
+
+    def _test_plan_cache_key(self, user_input: UserInput, html_content: str) -> str:
+        return TestPlanCache.make_key(
+            html_content,
+            user_input.user_query,
+            self.llm_client.model_for(PLANNING),
+            self.llm_client.temperature,
+            TEST_PLAN_PROMPT_VERSION,
+        )
+
+    async def _stream_and_run_test_plan(self, user_input: UserInput, html_content: str,
+                                        on_event: Optional[EventCallback] = None
+                                        ) -> Tuple[List[Dict], bool, List[EvaluationResult], List[Dict[str, Any]]]:
+        """Stream the test plan from the planner and start executing each feature as soon as it parses.
+
+        Returns the plan, whether it came from the cache, the execution results and the
+        malformed plan items that were skipped.
+        """
+        cache_key = self._test_plan_cache_key(user_input, html_content)
+        max_concurrency = user_input.max_concurrency or self.llm_client.session_pool.size
+        executor = ShardExecutor(max_concurrency)
+        per_feature = user_input.record_trajectories or user_input.replay
+        shard_size = 1 if per_feature else (user_input.shard_size or 1)
+        pending: List[Dict] = []
+        tasks: List[asyncio.Task] = []
+
+        def dispatch(final: bool = False):
+            while len(pending) >= shard_size or (final and pending):
+                shard = pending[:shard_size]
+                del pending[:shard_size]
+                tasks.append(executor.submit(
+                    lambda shard, index: self._run_plan_shard(shard, user_input, index, on_event), shard, len(tasks)
+                ))
 
-    async def _run_single_evaluation(self, test_plan: List[Dict], url: str, thread_id: int) -> EvaluationResult:
-        """Run evaluation for a single test plan"""
         try:
-            evaluation_prompt = evaluation_prompt_template.format(test_plan=test_plan, url=url)
+            test_plan_json = None
+            if user_input.use_plan_cache:
+                with span("test_plan_cache_lookup") as lookup_span:
+                    test_plan_json = self.plan_cache.get(cache_key)
+                    lookup_span.set(hit=test_plan_json is not None)
+            cached = test_plan_json is not None
 
-            # Run evaluation
-            response = await self.llm_client.run_evaluation_with_tools(evaluation_prompt, thread_id)
-            
+            malformed: List[Dict[str, Any]] = []
+            if cached:
+                await self._announce_test_plan(test_plan_json, cached, on_event)
+                pending.extend(test_plan_json)
+                dispatch(final=True)
+            else:
+                parser = TestPlanStreamParser()
+                started = time.perf_counter()
+                first_feature = None
+
+                async def take(features: List[Dict]):
+                    nonlocal first_feature
+                    for item in parser.malformed[len(malformed):]:
+                        print(f"Warning: Skipping malformed test plan item {item.index}: {item.error}")
+                        malformed.append(item.as_dict())
+                        await self._emit(on_event, "test_plan_item_malformed", **item.as_dict())
+                    for feature in features:
+                        if first_feature is None:
+                            first_feature = time.perf_counter() - started
+                        await self._emit(on_event, "test_plan_feature", feature_name=feature.get("Test_feature"))
+                        pending.append(feature)
+                        dispatch()
+
+                prompt = test_plan_prompt.format(user_query=user_input.user_query, html_content=html_content)
+                async for chunk in self.llm_client.stream_response(prompt, test_plan_system_prompt, stage=PLANNING):
+                    await take(parser.feed(chunk))
+                await take(parser.close())
+                dispatch(final=True)
+
+                test_plan_json = parser.features
+                add_span(
+                    "test_plan_stream", time.perf_counter() - started,
+                    features=len(test_plan_json), malformed=len(malformed), first_feature_seconds=first_feature
+                )
+                if not test_plan_json:
+                    raise Exception("Test plan response contained no valid features")
+                await self._announce_test_plan(test_plan_json, cached, on_event)
+                if user_input.use_plan_cache and not malformed:
+                    self.plan_cache.put(cache_key, test_plan_json)
+
+            shard_results = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return test_plan_json, cached, [r for results in shard_results for r in results], malformed
+
+    async def _run_plan_shard(self, shard: List[Dict], user_input: UserInput, index: int,
+                              on_event: Optional[EventCallback] = None) -> List[EvaluationResult]:
+        """Run one dispatched shard through the same stages as a whole plan: compiled scripts, then the agent"""
+        results: List[EvaluationResult] = []
+        remaining = shard
+        if user_input.compiled_plans:
+            results, remaining = await self._run_compiled_features(shard, user_input, on_event)
+        if not remaining:
+            return results
+        if user_input.record_trajectories or user_input.replay:
+            for feature in remaining:
+                results.append(await self._run_feature_with_trajectory(feature, user_input, index, on_event))
+        else:
+            results.append(await self._run_single_evaluation(remaining, user_input.app_url, index, on_event))
+        return results
+
+    async def _carry_forward(self, incremental: IncrementalPlan,
+                             on_event: Optional[EventCallback] = None) -> Tuple[List[EvaluationResult], List[Dict]]:
+        """Report the previous verdicts of unaffected features; returns them and the features to re-run"""
+        print(
+            f"🔁 Incremental run: {len(incremental.diff.changed)} changed lines, "
+            f"re-running {len(incremental.rerun)} of {len(incremental.test_plan)} features"
+        )
+        if not incremental.carried:
+            return [], incremental.rerun
+
+        for verdict in incremental.carried:
+            await self._emit(on_event, "feature_verdict", carried_forward=True, **verdict)
+        response = json.dumps({"application_evaluation": {"features_analysis": incremental.carried}})
+        result = EvaluationResult(
+            evaluation_type=EvaluationType.FEATURE_CORRECTNESS,
+            provider_used=self.llm_client.provider,
+            success=True,
+            raw_response={"response": response, "carried_forward": True}
+        )
+        return [result], incremental.rerun
+
+    @staticmethod
+    def _result_verdicts(results: List[EvaluationResult]) -> List[Dict[str, Any]]:
+        """Per-feature verdicts of every successful shard result; features a stopped agent did not finish are left out"""
+        verdicts = []
+        for result in results:
+            if result.success and result.raw_response:
+                verdicts += [
+                    v for v in parse_feature_verdicts(result.raw_response.get("response", ""))
+                    if v.get("status") != INCOMPLETE_STATUS
+                ]
+        return verdicts
+
+    async def _run_sharded_evaluations(self, test_plan: List[Dict], user_input: UserInput,
+                                       on_event: Optional[EventCallback] = None) -> List[EvaluationResult]:
+        """Run the test plan as K shards on this event loop, bounded by browser capacity"""
+        max_concurrency = user_input.max_concurrency or self.llm_client.session_pool.size
+        executor = ShardExecutor(max_concurrency)
+
+        if user_input.record_trajectories or user_input.replay:
+            # Trajectories are per feature, so every feature gets its own shard
+            shards = split_test_plan(test_plan, max_concurrency, 1)
+            return await executor.run(
+                shards,
+                lambda shard, index: self._run_feature_with_trajectory(shard[0], user_input, index, on_event)
+            )
+
+        shards = split_test_plan(test_plan, max_concurrency, user_input.shard_size)
+        return await executor.run(
+            shards,
+            lambda shard, index: self._run_single_evaluation(shard, user_input.app_url, index, on_event)
+        )
+
+    async def _run_compiled_features(self, test_plan: List[Dict], user_input: UserInput,
+                                     on_event: Optional[EventCallback] = None) -> Tuple[List[EvaluationResult], List[Dict]]:
+        """Run every compilable feature as a Playwright script in the shared local browser.
+
+        Returns the results of the features that passed and the features left for the
+        agent: those that did not compile, failed, or could not run at all.
+        """
+        compiled = []
+        remaining = []
+        for feature in test_plan:
+            try:
+                compiled.append((feature, compile_feature(feature)))
+            except CompileError as e:
+                print(f"⚙️ Not compiled, using the agent: {feature.get('Test_feature') if isinstance(feature, dict) else feature} ({e})")
+                remaining.append(feature)
+        if not compiled:
+            return [], remaining
+
+        browser = get_shared_browser()
+        try:
+            await browser.start()
+        except Exception as e:
+            print(f"Warning: Compiled plans unavailable, using the agent for all features: {str(e).splitlines()[0]}")
+            return [], test_plan
+
+        async def run_one(feature: Dict, program: CompiledFeature):
+            with span("compiled_feature", feature=program.name, steps=len(program.steps)) as feature_span:
+                try:
+                    async with browser.context() as context:
+                        run = await run_compiled_feature(program, context, user_input.app_url)
+                except Exception as e:
+                    run = FeatureRun(False, f"Compiled script could not run: {str(e)}")
+                feature_span.set(passed=run.passed)
+            return feature, program, run
+
+        max_concurrency = user_input.max_concurrency or COMPILED_MAX_CONCURRENCY
+        runs = await ShardExecutor(max_concurrency).run(
+            [[pair] for pair in compiled], lambda shard, index: run_one(*shard[0])
+        )
+
+        results = []
+        for feature, program, run in runs:
+            if not run.passed:
+                # A failing script may be a bad selector rather than a broken app: let the agent judge
+                await self._emit(on_event, "compiled_feature_failed", feature_name=program.name, reason=run.reason)
+                remaining.append(feature)
+                continue
+            verdict = {"feature_name": program.name, "status": "SUCCESS", "reason": run.reason}
+            await self._emit(on_event, "feature_verdict", compiled=True, **verdict)
+            results.append(EvaluationResult(
+                evaluation_type=EvaluationType.FEATURE_CORRECTNESS,
+                provider_used=self.llm_client.provider,
+                success=True,
+                execution_time_seconds=run.duration,
+                raw_response={
+                    "response": json.dumps({"application_evaluation": {"features_analysis": [verdict]}}),
+                    "compiled": True,
+                    "script": program.script,
+                }
+            ))
+        print(f"⚙️ Compiled plans: {len(results)} passed, {len(remaining)} left for the agent")
+        return results, remaining
+
+    def _shard_on_event(self, on_event: Optional[EventCallback], shard: int) -> Optional[EventCallback]:
+        """Tag progress events with the shard they come from"""
+        if not on_event:
+            return None
+
+        async def shard_on_event(event: Dict[str, Any]):
+            await on_event({**event, "shard": shard})
+        return shard_on_event
+
+    async def _run_feature_with_trajectory(self, feature: Dict, user_input: UserInput, shard: int = 0,
+                                           on_event: Optional[EventCallback] = None) -> EvaluationResult:
+        """Verify one feature by replaying its stored trajectory, handing over to the agent at the first divergence"""
+        app_id = user_input.app_id or user_input.app_url
+        record_app_id = app_id if user_input.record_trajectories else None
+        name = feature.get("Test_feature", "") if isinstance(feature, dict) else ""
+        trajectory = self.trajectory_store.get(app_id, name) if user_input.replay and name else None
+        if trajectory is None:
+            return await self._run_single_evaluation([feature], user_input.app_url, shard, on_event,
+                                                     record_app_id=record_app_id)
+
+        shard_on_event = self._shard_on_event(on_event, shard)
+        async with self.llm_client.session_pool.lease() as manager:
+            try:
+                await self._emit(shard_on_event, "shard_started", features=[name], replay=True)
+                with span("trajectory_replay", feature=name, steps=len(trajectory["steps"])) as replay_span:
+                    outcome = await replay_trajectory(trajectory, manager, user_input.app_url)
+                    replay_span.set(completed=outcome.completed, executed=outcome.executed)
+            except Exception as e:
+                await self._emit(shard_on_event, "shard_finished", success=False, error=str(e))
+                return EvaluationResult(
+                    evaluation_type=EvaluationType.FEATURE_CORRECTNESS,
+                    provider_used=self.llm_client.provider,
+                    success=False,
+                    error_message=f"Trajectory replay failed: {str(e)}"
+                )
+
+            if outcome.completed:
+                verdict = {
+                    "feature_name": name,
+                    "status": trajectory["verdict"].get("status"),
+                    "reason": f"Replayed {outcome.executed} recorded steps without divergence. "
+                              f"Recorded verdict: {trajectory['verdict'].get('reason')}",
+                }
+                await self._emit(shard_on_event, "feature_verdict", replayed=True, **verdict)
+                await self._emit(shard_on_event, "shard_finished", success=True)
+                response = json.dumps({"application_evaluation": {"features_analysis": [verdict]}})
+                return EvaluationResult(
+                    evaluation_type=EvaluationType.FEATURE_CORRECTNESS,
+                    provider_used=self.llm_client.provider,
+                    success=True,
+                    raw_response={"response": response, "replayed": True, "replay_steps": outcome.executed}
+                )
+
+            print(f"↪️ Replay of '{name}' diverged, continuing with the agent: {outcome.reason}")
+            await self._emit(shard_on_event, "replay_diverged", step=outcome.executed + 1, reason=outcome.reason)
+            return await self._run_single_evaluation([feature], user_input.app_url, shard, on_event,
+                                                     manager=manager, resume=outcome, record_app_id=record_app_id)
+
+    async def _run_single_evaluation(self, test_plan: List[Dict], url: str, shard: int = 0,
+                                     on_event: Optional[EventCallback] = None,
+                                     manager: Optional[MCPToolManager] = None,
+                                     resume: Optional[ReplayOutcome] = None,
+                                     record_app_id: Optional[str] = None) -> EvaluationResult:
+        """Run evaluation for a single test plan.
+
+        ``resume`` continues a diverged replay in its session (``manager``); with
+        ``record_app_id`` the tool calls of a single-feature plan are stored as its trajectory.
+        """
+        shard_on_event = self._shard_on_event(on_event, shard)
+
+        try:
+            if resume is None:
+                await self._emit(
+                    shard_on_event, "shard_started",
+                    features=[f.get("Test_feature") for f in test_plan if isinstance(f, dict)]
+                )
+            evaluation_prompt = evaluation_prompt_template.format(test_plan=test_plan, url=url) + self._capture_context()
+            if resume is not None:
+                evaluation_prompt += replay_resume_prompt.format(
+                    steps=describe_steps(resume.recorder.steps) or "(none)", reason=resume.reason
+                )
+
+            recording = record_app_id is not None and len(test_plan) == 1 and isinstance(test_plan[0], dict)
+            recorder = resume.recorder if resume is not None else TrajectoryRecorder()
+
+            # Run evaluation within a turn budget sized to the shard's actions and assertions
+            budget = step_budget(test_plan)
+            with span("shard", shard=shard, features=len(test_plan), budget=budget), \
+                    (record_trajectory(recorder) if recording else nullcontext()):
+                response = await self.llm_client.run_evaluation_with_tools(
+                    evaluation_prompt, on_event=shard_on_event, manager=manager, max_steps=budget
+                )
+
+            data = extract_json_block(response)
+            stopped = data.get("agent_stopped") if isinstance(data, dict) else None
+            verdicts = parse_feature_verdicts(response)
+            for verdict in verdicts:
+                await self._emit(
+                    shard_on_event, "feature_verdict",
+                    feature_name=verdict.get("feature_name"),
+                    status=verdict.get("status"),
+                    reason=verdict.get("reason")
+                )
+            # The trajectory of a stopped run does not verify the whole feature, so it is not stored
+            if recording and verdicts and recorder.steps and not stopped:
+                self.trajectory_store.put(
+                    record_app_id, test_plan[0].get("Test_feature", ""), url, recorder.steps, verdicts[0]
+                )
+            await self._emit(shard_on_event, "shard_finished", success=True)
+
+            raw_response = {"response": response}
+            if resume is not None:
+                raw_response["replay_steps"] = resume.executed
+            if stopped:
+                raw_response["stopped_early"] = stopped
             return EvaluationResult(
                 evaluation_type=EvaluationType.FEATURE_CORRECTNESS,
                 provider_used=self.llm_client.provider,
                 success=True,
-                raw_response={"response": response}
+                raw_response=raw_response
             )
             
         except Exception as e:
+            await self._emit(shard_on_event, "shard_finished", success=False, error=str(e))
             return EvaluationResult(
                 evaluation_type=EvaluationType.FEATURE_CORRECTNESS,
                 provider_used=self.llm_client.provider,
@@ -176,22 +684,30 @@ class Evaluator:
             )
 
     async def _fetch_html_content(self, url: str) -> str:
-        """Fetch HTML content from URL"""
+        """Fetch HTML content from URL without blocking the event loop"""
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
+            import requests
+
+            with span("html_fetch", url=url) as fetch_span:
+                response = await asyncio.to_thread(requests.get, url, timeout=30)
+                response.raise_for_status()
+                fetch_span.set(status_code=response.status_code, bytes=len(response.content))
             return response.text
         except Exception as e:
             raise Exception(f"Failed to fetch HTML content from {url}: {str(e)}")
 
     def _parse_test_plan(self, test_plan_response: str) -> List[Dict]:
-        """Parse test plan JSON from LLM response"""
-        try:
-            match = re.search(r"```json\s*(.*?)\s*```", test_plan_response, re.DOTALL)
-            if match:
-                json_str = match.group(1)
-                return json.loads(json_str)
-            else:
-                raise Exception("No JSON code block found in test plan response")
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse test plan JSON: {str(e)}")
\ No newline at end of file
+        """Parse test plan JSON from LLM response, skipping malformed items if the array as a whole is invalid"""
+        match = re.search(r"```json\s*(.*?)\s*```", test_plan_response, re.DOTALL)
+        if match:
+            try:
+                return json.loads(match.group(1))
+            except json.JSONDecodeError:
+                pass
+
+        parsed = parse_test_plan_items(test_plan_response)
+        for item in parsed.malformed:
+            print(f"Warning: Skipping malformed test plan item {item.index}: {item.error}")
+        if not parsed.features:
+            raise Exception("Failed to parse test plan JSON: no valid test plan items")
+        return parsed.features
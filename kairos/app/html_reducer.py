@@ -0,0 +1,218 @@
+"""
+HTML reduction before test plan generation.
+
+Generated apps ship inline SVG paths, base64 images, minified vendor bundles and
+lots of whitespace that cost input tokens without helping the planner. The
+reducer rewrites the page into a compact HTML string that keeps the document
+structure, interactive elements, ids, classes, labels and handler names.
+
+Levels:
+    0 - passthrough, only measures the page
+    1 - drop comments, whitespace, SVG internals, data: URIs and minified scripts
+    2 - also drop <style> bodies and presentational attributes (default)
+    3 - also reduce inline scripts to their function/event names, shorten long
+        text nodes and drop <meta>/<link> tags
+"""
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Configuration constants
+DEFAULT_REDUCTION_LEVEL = 2
+CHARS_PER_TOKEN = 4  # rough estimate for Claude tokenization of HTML/JS
+MINIFIED_SCRIPT_MIN_CHARS = 2000
+MINIFIED_AVG_LINE_CHARS = 300
+MAX_ATTR_CHARS = 200
+MAX_TEXT_CHARS = 200
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+             "link", "meta", "source", "track", "wbr"}
+
+# Attributes kept at level >= 2; on* handlers and aria-* are always kept
+KEPT_ATTRS = {
+    "id", "class", "name", "type", "href", "src", "role", "for", "value",
+    "placeholder", "title", "alt", "label", "action", "method", "target",
+    "disabled", "checked", "selected", "readonly", "required", "multiple",
+    "min", "max", "step", "pattern", "maxlength", "minlength", "hidden",
+    "tabindex", "contenteditable", "draggable", "open", "data-testid", "rel",
+}
+
+_FUNCTION_NAME_RE = re.compile(
+    r"function\s+([A-Za-z_$][\w$]*)"
+    r"|(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s*)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)"
+)
+_EVENT_NAME_RE = re.compile(r"addEventListener\(\s*['\"]([\w:-]+)['\"]")
+
+
+class HtmlReduction(BaseModel):
+    html: str
+    level: int
+    original_bytes: int
+    reduced_bytes: int
+    original_tokens: int
+    reduced_tokens: int
+
+    @property
+    def ratio(self) -> float:
+        return self.reduced_bytes / self.original_bytes if self.original_bytes else 1.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without pulling in a tokenizer."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _is_minified(script: str) -> bool:
+    if len(script) < MINIFIED_SCRIPT_MIN_CHARS:
+        return False
+    lines = script.count("\n") + 1
+    return len(script) / lines > MINIFIED_AVG_LINE_CHARS
+
+
+def _script_outline(script: str) -> str:
+    functions = []
+    for match in _FUNCTION_NAME_RE.finditer(script):
+        name = match.group(1) or match.group(2)
+        if name not in functions:
+            functions.append(name)
+    events = sorted(set(_EVENT_NAME_RE.findall(script)))
+    parts = []
+    if functions:
+        parts.append(f"functions: {', '.join(functions)}")
+    if events:
+        parts.append(f"events: {', '.join(events)}")
+    return f"/* {'; '.join(parts) or 'script'} ({len(script)} bytes) */"
+
+
+class _Reducer(HTMLParser):
+    def __init__(self, level: int):
+        super().__init__(convert_charrefs=True)
+        self.level = level
+        self.out: List[str] = []
+        self._svg_depth = 0
+        self._raw_tag: Optional[str] = None  # script/style whose body is being collected
+        self._raw_attrs: List[Tuple[str, Optional[str]]] = []
+        self._raw_body: List[str] = []
+
+    # -- attributes -------------------------------------------------------
+    def _keep_attr(self, name: str) -> bool:
+        if self.level < 2:
+            return name != "style"
+        return name in KEPT_ATTRS or name.startswith(("on", "aria-"))
+
+    def _format_attrs(self, attrs: List[Tuple[str, Optional[str]]]) -> str:
+        parts = []
+        for name, value in attrs:
+            if not self._keep_attr(name):
+                continue
+            if value is None:
+                parts.append(f" {name}")
+                continue
+            if value.startswith("data:"):
+                value = value.split(",", 1)[0] + ",…"
+            elif self.level >= 2 and len(value) > MAX_ATTR_CHARS and name != "class":
+                value = value[:MAX_ATTR_CHARS] + "…"
+            parts.append(f' {name}="{escape(value, quote=True)}"')
+        return "".join(parts)
+
+    # -- tags -------------------------------------------------------------
+    def handle_starttag(self, tag, attrs):
+        if self._svg_depth:
+            if tag == "svg":
+                self._svg_depth += 1
+            return
+        if self.level >= 3 and tag in ("meta", "link"):
+            return
+        if tag in ("script", "style"):
+            self._raw_tag, self._raw_attrs, self._raw_body = tag, attrs, []
+            return
+        self.out.append(f"<{tag}{self._format_attrs(attrs)}>")
+        if tag == "svg":
+            self._svg_depth = 1
+
+    def handle_startendtag(self, tag, attrs):
+        if self._svg_depth or (self.level >= 3 and tag in ("meta", "link")):
+            return
+        self.out.append(f"<{tag}{self._format_attrs(attrs)}>")
+
+    def handle_endtag(self, tag):
+        if self._svg_depth:
+            if tag == "svg":
+                self._svg_depth -= 1
+                if not self._svg_depth:
+                    self.out.append("</svg>")
+            return
+        if tag == self._raw_tag:
+            self._flush_raw()
+            return
+        if tag not in VOID_TAGS:
+            self.out.append(f"</{tag}>")
+
+    def _flush_raw(self):
+        tag, attrs, body = self._raw_tag, self._raw_attrs, "".join(self._raw_body)
+        self._raw_tag = None
+        is_json = tag == "script" and any(n == "type" and v and "json" in v for n, v in attrs)
+        if tag == "script" and is_json and self.level >= 2:
+            return
+
+        if not body.strip():
+            body = ""
+        elif tag == "style":
+            if self.level >= 2:
+                body = f"/* {len(body)} bytes of css */"
+            else:
+                body = re.sub(r"\s+", " ", re.sub(r"/\*.*?\*/", "", body, flags=re.DOTALL)).strip()
+        elif _is_minified(body):
+            body = f"/* minified script omitted ({len(body)} bytes) */"
+        elif self.level >= 3:
+            body = _script_outline(body)
+
+        self.out.append(f"<{tag}{self._format_attrs(attrs)}>{body}</{tag}>")
+
+    # -- content ----------------------------------------------------------
+    def handle_data(self, data):
+        if self._raw_tag:
+            self._raw_body.append(data)
+            return
+        if self._svg_depth:
+            return
+        text = re.sub(r"\s+", " ", data)
+        if not text.strip():
+            return
+        if self.level >= 3 and len(text) > MAX_TEXT_CHARS:
+            text = text[:MAX_TEXT_CHARS] + "…"
+        self.out.append(escape(text, quote=False))
+
+    def handle_decl(self, decl):
+        self.out.append(f"<!{decl}>")
+
+    def handle_comment(self, data):
+        pass
+
+    def close(self):
+        super().close()
+        if self._raw_tag:
+            self._flush_raw()
+
+
+def reduce_html(html: str, level: int = DEFAULT_REDUCTION_LEVEL) -> HtmlReduction:
+    """Return a compact, structure-preserving version of ``html`` for the planner."""
+    if level <= 0:
+        reduced = html
+    else:
+        parser = _Reducer(level)
+        parser.feed(html)
+        parser.close()
+        reduced = "".join(parser.out)
+
+    return HtmlReduction(
+        html=reduced,
+        level=level,
+        original_bytes=len(html.encode("utf-8")),
+        reduced_bytes=len(reduced.encode("utf-8")),
+        original_tokens=estimate_tokens(html),
+        reduced_tokens=estimate_tokens(reduced),
+    )
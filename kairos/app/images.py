@@ -0,0 +1,85 @@
+import base64
+import hashlib
+import io
+from typing import Dict, Optional, Union
+
+# Optional Pillow import for downscaling/re-encoding
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Configuration constants
+IMAGE_MAX_DIMENSION = 1280  # longest side in pixels
+IMAGE_MAX_BYTES = 400 * 1024
+IMAGE_JPEG_QUALITY = 80
+IMAGE_MIN_JPEG_QUALITY = 40
+
+_pillow_warning_shown = False
+
+
+def _warn_no_pillow():
+    global _pillow_warning_shown
+    if not _pillow_warning_shown:
+        _pillow_warning_shown = True
+        print("Warning: Pillow is not installed; screenshots are sent at full size and dropped when over budget "
+              "(pip install Pillow)")
+
+
+class ScreenshotProcessor:
+    """Keeps screenshots in memory: downscales them to a budget and drops repeated frames.
+
+    One processor is used per agent run, so deduplication is scoped to a
+    single browser session.
+    """
+
+    def __init__(self, max_dimension: int = IMAGE_MAX_DIMENSION, max_bytes: int = IMAGE_MAX_BYTES):
+        self.max_dimension = max_dimension
+        self.max_bytes = max_bytes
+        self._frames: Dict[str, int] = {}
+
+    def process(self, data: Union[str, bytes], mime_type: str = "image/png") -> Dict[str, str]:
+        """Return an Anthropic image block, or a text block for a duplicate or unusable frame."""
+        raw = base64.b64decode(data) if isinstance(data, str) else bytes(data)
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest in self._frames:
+            return {"type": "text", "text": f"[screenshot identical to frame {self._frames[digest]}, omitted]"}
+        frame = len(self._frames) + 1
+        self._frames[digest] = frame
+
+        encoded = self._fit_budget(raw, mime_type)
+        if encoded is None:
+            return {"type": "text", "text": f"[screenshot frame {frame} exceeds the {self.max_bytes} byte budget, omitted]"}
+        data_bytes, mime_type = encoded
+        return {
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": mime_type,
+                "data": base64.b64encode(data_bytes).decode("ascii"),
+            },
+        }
+
+    def _fit_budget(self, raw: bytes, mime_type: str) -> Optional[tuple]:
+        if Image is None:
+            _warn_no_pillow()
+            return (raw, mime_type) if len(raw) <= self.max_bytes else None
+
+        image = Image.open(io.BytesIO(raw))
+        if max(image.size) <= self.max_dimension and len(raw) <= self.max_bytes:
+            return raw, mime_type
+
+        image = image.convert("RGB")
+        image.thumbnail((self.max_dimension, self.max_dimension))
+        quality = IMAGE_JPEG_QUALITY
+        while True:
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= self.max_bytes:
+                return buffer.getvalue(), "image/jpeg"
+            if quality > IMAGE_MIN_JPEG_QUALITY:
+                quality -= 10
+            elif max(image.size) > 256:
+                image.thumbnail((image.size[0] * 3 // 4, image.size[1] * 3 // 4))
+            else:
+                return None
@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .models import EvaluationResult, JobStatus, UserInput
+from .rate_limit import BATCH_PRIORITY, use_priority
+
+# Configuration constants
+DEFAULT_BATCH_WORKERS = 2
+DEFAULT_JOB_RETENTION_SECONDS = 24 * 3600  # finished jobs (and their results) are dropped after this
+DEFAULT_MAX_FINISHED_JOBS = 100  # beyond this, the oldest finished jobs are dropped first
+
+
+class BatchJob:
+    """A batch of evaluations submitted together and tracked under one id."""
+
+    def __init__(self, items: List[UserInput], priority: int = 0):
+        self.id = uuid.uuid4().hex
+        self.items = items
+        self.priority = priority
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.item_status: List[JobStatus] = [JobStatus.QUEUED] * len(items)
+        self.results: List[Optional[EvaluationResult]] = [None] * len(items)
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+    @property
+    def status(self) -> JobStatus:
+        if all(s == JobStatus.QUEUED for s in self.item_status):
+            return JobStatus.QUEUED
+        if any(s in (JobStatus.QUEUED, JobStatus.RUNNING) for s in self.item_status):
+            return JobStatus.RUNNING
+        if all(s == JobStatus.FAILED for s in self.item_status):
+            return JobStatus.FAILED
+        return JobStatus.COMPLETED
+
+    def summary(self) -> Dict[str, Any]:
+        counts = {status.value: 0 for status in JobStatus}
+        for status in self.item_status:
+            counts[status.value] += 1
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "priority": self.priority,
+            "total_items": len(self.items),
+            "item_counts": counts,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def item_results(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "index": index,
+                "user_query": item.user_query,
+                "url": item.app_url,
+                "evaluation_type": item.evaluation_type,
+                "status": self.item_status[index],
+                "result": self.results[index].model_dump() if self.results[index] else None,
+            }
+            for index, item in enumerate(self.items)
+        ]
+
+
+class JobQueue:
+    """In-process priority queue feeding batch items to a fixed pool of async workers.
+
+    Items, not whole jobs, are queued so a high-priority job submitted later
+    overtakes the remaining items of a large low-priority job. Finished jobs are
+    kept for ``retention_seconds`` and at most ``max_finished_jobs`` of them.
+    """
+
+    def __init__(self, run_item: Callable[[UserInput], Awaitable[EvaluationResult]],
+                 workers: Optional[int] = None, retention_seconds: Optional[float] = None,
+                 max_finished_jobs: Optional[int] = None):
+        self.run_item = run_item
+        self.workers = workers or int(os.getenv("KAIROS_BATCH_WORKERS", DEFAULT_BATCH_WORKERS))
+        self.retention_seconds = retention_seconds if retention_seconds is not None else float(
+            os.getenv("KAIROS_BATCH_RETENTION_SECONDS", DEFAULT_JOB_RETENTION_SECONDS))
+        self.max_finished_jobs = max_finished_jobs if max_finished_jobs is not None else int(
+            os.getenv("KAIROS_BATCH_MAX_JOBS", DEFAULT_MAX_FINISHED_JOBS))
+        self.jobs: Dict[str, BatchJob] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+
+    async def start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, items: List[UserInput], priority: int = 0) -> BatchJob:
+        """Queue a batch; higher ``priority`` values run first, FIFO within a priority"""
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started")
+        self._evict()
+        job = BatchJob(items, priority)
+        self.jobs[job.id] = job
+        for index in range(len(items)):
+            self._queue.put_nowait((-priority, next(self._seq), job.id, index))
+        return job
+
+    def get(self, job_id: str) -> Optional[BatchJob]:
+        self._evict()
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[BatchJob]:
+        self._evict()
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def delete(self, job_id: str) -> Optional[BatchJob]:
+        """Drop a finished job and its results; unfinished jobs are left alone"""
+        job = self.jobs.get(job_id)
+        if job is None or not job.finished:
+            return None
+        return self.jobs.pop(job_id)
+
+    def _evict(self):
+        """Drop finished jobs past the retention time, then the oldest beyond the cap"""
+        finished = sorted((j for j in self.jobs.values() if j.finished), key=lambda j: j.finished_at or j.created_at)
+        cutoff = time.time() - self.retention_seconds
+        expired = [j for j in finished if (j.finished_at or j.created_at) < cutoff]
+        kept = finished[len(expired):]
+        expired += kept[:max(0, len(kept) - self.max_finished_jobs)]
+        for job in expired:
+            del self.jobs[job.id]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queued_items": self._queue.qsize() if self._queue else 0,
+            "jobs": len(self.jobs),
+        }
+
+    async def _worker(self):
+        while True:
+            _, _, job_id, index = await self._queue.get()
+            job = self.jobs[job_id]
+            job.started_at = job.started_at or time.time()
+            job.item_status[index] = JobStatus.RUNNING
+            try:
+                # Batch items yield the LLM quota to interactive requests
+                with use_priority(BATCH_PRIORITY):
+                    result = await self.run_item(job.items[index])
+                job.results[index] = result
+                job.item_status[index] = JobStatus.COMPLETED if result.success else JobStatus.FAILED
+            except Exception as e:
+                job.results[index] = EvaluationResult(
+                    evaluation_type=job.items[index].evaluation_type,
+                    provider_used=job.items[index].provider,
+                    success=False,
+                    error_message=f"Batch item failed: {str(e)}"
+                )
+                job.item_status[index] = JobStatus.FAILED
+            finally:
+                if job.finished:
+                    job.finished_at = time.time()
+                self._queue.task_done()
@@ -1,22 +1,34 @@
 import os
 import yaml
-from typing import Optional, Dict, List
+from typing import TYPE_CHECKING, Optional, Dict, List
 from contextlib import AsyncExitStack
-
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-import os
 import sys
 
+# The MCP SDK is imported when the first server session starts, not at import time
+if TYPE_CHECKING:
+    from mcp import ClientSession
+
+# Resolved against the package so the server can start from any working directory
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "playwright.config.yml")
+PLAYWRIGHT_MCP_PACKAGE = "@playwright/mcp"
+
+def load_config(config_path: str) -> dict:
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
 class MCPServerClient:
     def __init__(self, name, server_config, defaults):
         self.name = name
         self.config = server_config
         self.defaults = defaults
-        self.session: Optional[ClientSession] = None
+        self.session: Optional["ClientSession"] = None
         self.tools = {}
 
     async def initialize(self):
+        from mcp import ClientSession, StdioServerParameters
+        from mcp.client.stdio import stdio_client
+
         self.exit_stack = AsyncExitStack()  
         
         server_type = self.config["type"]
@@ -53,6 +65,11 @@ class MCPServerClient:
             raise ValueError(f"Tool '{tool_name}' not found in server '{self.name}'")
         return await self.session.call_tool(tool_name, tool_args)
 
+    async def ping(self):
+        if not self.session:
+            raise RuntimeError(f"Server '{self.name}' is not initialized")
+        await self.session.send_ping()
+
     async def cleanup(self):
         if hasattr(self, 'exit_stack') and self.exit_stack:
             try:
@@ -68,20 +85,33 @@ class MCPServerClient:
                 print(f"Warning: Error during MCP cleanup: {e}")
 
 
+def create_server_client(name: str, server_config: dict, defaults: dict):
+    """Client for one configured server: MCP over stdio, or the in-process Playwright backend
+    for the Playwright MCP server when ``defaults.backend`` is ``native``."""
+    native = server_config.get("type") == "native" or (
+        defaults.get("backend") == "native" and server_config.get("path") == PLAYWRIGHT_MCP_PACKAGE
+    )
+    if native:
+        from .native_backend import NativeServerClient
+
+        return NativeServerClient(name, server_config, defaults)
+    return MCPServerClient(name, server_config, defaults)
+
+
 class MCPToolManager:
     def __init__(self):
-        self.server_clients: List[MCPServerClient] = []
+        self.server_clients: List[MCPServerClient] = []  # or NativeServerClient, which has the same interface
         self.tool_to_server: Dict[str, MCPServerClient] = {}
 
     async def load_from_config(self, config_path: str):
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+        await self.load_servers(load_config(config_path))
 
+    async def load_servers(self, config: dict):
         defaults = config.get("defaults", {})
         servers = config.get("servers", [])
 
         for server_cfg in servers:
-            client = MCPServerClient(server_cfg["name"], server_cfg, defaults)
+            client = create_server_client(server_cfg["name"], server_cfg, defaults)
             await client.initialize()
             self.server_clients.append(client)
             for tool in client.tools:
@@ -118,6 +148,17 @@ class MCPToolManager:
         except Exception as e:
             return False, {"error": str(e)}
 
+    async def ping(self):
+        for client in self.server_clients:
+            await client.ping()
+
+    async def reset(self):
+        """Drop browser state so the next user starts from a blank page."""
+        if "browser_close" in self.tool_to_server:
+            success, out = await self.call_tool("browser_close", {})
+            if not success:
+                raise RuntimeError(out["error"])
+
     async def cleanup(self):
         for client in self.server_clients:
             await client.cleanup()
\ No newline at end of file
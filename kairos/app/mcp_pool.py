@@ -0,0 +1,264 @@
+import asyncio
+import os
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from .mcp_node import MCPToolManager, load_config
+from .tracing import span
+
+# Configuration constants
+DEFAULT_POOL_SIZE = 2
+HEALTH_CHECK_TIMEOUT = 10.0
+RESET_TIMEOUT = 15.0
+
+
+class PooledSession:
+    """A warm MCPToolManager owned by a dedicated task.
+
+    The MCP stdio transport is built on anyio task groups, which must be entered
+    and exited from the same task. Each pooled session therefore runs its whole
+    lifetime inside its own owner task and is only *used* by the leasing tasks.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.manager = MCPToolManager()
+        self.leases = 0
+        self.temporary = False  # opened beyond the pool size; closed instead of returned
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def open(self):
+        with span("mcp_session_start"):
+            self._task = asyncio.create_task(self._run())
+            await self._ready.wait()
+            if self._error:
+                await self._task
+                raise self._error
+
+    async def _run(self):
+        try:
+            try:
+                await self.manager.load_servers(self.config)
+            except Exception as e:
+                self._error = e
+                return
+            finally:
+                self._ready.set()
+            await self._closing.wait()
+        finally:
+            await self.manager.cleanup()
+
+    async def health_check(self) -> bool:
+        if self._task is None or self._task.done():
+            return False
+        try:
+            await asyncio.wait_for(self.manager.ping(), HEALTH_CHECK_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def reset(self) -> bool:
+        try:
+            await asyncio.wait_for(self.manager.reset(), RESET_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        self._closing.set()
+        if self._task:
+            try:
+                await self._task
+            except Exception as e:
+                print(f"Warning: Error closing pooled MCP session: {e}")
+
+
+class MCPSessionPool:
+    """Keeps N initialized MCP sessions warm and leases them to evaluations."""
+
+    def __init__(self, config_path: str, size: Optional[int] = None):
+        self.config_path = config_path
+        self._size = size
+        self._config: Optional[dict] = None
+        self._idle: List[PooledSession] = []
+        self._busy: List[PooledSession] = []
+        self._opening = 0
+        self._recycled = 0
+        self._overflow = 0
+        self._cond = asyncio.Condition()
+        self._closed = False
+
+    @property
+    def size(self) -> int:
+        self._load_config()
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def busy(self) -> int:
+        return len(self._busy)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "idle": self.idle,
+            "busy": self.busy,
+            "starting": self._opening,
+            "recycled": self._recycled,
+            "overflow": self._overflow,
+        }
+
+    def _load_config(self) -> dict:
+        if self._config is None:
+            self._config = load_config(self.config_path)
+            if self._size is None:
+                env_size = os.getenv("KAIROS_MCP_POOL_SIZE")
+                cfg_size = self._config.get("defaults", {}).get("pool_size")
+                self._size = max(1, int(env_size or cfg_size or DEFAULT_POOL_SIZE))
+        return self._config
+
+    async def start(self):
+        """Warm the pool up to its configured size."""
+        self._load_config()
+        async with self._cond:
+            missing = self.size - (self.idle + self.busy + self._opening)
+            self._opening += max(0, missing)
+        results = await asyncio.gather(
+            *(self._open_session() for _ in range(max(0, missing))),
+            return_exceptions=True,
+        )
+        async with self._cond:
+            for result in results:
+                if isinstance(result, PooledSession):
+                    self._idle.append(result)
+                else:
+                    print(f"Warning: Failed to warm MCP session: {result}")
+            self._cond.notify_all()
+
+    async def _open_session(self) -> PooledSession:
+        session = PooledSession(self._load_config())
+        try:
+            await session.open()
+            return session
+        finally:
+            async with self._cond:
+                self._opening -= 1
+
+    async def _acquire(self, overflow: bool = False) -> PooledSession:
+        while True:
+            async with self._cond:
+                full = self.idle + self.busy + self._opening >= self.size
+                while not self._closed and not self._idle and full and not overflow:
+                    await self._cond.wait()
+                    full = self.idle + self.busy + self._opening >= self.size
+                if self._closed:
+                    raise RuntimeError("MCP session pool is closed")
+                temporary = False
+                if self._idle:
+                    session = self._idle.pop()
+                    self._busy.append(session)
+                elif full:
+                    session, temporary = None, True
+                    self._overflow += 1
+                else:
+                    session = None
+                    self._opening += 1
+
+            if temporary:
+                session = PooledSession(self._load_config())
+                session.temporary = True
+                try:
+                    await session.open()
+                except Exception:
+                    self._overflow -= 1
+                    raise
+                return session
+
+            if session is None:
+                try:
+                    session = await self._open_session()
+                except Exception:
+                    async with self._cond:
+                        self._cond.notify_all()
+                    raise
+                async with self._cond:
+                    self._busy.append(session)
+                return session
+
+            if await session.health_check():
+                return session
+            await self._discard(session)
+
+    async def _release(self, session: PooledSession):
+        if session.temporary:
+            self._overflow -= 1
+            await session.close()
+            return
+        with span("cleanup") as cleanup_span:
+            healthy = await session.reset() and await session.health_check()
+            cleanup_span.set(healthy=healthy)
+        if not healthy or self._closed:
+            await self._discard(session)
+            return
+        async with self._cond:
+            self._busy.remove(session)
+            self._idle.append(session)
+            self._cond.notify()
+
+    async def _discard(self, session: PooledSession):
+        async with self._cond:
+            if session in self._busy:
+                self._busy.remove(session)
+            self._recycled += 1
+            self._cond.notify()
+        await session.close()
+
+    @asynccontextmanager
+    async def lease(self, overflow: bool = False):
+        """Lease a warm MCPToolManager for the duration of the block.
+
+        With ``overflow``, a lease that would wait for a busy pool gets a temporary
+        session of its own instead (for fan-outs wider than the pool).
+        """
+        self._load_config()
+        with span("mcp_session_lease", idle=self.idle, overflow=overflow):
+            session = await self._acquire(overflow)
+        session.leases += 1
+        try:
+            yield session.manager
+        finally:
+            await asyncio.shield(self._release(session))
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            sessions, self._idle = self._idle, []
+            self._cond.notify_all()
+        await asyncio.gather(*(s.close() for s in sessions), return_exceptions=True)
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, MCPSessionPool]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_session_pool(config_path: str) -> MCPSessionPool:
+    """Return the pool shared by every evaluation on the running event loop."""
+    loop = asyncio.get_running_loop()
+    pools = _pools.setdefault(loop, {})
+    if config_path not in pools:
+        pools[config_path] = MCPSessionPool(config_path)
+    return pools[config_path]
+
+
+async def close_session_pools():
+    """Shut down all pools bound to the running event loop."""
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(*(pool.close() for pool in pools.values()), return_exceptions=True)
@@ -2,6 +2,8 @@ from pydantic import BaseModel
 from enum import Enum
 from typing import Dict, List, Optional, Any
 
+from .html_reducer import DEFAULT_REDUCTION_LEVEL
+
 class LLMProvider(str, Enum):
     OPENAI = "openai"
     ANTHROPIC = "anthropic" 
@@ -11,13 +13,34 @@ class EvaluationType(str, Enum):
     QUALITATIVE = "qualitative"
     FEATURE_CORRECTNESS = "feature_correctness"
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class UserInput(BaseModel):
     user_query: str
     app_url: str
     provider: LLMProvider = LLMProvider.CLAUDE_VERTEX
     evaluation_type: EvaluationType = EvaluationType.FEATURE_CORRECTNESS
     llm_model_name: Optional[str] = None
+    planning_model: Optional[str] = None  # test plan generation; defaults to llm_model_name
+    navigation_model: Optional[str] = None  # agent turns that drive the browser; a fast model fits here
+    judgment_model: Optional[str] = None  # final verdict turns and partial results; a strong model fits here
     temperature: float = 0.1
+    shard_size: Optional[int] = None  # features per shard; None spreads the plan over max_concurrency shards
+    max_concurrency: Optional[int] = None  # concurrent shards; defaults to the MCP session pool size
+    use_plan_cache: bool = True  # set False to bypass the on-disk test plan cache
+    html_reduction_level: int = DEFAULT_REDUCTION_LEVEL  # 0 sends raw HTML to the planner, 3 is the most aggressive
+    app_id: Optional[str] = None  # stable identity of the app across builds; defaults to app_url
+    record_trajectories: bool = False  # store each feature's tool-call trajectory (runs one feature per shard)
+    replay: bool = False  # re-verify features from stored trajectories, using the agent only from the first divergence
+    compiled_plans: bool = False  # run test plan Steps as Playwright scripts; failed or uncompilable features use the agent
+    incremental: bool = False  # re-run only features touched by the HTML diff against this app's previous run
+    stream_plan: bool = False  # stream the test plan and start executing each feature as soon as it parses
+    parallel_rubrics: bool = False  # qualitative: score rubric groups with concurrent agents and merge the results
+    use_capture: bool = False  # crawl the app once per build and give planner and agents the captured states
 
 class EvaluationResult(BaseModel):
     evaluation_type: EvaluationType
@@ -26,4 +49,8 @@ class EvaluationResult(BaseModel):
     execution_time_seconds: Optional[float] = None
     error_message: Optional[str] = None
     raw_response: Optional[Dict[str, Any]] = None
+    qualitative_feedback: Optional[str] = None  # the qualitative rubric JSON
+    token_usage: Optional[Dict[str, int]] = None  # includes prompt-cache read/write token counts
+    spans: Optional[List[Dict[str, Any]]] = None  # per-stage timings, see kairos.app.tracing
+    stage_usage: Optional[Dict[str, Dict[str, Any]]] = None  # models, requests, seconds and tokens per model stage
     
\ No newline at end of file
@@ -0,0 +1,532 @@
+"""
+In-process Playwright tool backend with the same tools as ``@playwright/mcp``.
+
+``NativeServerClient`` is a drop-in for ``MCPServerClient``: it exposes the
+Playwright MCP tool names, descriptions and input schemas and returns
+``CallToolResult`` objects with the same markdown layout (code, page URL,
+title and an accessibility snapshot with ``[ref=…]`` element references), so
+the agent, snapshot deltas and trajectory recording work unchanged. Instead of
+a Node process per session talking JSON-RPC over stdio, tools run on
+Playwright's Python async API in the Kairos process, and every session is an
+isolated browser context of the one shared Chromium (``browser.py``).
+
+Element refs come from Playwright's AI-mode aria snapshot and are resolved
+with the ``aria-ref=`` selector, as the MCP server does.
+"""
+import asyncio
+import base64
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from .browser import get_shared_browser
+
+# Configuration constants
+ACTION_TIMEOUT_MS = 5000
+NAVIGATION_TIMEOUT_MS = 60000
+ACTION_SETTLE_MS = 150  # let client-side rendering finish before the snapshot
+MAX_WAIT_SECONDS = 30
+MAX_LOG_ENTRIES = 500
+OUTPUT_DIR = os.getenv("KAIROS_NATIVE_OUTPUT_DIR") or os.path.join(tempfile.gettempdir(), "kairos-native")
+
+_ELEMENT = {"type": "string", "description": "Human-readable element description used to obtain permission to interact with the element"}
+_REF = {"type": "string", "description": "Exact target element reference from the page snapshot"}
+
+
+def _schema(properties: Optional[Dict[str, Any]] = None, required: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": properties or {},
+        "required": required or [],
+        "additionalProperties": False,
+        "$schema": "http://json-schema.org/draft-07/schema#",
+    }
+
+
+# tool name -> (description, input schema), as listed by @playwright/mcp
+TOOLS = {
+    "browser_close": ("Close the page", _schema()),
+    "browser_resize": ("Resize the browser window", _schema({
+        "width": {"type": "number", "description": "Width of the browser window"},
+        "height": {"type": "number", "description": "Height of the browser window"},
+    }, ["width", "height"])),
+    "browser_console_messages": ("Returns all console messages", _schema()),
+    "browser_handle_dialog": ("Handle a dialog", _schema({
+        "accept": {"type": "boolean", "description": "Whether to accept the dialog."},
+        "promptText": {"type": "string", "description": "The text of the prompt in case of a prompt dialog."},
+    }, ["accept"])),
+    "browser_evaluate": ("Evaluate JavaScript expression on page or element", _schema({
+        "function": {"type": "string", "description": "() => { /* code */ } or (element) => { /* code */ } when element is provided"},
+        "element": _ELEMENT,
+        "ref": _REF,
+    }, ["function"])),
+    "browser_file_upload": ("Upload one or multiple files", _schema({
+        "paths": {"type": "array", "items": {"type": "string"}, "description": "The absolute paths to the files to upload."},
+    })),
+    "browser_fill_form": ("Fill multiple form fields", _schema({
+        "fields": {"type": "array", "description": "Fields to fill in", "items": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string", "description": "Human-readable field name"},
+                "type": {"type": "string", "enum": ["textbox", "checkbox", "radio", "combobox", "slider"], "description": "Type of the field"},
+                "ref": _REF,
+                "value": {"type": "string", "description": "Value to fill in the field."},
+            },
+            "required": ["name", "type", "ref", "value"],
+            "additionalProperties": False,
+        }},
+    }, ["fields"])),
+    "browser_install": ("Install the browser specified in the config.", _schema()),
+    "browser_press_key": ("Press a key on the keyboard", _schema({
+        "key": {"type": "string", "description": "Name of the key to press or a character to generate, such as `ArrowLeft` or `a`"},
+    }, ["key"])),
+    "browser_type": ("Type text into editable element", _schema({
+        "element": _ELEMENT,
+        "ref": _REF,
+        "text": {"type": "string", "description": "Text to type into the element"},
+        "submit": {"type": "boolean", "description": "Whether to submit entered text (press Enter after)"},
+        "slowly": {"type": "boolean", "description": "Whether to type one character at a time."},
+    }, ["element", "ref", "text"])),
+    "browser_navigate": ("Navigate to a URL", _schema({
+        "url": {"type": "string", "description": "The URL to navigate to"},
+    }, ["url"])),
+    "browser_navigate_back": ("Go back to the previous page", _schema()),
+    "browser_network_requests": ("Returns all network requests since loading the page", _schema()),
+    "browser_take_screenshot": ("Take a screenshot of the current page.", _schema({
+        "type": {"type": "string", "enum": ["png", "jpeg"], "default": "png", "description": "Image format for the screenshot. Default is png."},
+        "filename": {"type": "string", "description": "File name to save the screenshot to."},
+        "element": _ELEMENT,
+        "ref": _REF,
+        "fullPage": {"type": "boolean", "description": "When true, takes a screenshot of the full scrollable page."},
+    })),
+    "browser_snapshot": ("Capture accessibility snapshot of the current page, this is better than screenshot", _schema()),
+    "browser_click": ("Perform click on a web page", _schema({
+        "element": _ELEMENT,
+        "ref": _REF,
+        "doubleClick": {"type": "boolean", "description": "Whether to perform a double click instead of a single click"},
+        "button": {"type": "string", "enum": ["left", "right", "middle"], "description": "Button to click, defaults to left"},
+        "modifiers": {"type": "array", "items": {"type": "string", "enum": ["Alt", "Control", "ControlOrMeta", "Meta", "Shift"]}, "description": "Modifier keys to press"},
+    }, ["element", "ref"])),
+    "browser_drag": ("Perform drag and drop between two elements", _schema({
+        "startElement": _ELEMENT,
+        "startRef": _REF,
+        "endElement": _ELEMENT,
+        "endRef": _REF,
+    }, ["startElement", "startRef", "endElement", "endRef"])),
+    "browser_hover": ("Hover over element on page", _schema({"element": _ELEMENT, "ref": _REF}, ["element", "ref"])),
+    "browser_select_option": ("Select an option in a dropdown", _schema({
+        "element": _ELEMENT,
+        "ref": _REF,
+        "values": {"type": "array", "items": {"type": "string"}, "description": "Array of values to select in the dropdown."},
+    }, ["element", "ref", "values"])),
+    "browser_tabs": ("List, create, close, or select a browser tab.", _schema({
+        "action": {"type": "string", "enum": ["list", "new", "close", "select"], "description": "Operation to perform"},
+        "index": {"type": "number", "description": "Tab index, used for close/select."},
+    }, ["action"])),
+    "browser_wait_for": ("Wait for text to appear or disappear or a specified time to pass", _schema({
+        "time": {"type": "number", "description": "The time to wait in seconds"},
+        "text": {"type": "string", "description": "The text to wait for"},
+        "textGone": {"type": "string", "description": "The text to wait for to disappear"},
+    })),
+}
+
+
+def _js(value: Any) -> str:
+    return json.dumps(value)
+
+
+class _Response:
+    """Builds a tool result in the Playwright MCP markdown layout."""
+
+    def __init__(self):
+        self.code: List[str] = []
+        self.result: List[str] = []
+        self.images: List[Dict[str, str]] = []
+        self.snapshot = False
+        self.error = False
+
+
+class NativeServerClient:
+    """Playwright tools on an isolated context of the shared in-process Chromium (an MCPServerClient drop-in)."""
+
+    def __init__(self, name, server_config, defaults):
+        self.name = name
+        self.config = server_config
+        self.defaults = defaults
+        self.tools = {name: {"description": d, "inputSchema": schema} for name, (d, schema) in TOOLS.items()}
+        self._browser = get_shared_browser()
+        self._context: Any = None
+        self._pages: List[Any] = []
+        self._current: Any = None
+        self._console: Dict[Any, List[str]] = {}
+        self._requests: Dict[Any, List[str]] = {}
+        self._dialog: Any = None
+        self._file_chooser: Any = None
+        self._modal = asyncio.Event()
+        self._pending_action: Optional[asyncio.Task] = None
+
+    async def initialize(self):
+        await self._browser.start()
+
+    # -- pages ------------------------------------------------------------
+    async def _ensure_page(self) -> Any:
+        if self._context is None:
+            self._context = await self._browser.new_context()
+            self._context.on("page", self._on_page)
+            self._context.set_default_timeout(ACTION_TIMEOUT_MS)
+            self._context.set_default_navigation_timeout(NAVIGATION_TIMEOUT_MS)
+        if self._current is None or self._current.is_closed():
+            self._on_page(await self._context.new_page())
+        return self._current
+
+    def _on_page(self, page: Any):
+        """Track a new tab (opened by us or by the app) and make it current."""
+        self._current = page
+        if page in self._pages:
+            return
+        self._pages.append(page)
+        self._console[page] = []
+        self._requests[page] = []
+        page.on("console", lambda m: self._log(self._console[page], f"[{m.type.upper()}] {m.text}"))
+        page.on("pageerror", lambda e: self._log(self._console[page], f"[ERROR] {e}"))
+        page.on("requestfinished", lambda r: asyncio.ensure_future(self._log_request(page, r)))
+        page.on("requestfailed", lambda r: self._log(self._requests[page], f"[{r.method}] {r.url} => [FAILED] {r.failure}"))
+        page.on("dialog", self._on_dialog)
+        page.on("filechooser", self._on_file_chooser)
+        page.on("close", self._on_close)
+
+    def _on_close(self, page: Any):
+        if page in self._pages:
+            self._pages.remove(page)
+        self._console.pop(page, None)
+        self._requests.pop(page, None)
+        if self._current is page:
+            self._current = self._pages[-1] if self._pages else None
+
+    @staticmethod
+    def _log(entries: Optional[List[str]], line: str):
+        if entries is not None:
+            entries.append(line)
+            del entries[:-MAX_LOG_ENTRIES]
+
+    async def _log_request(self, page: Any, request: Any):
+        try:
+            response = await request.response()
+            status = f"[{response.status}] {response.status_text}" if response else "[no response]"
+        except Exception:
+            status = "[unknown]"
+        self._log(self._requests.get(page), f"[{request.method}] {request.url} => {status}")
+
+    def _on_dialog(self, dialog: Any):
+        self._dialog = dialog
+        self._modal.set()
+
+    def _on_file_chooser(self, chooser: Any):
+        self._file_chooser = chooser
+        self._modal.set()
+
+    def _locator(self, page: Any, ref: str) -> Any:
+        return page.locator(f"aria-ref={ref}")
+
+    # -- actions ----------------------------------------------------------
+    async def _act(self, action) -> bool:
+        """Run a page action; returns False if it is blocked on a dialog or file chooser.
+
+        A dialog freezes the page until it is handled, so the action keeps running in
+        the background and is awaited by browser_handle_dialog / browser_file_upload.
+        """
+        self._modal.clear()
+        task = asyncio.ensure_future(action)
+        modal = asyncio.ensure_future(self._modal.wait())
+        try:
+            await asyncio.wait({task, modal}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            modal.cancel()
+        if task.done():
+            task.result()
+            return True
+        self._pending_action = task
+        return False
+
+    async def _settle(self, page: Any):
+        try:
+            await page.wait_for_load_state("load", timeout=ACTION_TIMEOUT_MS)
+        except Exception:
+            pass
+        await page.wait_for_timeout(ACTION_SETTLE_MS)
+
+    async def _finish_pending(self):
+        task, self._pending_action = self._pending_action, None
+        if task is not None:
+            await asyncio.wait_for(task, ACTION_TIMEOUT_MS / 1000)
+
+    def _modal_state(self) -> List[str]:
+        lines = []
+        if self._dialog is not None:
+            lines.append(f'- ["{self._dialog.type}" dialog with message "{self._dialog.message}"]: '
+                         'can be handled by the "browser_handle_dialog" tool')
+        if self._file_chooser is not None:
+            lines.append('- [File chooser]: can be handled by the "browser_file_upload" tool')
+        return lines
+
+    async def _render(self, response: _Response) -> Any:
+        from mcp.types import CallToolResult, ImageContent, TextContent
+
+        parts = []
+        if response.code:
+            parts.append("### Ran Playwright code\n```js\n" + "\n".join(response.code) + "\n```")
+        if response.result:
+            parts.append("### Result\n" + "\n".join(response.result))
+        modal = self._modal_state()
+        if modal:
+            parts.append("### Modal state\n" + "\n".join(modal))
+        elif response.snapshot and self._current is not None:
+            page = self._current
+            snapshot = await page.locator("body").aria_snapshot(mode="ai")
+            parts.append(
+                f"### Page state\n- Page URL: {page.url}\n- Page Title: {await page.title()}\n"
+                f"- Page Snapshot:\n```yaml\n{snapshot}\n```"
+            )
+        content = [TextContent(type="text", text="\n\n".join(parts))]
+        content += [ImageContent(type="image", data=i["data"], mimeType=i["mime_type"]) for i in response.images]
+        return CallToolResult(content=content, isError=response.error)
+
+    async def call_tool(self, tool_name: str, tool_args: dict):
+        if tool_name not in self.tools:
+            raise ValueError(f"Tool '{tool_name}' not found in server '{self.name}'")
+        response = _Response()
+        try:
+            await getattr(self, f"_{tool_name}")(tool_args or {}, response)
+        except Exception as e:
+            response.error = True
+            response.snapshot = False
+            response.result.append(f"Error: {str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__}")
+        return await self._render(response)
+
+    # -- tools ------------------------------------------------------------
+    async def _browser_navigate(self, args, response):
+        page = await self._ensure_page()
+        response.code.append(f"await page.goto({_js(args['url'])});")
+        await page.goto(args["url"])
+        response.snapshot = True
+
+    async def _browser_navigate_back(self, args, response):
+        page = await self._ensure_page()
+        response.code.append("await page.goBack();")
+        await page.go_back()
+        response.snapshot = True
+
+    async def _browser_snapshot(self, args, response):
+        await self._ensure_page()
+        response.snapshot = True
+
+    async def _browser_click(self, args, response):
+        page = await self._ensure_page()
+        locator = self._locator(page, args["ref"])
+        options = {"button": args.get("button") or "left"}
+        if args.get("modifiers"):
+            options["modifiers"] = args["modifiers"]
+        method = "dblclick" if args.get("doubleClick") else "click"
+        response.code.append(f"// {args.get('element', '')}\nawait page.locator('aria-ref={args['ref']}').{method}();")
+        if await self._act(getattr(locator, method)(**options)):
+            await self._settle(page)
+        response.snapshot = True
+
+    async def _browser_type(self, args, response):
+        page = await self._ensure_page()
+        locator = self._locator(page, args["ref"])
+        if args.get("slowly"):
+            response.code.append(f"await page.locator('aria-ref={args['ref']}').pressSequentially({_js(args['text'])});")
+            await locator.press_sequentially(args["text"])
+        else:
+            response.code.append(f"await page.locator('aria-ref={args['ref']}').fill({_js(args['text'])});")
+            await locator.fill(args["text"])
+        if args.get("submit"):
+            response.code.append(f"await page.locator('aria-ref={args['ref']}').press('Enter');")
+            if await self._act(locator.press("Enter")):
+                await self._settle(page)
+        response.snapshot = True
+
+    async def _browser_fill_form(self, args, response):
+        page = await self._ensure_page()
+        for field in args["fields"]:
+            locator = self._locator(page, field["ref"])
+            if field["type"] in ("checkbox", "radio"):
+                checked = str(field["value"]).lower() == "true"
+                response.code.append(f"await page.locator('aria-ref={field['ref']}').setChecked({_js(checked)});")
+                await locator.set_checked(checked)
+            elif field["type"] == "combobox":
+                response.code.append(f"await page.locator('aria-ref={field['ref']}').selectOption({_js(field['value'])});")
+                await locator.select_option(label=field["value"])
+            else:
+                response.code.append(f"await page.locator('aria-ref={field['ref']}').fill({_js(field['value'])});")
+                await locator.fill(field["value"])
+        response.snapshot = True
+
+    async def _browser_select_option(self, args, response):
+        page = await self._ensure_page()
+        response.code.append(f"await page.locator('aria-ref={args['ref']}').selectOption({_js(args['values'])});")
+        await self._locator(page, args["ref"]).select_option(args["values"])
+        await self._settle(page)
+        response.snapshot = True
+
+    async def _browser_press_key(self, args, response):
+        page = await self._ensure_page()
+        response.code.append(f"await page.keyboard.press({_js(args['key'])});")
+        if await self._act(page.keyboard.press(args["key"])):
+            await self._settle(page)
+        response.snapshot = True
+
+    async def _browser_hover(self, args, response):
+        page = await self._ensure_page()
+        response.code.append(f"await page.locator('aria-ref={args['ref']}').hover();")
+        await self._locator(page, args["ref"]).hover()
+        response.snapshot = True
+
+    async def _browser_drag(self, args, response):
+        page = await self._ensure_page()
+        response.code.append(
+            f"await page.locator('aria-ref={args['startRef']}').dragTo(page.locator('aria-ref={args['endRef']}'));"
+        )
+        await self._locator(page, args["startRef"]).drag_to(self._locator(page, args["endRef"]))
+        await self._settle(page)
+        response.snapshot = True
+
+    async def _browser_wait_for(self, args, response):
+        page = await self._ensure_page()
+        if not any(args.get(k) for k in ("time", "text", "textGone")):
+            raise ValueError("Either time, text or textGone must be provided")
+        if args.get("time"):
+            response.code.append(f"await new Promise(f => setTimeout(f, {int(args['time'] * 1000)}));")
+            await asyncio.sleep(min(float(args["time"]), MAX_WAIT_SECONDS))
+        if args.get("textGone"):
+            response.code.append(f"await page.getByText({_js(args['textGone'])}).first().waitFor({{ state: 'hidden' }});")
+            await page.get_by_text(args["textGone"]).first.wait_for(state="hidden", timeout=MAX_WAIT_SECONDS * 1000)
+        if args.get("text"):
+            response.code.append(f"await page.getByText({_js(args['text'])}).first().waitFor({{ state: 'visible' }});")
+            await page.get_by_text(args["text"]).first.wait_for(state="visible", timeout=MAX_WAIT_SECONDS * 1000)
+        waited = args.get("text") or args.get("textGone")
+        response.result.append(f"Waited for {waited}" if waited else f"Waited for {args['time']} seconds")
+        response.snapshot = True
+
+    async def _browser_take_screenshot(self, args, response):
+        page = await self._ensure_page()
+        image_type = args.get("type") or "png"
+        options: Dict[str, Any] = {"type": image_type}
+        if image_type == "jpeg":
+            options["quality"] = 50
+        if args.get("ref"):
+            target, code = self._locator(page, args["ref"]), f"page.locator('aria-ref={args['ref']}')"
+        else:
+            target, code = page, "page"
+            options["full_page"] = bool(args.get("fullPage"))
+        data = await target.screenshot(**options)
+        filename = args.get("filename") or f"page-{len(os.listdir(OUTPUT_DIR)) if os.path.isdir(OUTPUT_DIR) else 0}.{image_type}"
+        path = os.path.join(OUTPUT_DIR, os.path.basename(filename))
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        response.code.append(f"// Screenshot saved as {path}\nawait {code}.screenshot({{ type: '{image_type}' }});")
+        response.images.append({"data": base64.b64encode(data).decode("ascii"), "mime_type": f"image/{image_type}"})
+
+    async def _browser_console_messages(self, args, response):
+        page = await self._ensure_page()
+        response.result += self._console.get(page, []) or ["No console messages"]
+
+    async def _browser_network_requests(self, args, response):
+        page = await self._ensure_page()
+        response.result += self._requests.get(page, []) or ["No network requests"]
+
+    async def _browser_evaluate(self, args, response):
+        page = await self._ensure_page()
+        if args.get("ref"):
+            response.code.append(f"await page.locator('aria-ref={args['ref']}').evaluate({args['function']});")
+            value = await self._locator(page, args["ref"]).evaluate(args["function"])
+        else:
+            response.code.append(f"await page.evaluate({args['function']});")
+            value = await page.evaluate(args["function"])
+        response.result.append(json.dumps(value, indent=2, default=str) if value is not None else "undefined")
+
+    async def _browser_resize(self, args, response):
+        page = await self._ensure_page()
+        response.code.append(f"await page.setViewportSize({{ width: {int(args['width'])}, height: {int(args['height'])} }});")
+        await page.set_viewport_size({"width": int(args["width"]), "height": int(args["height"])})
+        response.snapshot = True
+
+    async def _browser_handle_dialog(self, args, response):
+        dialog, self._dialog = self._dialog, None
+        if dialog is None:
+            raise ValueError("No dialog visible")
+        if args["accept"]:
+            response.code.append("// <internal code to accept the dialog>")
+            await dialog.accept(args.get("promptText") or "")
+        else:
+            response.code.append("// <internal code to dismiss the dialog>")
+            await dialog.dismiss()
+        await self._finish_pending()
+        if self._current is not None:
+            await self._settle(self._current)
+        response.snapshot = True
+
+    async def _browser_file_upload(self, args, response):
+        chooser, self._file_chooser = self._file_chooser, None
+        if chooser is None:
+            raise ValueError("No file chooser visible")
+        response.code.append(f"await fileChooser.setFiles({_js(args.get('paths') or [])});")
+        await chooser.set_files(args.get("paths") or [])
+        await self._finish_pending()
+        response.snapshot = True
+
+    async def _browser_tabs(self, args, response):
+        action = args["action"]
+        if action == "new":
+            await self._ensure_page()
+            self._on_page(await self._context.new_page())
+        elif action in ("select", "close"):
+            await self._ensure_page()
+            index = int(args["index"]) if args.get("index") is not None else self._pages.index(self._current)
+            if not 0 <= index < len(self._pages):
+                raise ValueError(f"Tab {index} not found")
+            if action == "select":
+                self._current = self._pages[index]
+                await self._current.bring_to_front()
+            else:
+                await self._pages[index].close()
+        lines = [
+            f"- {i}:{' (current)' if page is self._current else ''} [{await page.title()}] ({page.url})"
+            for i, page in enumerate(self._pages)
+        ]
+        response.result.append("### Open tabs\n" + ("\n".join(lines) or "No open tabs"))
+        response.snapshot = action != "list"
+
+    async def _browser_install(self, args, response):
+        response.result.append("The browser is managed by Kairos (see KAIROS_CHROMIUM_PATH)")
+
+    async def _browser_close(self, args, response):
+        await self.close_context()
+        response.code.append("await page.close()")
+        response.result.append("No open pages available. Use the \"browser_navigate\" tool to navigate to a page first.")
+
+    # -- lifecycle ----------------------------------------------------------
+    async def close_context(self):
+        """Drop every page, cookie and storage of this session."""
+        context, self._context = self._context, None
+        if self._pending_action is not None:
+            self._pending_action.cancel()
+            self._pending_action = None
+        self._pages, self._current = [], None
+        self._console, self._requests = {}, {}
+        self._dialog = self._file_chooser = None
+        if context is not None:
+            await context.close()
+
+    async def ping(self):
+        if not self._browser.running:
+            raise RuntimeError(f"Server '{self.name}' has no running browser")
+
+    async def cleanup(self):
+        try:
+            await self.close_context()
+        except Exception as e:
+            print(f"Warning: Error closing native browser context: {e}")
@@ -0,0 +1,66 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def extract_json_block(text: str) -> Optional[Any]:
+    """Parse the first ```json fenced block in ``text``, falling back to the outermost JSON object."""
+    match = re.search(r"```json\s*(.*?)\s*```", text, re.DOTALL)
+    candidates = [match.group(1)] if match else []
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def parse_feature_verdicts(agent_output: str) -> List[Dict[str, Any]]:
+    """Extract ``features_analysis`` entries from a feature-correctness agent response."""
+    data = extract_json_block(agent_output or "")
+    if not isinstance(data, dict):
+        return []
+    evaluation = data.get("application_evaluation", data)
+    features = evaluation.get("features_analysis", []) if isinstance(evaluation, dict) else []
+    return [f for f in features if isinstance(f, dict)]
+
+
+LIKERT_RATINGS = ["Strongly Disagree", "Disagree", "Agree", "Strongly Agree"]
+
+
+def validate_rubric_scores(data: Any, rubric_fields: Dict[str, List[str]]) -> Tuple[Dict[str, Any], List[str]]:
+    """Keep the well-formed ratings of the given rubrics from a qualitative response.
+
+    Ratings are matched case-insensitively to the Likert scale and ``feature_coverage``
+    must be a 1-4 score; returns the cleaned rubrics and a list of problems found.
+    """
+    scale = {r.lower(): r for r in LIKERT_RATINGS}
+    data = data if isinstance(data, dict) else {}
+    rubrics: Dict[str, Any] = {}
+    problems = []
+    for rubric, fields in rubric_fields.items():
+        entry = data.get(rubric, data.get(rubric.upper()))
+        if not isinstance(entry, dict):
+            problems.append(f"{rubric}: missing")
+            continue
+
+        clean: Dict[str, Any] = {}
+        if not fields:
+            score = entry.get("score")
+            if str(score).strip() in ("1", "2", "3", "4"):
+                clean["score"] = int(str(score).strip())
+            else:
+                problems.append(f"{rubric}.score: invalid score {score!r}")
+        for field in fields:
+            rating = scale.get(" ".join(str(entry.get(field, "")).lower().split()))
+            if rating is None:
+                problems.append(f"{rubric}.{field}: invalid rating {entry.get(field)!r}")
+            clean[field] = rating
+        if entry.get("improvement_suggestion"):
+            clean["improvement_suggestion"] = entry["improvement_suggestion"]
+        rubrics[rubric] = clean
+    return rubrics, problems
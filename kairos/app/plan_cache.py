@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+# Configuration constants
+DEFAULT_CACHE_DIR = os.path.join(os.getenv("KAIROS_CACHE_DIR", ".kairos_cache"), "test_plans")
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+
+
+def normalize_html(html: str) -> str:
+    """Collapse whitespace so formatting-only changes hit the same cache entry."""
+    return re.sub(r"\s+", " ", html).strip()
+
+
+class TestPlanCache:
+    """On-disk, content-addressed cache of parsed test plans with LRU eviction.
+
+    Entries are JSON files named by their key. A hit touches the file's mtime,
+    so eviction can drop the least recently used entries first; an entry's age
+    (for ``max_age_seconds``) is likewise the time since it was last written or used.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(html: str, user_query: str, model_name: str,
+                 temperature: float, prompt_version: str) -> str:
+        payload = json.dumps({
+            "html": hashlib.sha256(normalize_html(html).encode("utf-8")).hexdigest(),
+            "user_query": user_query.strip(),
+            "model_name": model_name,
+            "temperature": temperature,
+            "prompt_version": prompt_version,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            age = time.time() - os.stat(path).st_mtime
+            test_plan = entry["test_plan"]
+            if not isinstance(test_plan, list):
+                raise TypeError(f"test_plan is a {type(test_plan).__name__}")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError, OSError):
+            # Corrupt or foreign entry: drop it and plan afresh
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        if age > self.max_age_seconds:
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted concurrently; the plan already read is still good
+        self.hits += 1
+        return test_plan
+
+    def put(self, key: str, test_plan: List[Dict[str, Any]]):
+        entry = {"created_at": time.time(), "test_plan": test_plan}
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (
+            len(entries) > self.max_entries
+            or total_bytes > self.max_bytes
+            or now - entries[0][0] > self.max_age_seconds
+        ):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+
+    def _remove(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        entries = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        return {"hits": self.hits, "misses": self.misses, "entries": len(entries)}
+
+
+_plan_cache: Optional[TestPlanCache] = None
+
+
+def get_plan_cache() -> TestPlanCache:
+    """Return the process-wide test plan cache."""
+    global _plan_cache
+    if _plan_cache is None:
+        _plan_cache = TestPlanCache()
+    return _plan_cache
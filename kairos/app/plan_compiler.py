@@ -0,0 +1,229 @@
+"""
+Compile test plan entries into deterministic Playwright scripts.
+
+Test plan entries carry a machine-readable ``Steps`` list next to their prose
+``Actions`` and ``Assertions`` (see ``test_plan_prompt``). Each step is either
+an action (``{"action": "click", "selector": "#add"}``) or an assertion
+(``{"expect": "contains_text", "selector": "#list", "value": "Milk"}``).
+Entries whose steps validate are compiled into a ``CompiledFeature`` holding
+the steps plus the equivalent Python Playwright script, and executed against a
+fresh browser context with Playwright's own auto-waiting ``expect``.
+"""
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+# Configuration constants
+STEP_TIMEOUT_MS = 5000
+NAVIGATION_TIMEOUT_MS = 30000
+
+# action -> (needs selector, needs value)
+ACTIONS = {
+    "goto": (False, False),
+    "click": (True, False),
+    "dblclick": (True, False),
+    "fill": (True, True),
+    "type": (True, True),
+    "press": (True, True),
+    "select": (True, True),
+    "check": (True, False),
+    "uncheck": (True, False),
+    "hover": (True, False),
+    "wait": (False, True),
+}
+# assertion -> (needs selector, needs value)
+EXPECTATIONS = {
+    "visible": (True, False),
+    "hidden": (True, False),
+    "text": (True, True),
+    "contains_text": (True, True),
+    "value": (True, True),
+    "count": (True, True),
+    "checked": (True, False),
+    "unchecked": (True, False),
+    "enabled": (True, False),
+    "disabled": (True, False),
+    "attribute": (True, True),
+    "url": (False, True),
+    "title": (False, True),
+}
+
+
+class CompileError(Exception):
+    """A test plan entry has no steps, or steps that cannot be executed deterministically."""
+
+
+class CompiledFeature:
+    def __init__(self, name: str, steps: List[Dict[str, Any]], script: str):
+        self.name = name
+        self.steps = steps
+        self.script = script
+
+    @property
+    def assertions(self) -> int:
+        return sum(1 for s in self.steps if "expect" in s)
+
+
+class FeatureRun:
+    """Outcome of executing one compiled feature."""
+
+    def __init__(self, passed: bool, reason: str, failed_step: Optional[int] = None, duration: float = 0.0):
+        self.passed = passed
+        self.reason = reason
+        self.failed_step = failed_step
+        self.duration = duration
+
+
+def _validate_step(step: Any, index: int) -> Dict[str, Any]:
+    if not isinstance(step, dict):
+        raise CompileError(f"step {index + 1} is not an object")
+    if "action" in step:
+        kind, table = step["action"], ACTIONS
+    elif "expect" in step:
+        kind, table = step["expect"], EXPECTATIONS
+    else:
+        raise CompileError(f"step {index + 1} has neither 'action' nor 'expect'")
+    if kind not in table:
+        raise CompileError(f"step {index + 1}: unsupported '{kind}'")
+
+    needs_selector, needs_value = table[kind]
+    if needs_selector and not (isinstance(step.get("selector"), str) and step["selector"].strip()):
+        raise CompileError(f"step {index + 1} ({kind}) needs a selector")
+    if needs_value and step.get("value") is None:
+        raise CompileError(f"step {index + 1} ({kind}) needs a value")
+    if kind in ("count", "wait") and not str(step["value"]).isdigit():
+        raise CompileError(f"step {index + 1} ({kind}) needs an integer value")
+    if kind == "attribute" and not step.get("name"):
+        raise CompileError(f"step {index + 1} (attribute) needs an attribute name")
+    return step
+
+
+def compile_feature(feature: Dict[str, Any]) -> CompiledFeature:
+    """Validate a test plan entry's ``Steps`` and compile them; raises CompileError."""
+    if not isinstance(feature, dict):
+        raise CompileError("test plan entry is not an object")
+    steps = feature.get("Steps")
+    if not isinstance(steps, list) or not steps:
+        raise CompileError("test plan entry has no Steps")
+    steps = [_validate_step(step, i) for i, step in enumerate(steps)]
+    if not any("expect" in s for s in steps):
+        raise CompileError("steps contain no assertions")
+    name = feature.get("Test_feature") or "unnamed feature"
+    return CompiledFeature(name, steps, render_script(name, steps))
+
+
+def _q(value: Any) -> str:
+    return json.dumps(str(value))
+
+
+def render_step(step: Dict[str, Any]) -> str:
+    """The Python Playwright statement equivalent to ``step``."""
+    loc = f"page.locator({_q(step.get('selector'))})"
+    action = step.get("action")
+    if action == "goto":
+        return f"await page.goto({_q(step['url'])})" if step.get("url") else "await page.goto(app_url)"
+    if action in ("click", "dblclick", "check", "uncheck", "hover"):
+        return f"await {loc}.{action}()"
+    if action == "fill":
+        return f"await {loc}.fill({_q(step['value'])})"
+    if action == "type":
+        return f"await {loc}.press_sequentially({_q(step['value'])})"
+    if action == "press":
+        return f"await {loc}.press({_q(step['value'])})"
+    if action == "select":
+        return f"await {loc}.select_option({_q(step['value'])})"
+    if action == "wait":
+        return f"await page.wait_for_timeout({int(step['value'])})"
+
+    kind = step["expect"]
+    if kind == "url":
+        return f"await expect(page).to_have_url(re.compile(re.escape({_q(step['value'])})))"
+    if kind == "title":
+        return f"await expect(page).to_have_title(re.compile(re.escape({_q(step['value'])})))"
+    if kind == "contains_text":
+        return f"await expect({loc}).to_contain_text({_q(step['value'])})"
+    if kind == "text":
+        return f"await expect({loc}).to_have_text({_q(step['value'])})"
+    if kind == "value":
+        return f"await expect({loc}).to_have_value({_q(step['value'])})"
+    if kind == "count":
+        return f"await expect({loc}).to_have_count({int(step['value'])})"
+    if kind == "attribute":
+        return f"await expect({loc}).to_have_attribute({_q(step['name'])}, {_q(step['value'])})"
+    return f"await expect({loc}).to_be_{kind}()"
+
+
+def render_script(name: str, steps: List[Dict[str, Any]]) -> str:
+    lines = [
+        f"# {name}",
+        "import re",
+        "from playwright.async_api import Page, expect",
+        "",
+        "async def run(page: Page, app_url: str):",
+        "    await page.goto(app_url)",
+    ]
+    lines += [f"    {render_step(step)}" for step in steps]
+    return "\n".join(lines) + "\n"
+
+
+async def _execute_step(page: Any, step: Dict[str, Any], app_url: str):
+    import re
+    from playwright.async_api import expect
+
+    locator = page.locator(step["selector"]) if step.get("selector") else None
+    action = step.get("action")
+    if action == "goto":
+        await page.goto(step.get("url") or app_url, timeout=NAVIGATION_TIMEOUT_MS)
+    elif action in ("click", "dblclick", "check", "uncheck", "hover"):
+        await getattr(locator, action)(timeout=STEP_TIMEOUT_MS)
+    elif action == "fill":
+        await locator.fill(str(step["value"]), timeout=STEP_TIMEOUT_MS)
+    elif action == "type":
+        await locator.press_sequentially(str(step["value"]), timeout=STEP_TIMEOUT_MS)
+    elif action == "press":
+        await locator.press(str(step["value"]), timeout=STEP_TIMEOUT_MS)
+    elif action == "select":
+        await locator.select_option(str(step["value"]), timeout=STEP_TIMEOUT_MS)
+    elif action == "wait":
+        await page.wait_for_timeout(min(int(step["value"]), STEP_TIMEOUT_MS))
+    else:
+        kind, value = step["expect"], step.get("value")
+        if kind == "url":
+            await expect(page).to_have_url(re.compile(re.escape(str(value))), timeout=STEP_TIMEOUT_MS)
+        elif kind == "title":
+            await expect(page).to_have_title(re.compile(re.escape(str(value))), timeout=STEP_TIMEOUT_MS)
+        elif kind == "contains_text":
+            await expect(locator).to_contain_text(str(value), timeout=STEP_TIMEOUT_MS)
+        elif kind == "text":
+            await expect(locator).to_have_text(str(value), timeout=STEP_TIMEOUT_MS)
+        elif kind == "value":
+            await expect(locator).to_have_value(str(value), timeout=STEP_TIMEOUT_MS)
+        elif kind == "count":
+            await expect(locator).to_have_count(int(value), timeout=STEP_TIMEOUT_MS)
+        elif kind == "attribute":
+            await expect(locator).to_have_attribute(step["name"], str(value), timeout=STEP_TIMEOUT_MS)
+        else:
+            await getattr(expect(locator), f"to_be_{kind}")(timeout=STEP_TIMEOUT_MS)
+
+
+async def run_compiled_feature(compiled: CompiledFeature, context: Any, app_url: str) -> FeatureRun:
+    """Run a compiled feature in ``context`` (a fresh BrowserContext), starting from ``app_url``."""
+    start = time.perf_counter()
+    page = await context.new_page()
+    try:
+        await page.goto(app_url, timeout=NAVIGATION_TIMEOUT_MS)
+        for index, step in enumerate(compiled.steps):
+            try:
+                await _execute_step(page, step, app_url)
+            except Exception as e:
+                message = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+                return FeatureRun(
+                    False, f"step {index + 1} `{render_step(step)}` failed: {message}",
+                    failed_step=index, duration=time.perf_counter() - start,
+                )
+        return FeatureRun(
+            True, f"All {compiled.assertions} assertions passed in the compiled Playwright script.",
+            duration=time.perf_counter() - start,
+        )
+    finally:
+        await page.close()
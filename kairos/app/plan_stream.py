@@ -0,0 +1,148 @@
+"""
+Incremental parsing of a streamed test plan.
+
+The planner answers with a ```json fenced array of feature objects. The parser
+is fed the response as it streams in and yields each top-level object as soon
+as its closing brace arrives, so execution can start on the first feature
+while the rest of the plan is still being generated. It only tracks string,
+escape and nesting state, so every chunk is scanned once.
+
+An item that does not parse, or is not an object, is reported as malformed and
+skipped instead of failing the whole plan.
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+FENCE = "```json"
+
+
+class MalformedItem:
+    """A test plan item that could not be used."""
+
+    def __init__(self, index: int, error: str, text: str):
+        self.index = index
+        self.error = error
+        self.text = text
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"index": self.index, "error": self.error, "text": self.text[:200]}
+
+
+class TestPlanStreamParser:
+    """Push parser for a (possibly fenced) JSON array of test plan features."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.items = 0  # top-level values seen so far, valid or not
+        self.features: List[Dict[str, Any]] = []
+        self.malformed: List[MalformedItem] = []
+        self.finished = False
+        self._pos = 0  # next char of buffer to scan
+        self._started = False  # inside the top-level array
+        self._depth = 0  # nesting depth inside the array
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add streamed text; returns the feature objects completed by it."""
+        self.buffer += chunk
+        if not self._started and not self._find_start(final=False):
+            return []
+        return self._scan()
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush at end of stream; raises if no test plan array was found at all."""
+        items = []
+        if not self._started and self._find_start(final=True):
+            items = self._scan()
+        if not self._started:
+            raise Exception("No JSON test plan array found in test plan response")
+        if self._item_start is not None:
+            self._report(self.buffer[self._item_start:], "item truncated at end of response")
+            self._item_start = None
+        return items
+
+    def _find_start(self, final: bool) -> bool:
+        fence = self.buffer.find(FENCE)
+        if fence != -1:
+            start = self.buffer.find("[", fence + len(FENCE))
+        elif final:
+            start = self.buffer.find("[")  # unfenced answer
+        else:
+            return False
+        if start == -1:
+            return False
+        self._started = True
+        self._pos = start + 1
+        return True
+
+    def _report(self, text: str, error: str):
+        self.malformed.append(MalformedItem(self.items, error, text))
+        self.items += 1
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        items = []
+        buffer = self.buffer
+        i = self._pos
+        while i < len(buffer) and not self.finished:
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+                if self._depth == 0:
+                    self._item_start = i
+            elif c in "{[":
+                if self._depth == 0:
+                    self._item_start = i
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 0:
+                    if c == "]":
+                        if self._item_start is not None:
+                            self._report(buffer[self._item_start:i], "item is not an object")
+                            self._item_start = None
+                        self.finished = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        item = self._complete(buffer[self._item_start:i + 1])
+                        if item is not None:
+                            items.append(item)
+                        self._item_start = None
+            elif c == "," and self._depth == 0 and self._item_start is not None:
+                # A top-level scalar (string, number) between items
+                self._report(buffer[self._item_start:i], "item is not an object")
+                self._item_start = None
+            elif self._depth == 0 and self._item_start is None and not c.isspace() and c != ",":
+                self._item_start = i  # start of a top-level scalar
+            i += 1
+        self._pos = i
+        return items
+
+    def _complete(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            self._report(text, f"invalid JSON: {e}")
+            return None
+        if not isinstance(value, dict):
+            self._report(text, "item is not an object")
+            return None
+        self.items += 1
+        self.features.append(value)
+        return value
+
+
+def parse_test_plan_items(text: str) -> TestPlanStreamParser:
+    """Parse a complete test plan response item by item; valid items are in ``.features``."""
+    parser = TestPlanStreamParser()
+    parser.feed(text)
+    parser.close()
+    return parser
@@ -2,6 +2,9 @@
 Prompt templates for web application evaluation
 """
 
+# Bump whenever test_plan_system_prompt or test_plan_prompt changes so cached test plans are invalidated
+TEST_PLAN_PROMPT_VERSION = "2"
+
 test_plan_system_prompt = """
     You are an expert Playwright test plan creator. You will analyze the provided HTML code and user query to create a comprehensive Playwright test plan.
     
@@ -54,11 +57,22 @@ Output your response in this exact JSON format:
         "Test_feature": "name of the test feature",
         "Description": "description of the test feature", 
         "Actions": "list of actions to be performed to test the feature",
-        "Assertions": "comprehensive list of assertions to be performed to test the feature"
+        "Assertions": "comprehensive list of assertions to be performed to test the feature",
+        "Steps": [
+            {{"action": "fill", "selector": "#todo-input", "value": "Buy milk"}},
+            {{"action": "click", "selector": "#add-button"}},
+            {{"expect": "contains_text", "selector": "#todo-list", "value": "Buy milk"}},
+            {{"expect": "count", "selector": "#todo-list li", "value": 1}}
+        ]
     }}
 ]
 ```
 
+"Steps" is the machine-executable form of the Actions and Assertions, run in order on a freshly loaded page:
+- Actions: {{"action": one of goto, click, dblclick, fill, type, press, select, check, uncheck, hover, wait, "selector": ..., "value": ...}}
+- Assertions: {{"expect": one of visible, hidden, text, contains_text, value, count, checked, unchecked, enabled, disabled, attribute, url, title, "selector": ..., "value": ...}} ("attribute" also takes "name")
+- Use Playwright selectors (CSS ids/classes from the HTML, or text=/role= selectors) that exist in the HTML above.
+
 Make sure to wrap the JSON with ```json and ``` code blocks.
 """
 
@@ -101,6 +115,38 @@ Do not include any other text in your response, just the json object.
 * **APP:** {url}
 """
 
+# Appended to evaluation_prompt_template when the agent takes over from a partial trajectory replay
+replay_resume_prompt = """
+### Replay so far:
+The browser is already open on the app. The following steps of this feature were replayed from an earlier run and have already been executed in this browser session:
+{steps}
+
+Replay stopped because: {reason}
+Continue the evaluation of the feature from this point. Start by taking a snapshot of the current page and do not repeat the steps above unless the page state requires it.
+"""
+
+# Sent without tools when an agent run is stopped early (loop or step budget), to turn its steps into a result
+partial_result_system_prompt = """
+    You finish an evaluation that a browser agent could not complete. You get the agent's task and the tool calls it made before it was stopped. You cannot use the browser: judge only from the calls and their results.
+    Answer in exactly the output format the task asks for. For every feature of a test plan add "resolved_assertions" (assertions the calls clearly verified, passed or failed) and "unresolved_assertions" (assertions they did not verify). A feature with a failed assertion has status "FAILURE"; otherwise a feature with unresolved assertions has status "INCOMPLETE"; only a feature whose assertions all passed has status "SUCCESS".
+    """
+
+partial_result_prompt = """### Agent task:
+{task}
+
+### The agent was stopped because: {reason}
+
+### Tool calls made before it stopped (outputs shortened):
+{steps}
+"""
+
+# Appended to the planner, feature and qualitative prompts when the app was crawled before the evaluation
+capture_context_prompt = """
+### Captured app states:
+The app was crawled before this evaluation. Every state below was reachable from the start page; each lists how to reach it, its console errors and its accessibility tree. Use them to know the app's pages and views without exploring: use the browser only for the interactions and checks that need a live page.
+{states}
+"""
+
 INSTRUCTIONS = """
 Rating Philosophy
 For each rubric, the rater should evaluate their agreement with the provided statement, based on their overall impression of the web application. The focus is not on rating features in isolation but on expressing how positively or negatively the rater feels toward the full statement in context.
@@ -164,52 +210,98 @@ FEATURE_COVERAGE_RUBRIC = """
 • very_high_feature_coverage – Score 4: Very high feature coverage (¾ – Full (1)).
 """
 
-QUALITATIVE_EVAL_PROMPT = f"""
-* You are an intelligent app evaluator.
-* You are given a live, dynamic web application and must explore **all** pages—scroll, click every menu item or button, resize the window, and test form inputs—to understand the complete user journey.
-
-{INSTRUCTIONS}
-
-{VISUAL_UX_RUBRIC}
-{CONTENT_QUALITY_RUBRIC}
-{CONTENT_GROUNDING_RUBRIC}
-{NAVIGATION_RUBRIC}
-{DATA_CONSISTENCY_RUBRIC}
-{FEATURE_COVERAGE_RUBRIC}
-
-### Output Format
-Retur your output strictly in the following json format.
-
-{{
-  "visual_ux": {{
+# Rubric key -> (rubric text, example output entry); keys are the top-level keys of the qualitative JSON
+QUALITATIVE_RUBRICS = {
+    "visual_ux": (VISUAL_UX_RUBRIC, """  "visual_ux": {
     "visual_appeal": "Agree",
     "element_diversity": "Strongly Agree",
     "color_harmony": "Agree",
     "design_craftsmanship": "Disagree",
     "improvement_suggestion": "Polish button shadows and align card spacing to reduce visual noise."
-  }},
-  "content_quality": {{
+  }"""),
+    "content_quality": (CONTENT_QUALITY_RUBRIC, """  "content_quality": {
     "copy_clarity": "Strongly Agree",
     "organization": "Agree",
     "content_relevance": "Agree",
     "richness": "Disagree",
     "improvement_suggestion": "Add meaningful captions to charts and replace placeholder imagery with real examples."
-  }},
-  "content_grounding": {{
+  }"""),
+    "content_grounding": (CONTENT_GROUNDING_RUBRIC, """  "content_grounding": {
     "accuracy": "Strongly Agree",
     "plausibility": "Agree",
     "attribution": "Disagree",
     "consistency": "Agree",
     "improvement_suggestion": "Cite data sources directly under each metric to build trust."
-  }}
+  }"""),
+    "navigation": (NAVIGATION_RUBRIC, """  "navigation": {
+    "discoverability": "Agree",
+    "task_flow": "Agree",
+    "feedback": "Disagree",
+    "accessibility": "Disagree",
+    "improvement_suggestion": "Highlight the active menu item and make all controls reachable with the Tab key."
+  }"""),
+    "data_consistency": (DATA_CONSISTENCY_RUBRIC, """  "data_consistency": {
+    "synchronization": "Strongly Agree",
+    "format_uniformity": "Agree",
+    "multi_view_coherence": "Agree",
+    "persistence": "Strongly Disagree",
+    "improvement_suggestion": "Persist edits to localStorage so they survive a page reload."
+  }"""),
+    "feature_coverage": (FEATURE_COVERAGE_RUBRIC, """  "feature_coverage": {
+    "score": 3,
+    "improvement_suggestion": "Implement the export and sharing features requested in the query."
+  }"""),
+}
+
+# Statements rated on the Likert scale per rubric (feature_coverage is a single 1-4 score)
+QUALITATIVE_RUBRIC_FIELDS = {
+    "visual_ux": ["visual_appeal", "element_diversity", "color_harmony", "design_craftsmanship"],
+    "content_quality": ["copy_clarity", "organization", "content_relevance", "richness"],
+    "content_grounding": ["accuracy", "plausibility", "attribution", "consistency"],
+    "navigation": ["discoverability", "task_flow", "feedback", "accessibility"],
+    "data_consistency": ["synchronization", "format_uniformity", "multi_view_coherence", "persistence"],
+    "feature_coverage": [],
+}
+
+
+def qualitative_system_prompt(rubrics=None) -> str:
+    """Static qualitative prompt (instructions, rubrics, output format) for ``rubrics`` (default: all six)."""
+    rubrics = list(rubrics or QUALITATIVE_RUBRICS)
+    if len(rubrics) == len(QUALITATIVE_RUBRICS):
+        focus = ("* You are given a live, dynamic web application and must explore **all** pages—scroll, click every menu "
+                 "item or button, resize the window, and test form inputs—to understand the complete user journey.\n")
+    else:
+        focus = (f"* You are given a live, dynamic web application. Score **only** the {', '.join(r.upper() for r in rubrics)} "
+                 "rubric(s) below; other rubrics are scored separately. Explore the app only as far as these rubrics "
+                 "require.\n")
+    rubric_text = "".join(QUALITATIVE_RUBRICS[r][0] for r in rubrics)
+    output = ",\n".join(QUALITATIVE_RUBRICS[r][1] for r in rubrics)
+    return f"""
+* You are an intelligent app evaluator.
+{focus}
+{INSTRUCTIONS}
+{rubric_text}
+### Output Format
+Retur your output strictly in the following json format.
+
+{{
+{output}
 }}
+"""
+
 
+# Static part of the qualitative prompt (instructions, rubrics, output format); sent as a cacheable system prompt
+QUALITATIVE_EVAL_SYSTEM_PROMPT = qualitative_system_prompt()
+
+QUALITATIVE_EVAL_INPUT = """
 Input:
-User Query: {{user_query}}
+User Query: {user_query}
 
-APP URL: {{app_url}}
+APP URL: {app_url}
 """
 
+QUALITATIVE_EVAL_PROMPT = QUALITATIVE_EVAL_SYSTEM_PROMPT + QUALITATIVE_EVAL_INPUT
+
 
 # {{
 #     "Overall_status": "PASS/FAIL",
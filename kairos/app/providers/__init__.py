@@ -1,8 +1,9 @@
-from .claude_client import ClaudeClient
+# Provider modules pull in langchain and the vendor SDKs, so they are only
+# imported when a client is created (or the class is accessed by name)
 # from .anthropic_client import AnthropicClient
 # from .openai_client import OpenAIClient
 from ..models import LLMProvider, UserInput
-from ..base import LLMClient
+from ..base import LLMClient, PLANNING, NAVIGATION, JUDGMENT
 
 def create_llm_client(user_input: UserInput) -> LLMClient:
     """Factory method to create appropriate LLM client based on provider"""
@@ -12,9 +13,15 @@ def create_llm_client(user_input: UserInput) -> LLMClient:
     temperature = user_input.temperature
     
     if provider == LLMProvider.CLAUDE_VERTEX:
+        from .claude_client import ClaudeClient
         return ClaudeClient(
             model_name=model_name or "claude-sonnet-4@20250514",
-            temperature=temperature
+            temperature=temperature,
+            stage_models={
+                PLANNING: user_input.planning_model,
+                NAVIGATION: user_input.navigation_model,
+                JUDGMENT: user_input.judgment_model,
+            }
         )
     # elif provider == LLMProvider.ANTHROPIC:
     #     return AnthropicClient(
@@ -29,4 +36,10 @@ def create_llm_client(user_input: UserInput) -> LLMClient:
     else:
         raise ValueError(f"Unsupported provider: {provider}")
 
+def __getattr__(name: str):
+    if name == "ClaudeClient":
+        from .claude_client import ClaudeClient
+        return ClaudeClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = ["ClaudeClient", "AnthropicClient", "OpenAIClient", "create_llm_client"]
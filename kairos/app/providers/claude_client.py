@@ -1,25 +1,44 @@
 import json
-import tempfile
 import os
-from typing import List, Dict, Any, Optional
+import sys
+import time
+from contextlib import nullcontext
+from uuid import UUID
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Optional
 from pathlib import Path
-import numpy as np
 
-from langchain_google_vertexai.model_garden import ChatAnthropicVertex
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.tools import StructuredTool
-from langchain.chains.conversation.memory import ConversationBufferWindowMemory
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from anthropic import AnthropicVertex
-from pydantic import BaseModel, Field, create_model
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import SystemMessage
+from langchain_core.outputs import LLMResult
+from pydantic import BaseModel
 
-from ..prompts import test_plan_system_prompt, test_plan_prompt
-from ..base import LLMClient
+from ..prompts import test_plan_system_prompt, test_plan_prompt, partial_result_system_prompt, partial_result_prompt
+from ..base import LLMClient, EventCallback, PLANNING, NAVIGATION, JUDGMENT
 from ..models import LLMProvider
 from ..mcp_node import MCPToolManager
-import os
+from ..usage import TokenUsage, current_usage
+from ..tracing import add_span, span
+from ..trajectory import current_recorder, output_text
+from ..snapshots import SnapshotDiffer
+from ..agent_budget import DEFAULT_AGENT_STEPS, STOPPED_OUTPUT_PREFIX, AgentStopped, StepMonitor
+from ..parsing import extract_json_block
+from ..images import ScreenshotProcessor, IMAGE_MAX_BYTES, IMAGE_MAX_DIMENSION
+from ..scratchpad import DEFAULT_TOKEN_BUDGET, ScratchpadCompactor
+from ..html_reducer import estimate_tokens
+from ..rate_limit import get_rate_limiter, rate_limited
+from .tool_registry import (
+    ToolSession, bind_tool_session, current_tool_session, schema_to_model, to_mcp_arguments, tool_registry
+)
 import dotenv
 
+# Vertex model garden, the Anthropic SDK and the langchain agent runtime are slow to
+# import, so they are loaded on first use rather than with the module
+if TYPE_CHECKING:
+    from langchain_google_vertexai.model_garden import ChatAnthropicVertex
+    from langchain.agents import AgentExecutor
+
 dotenv.load_dotenv()
 model_name = os.getenv("MODEL_NAME")
 location = os.getenv("LOCATION")
@@ -29,124 +48,420 @@ project_id = os.getenv("PROJECT_ID")
 MAX_LLM_TOKENS = 4096
 MEMORY_WINDOW_K = 6
 MAX_TOOL_CHARS = 16000
+AGENT_SYSTEM_PROMPT = "You are an advanced assistant with tool‑use."
+AGENT_VERBOSE = os.getenv("KAIROS_AGENT_VERBOSE", "").lower() in ("1", "true", "yes")
+SCRATCHPAD_TOKEN_BUDGET = int(os.getenv("KAIROS_SCRATCHPAD_TOKENS", DEFAULT_TOKEN_BUDGET))
+IMAGE_TOKEN_ESTIMATE = 1600  # Anthropic's cost of an image at the screenshot size limit
+# Anthropic prompt-cache breakpoint; everything up to a marked block is cached provider-side
+CACHE_CONTROL = {"type": "ephemeral"}
+
+class UsageCallbackHandler(AsyncCallbackHandler):
+    """Feeds token usage (including prompt-cache reads/writes) of every agent turn into a TokenUsage."""
+
+    def __init__(self, usage: TokenUsage):
+        self.usage = usage
+
+    async def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage_metadata = getattr(message, "usage_metadata", None)
+                if usage_metadata:
+                    self.usage.add_usage_metadata(usage_metadata)
+
+
+class TracingCallbackHandler(AsyncCallbackHandler):
+    """Records every agent LLM turn as an ``llm_turn`` span with its stage, model, latency and token counts."""
+
+    def __init__(self):
+        self._started: Dict[UUID, tuple] = {}
+
+    async def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID,
+                                  metadata: Optional[Dict[str, Any]] = None, **kwargs: Any) -> None:
+        metadata = metadata or {}
+        stage = {"stage": metadata["kairos_stage"], "model": metadata.get("kairos_model")} if "kairos_stage" in metadata else {}
+        self._started[run_id] = (time.perf_counter(), stage)
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        started, stage = started
+        attributes: Dict[str, Any] = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage_metadata:
+                    details = usage_metadata.get("input_token_details") or {}
+                    attributes = {
+                        "input_tokens": usage_metadata.get("input_tokens", 0),
+                        "output_tokens": usage_metadata.get("output_tokens", 0),
+                        "cache_read_input_tokens": details.get("cache_read", 0) or 0,
+                    }
+        add_span("llm_turn", time.perf_counter() - started, **stage, **attributes)
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            started, stage = started
+            add_span("llm_turn", time.perf_counter() - started, **stage, error=str(error))
+
+
+def _anthropic_tokens(message: Any) -> tuple:
+    """(input, output) tokens of an Anthropic response, cache reads and writes included"""
+    usage = message.usage
+    cached = (getattr(usage, "cache_read_input_tokens", 0) or 0) + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
+    return usage.input_tokens + cached, usage.output_tokens
+
+
+def _estimate_prompt_tokens(prompt: Any) -> int:
+    """Approximate input tokens of an agent turn's messages, images at a flat estimate"""
+    tokens = 0
+    for message in prompt.to_messages():
+        content = message.content if isinstance(message.content, list) else [message.content]
+        for block in content:
+            if isinstance(block, dict) and block.get("type") in ("image", "image_url"):
+                tokens += IMAGE_TOKEN_ESTIMATE
+            else:
+                tokens += estimate_tokens(block if isinstance(block, str) else json.dumps(block, default=str))
+        tokens += estimate_tokens(json.dumps(getattr(message, "tool_calls", None) or [], default=str))
+    return tokens
+
+
+def _lc_tokens(response: Any) -> tuple:
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+_chat_models: Dict[tuple, "ChatAnthropicVertex"] = {}
+
+
+def get_chat_model(model_name: str, location: str, project_id: str,
+                   max_tokens: int = MAX_LLM_TOKENS) -> "ChatAnthropicVertex":
+    """Process-wide ChatAnthropicVertex per configuration, so compiled agents can be reused"""
+    key = (model_name, location, project_id, max_tokens)
+    if key not in _chat_models:
+        from langchain_google_vertexai.model_garden import ChatAnthropicVertex
+
+        _chat_models[key] = ChatAnthropicVertex(
+            location=location,
+            project=project_id,
+            model_name=model_name,
+            max_tokens=max_tokens,
+            max_retries=1,  # one attempt: throttled turns are retried by rate_limited
+        )
+    return _chat_models[key]
 
-# Optional Anthropic imports for content normalization
-try:
-    from anthropic.types import TextContent, ImageContent
-except ImportError:
-    TextContent = None
-    ImageContent = None
 
 class ClaudeClient(LLMClient):
     def __init__(self, model_name: str = model_name,    
                  location: str = location, project_id: str = project_id,
-                 temperature: float = 0.1, **kwargs):
+                 temperature: float = 0.1, snapshot_deltas: bool = True,
+                 image_max_bytes: int = IMAGE_MAX_BYTES, image_max_dimension: int = IMAGE_MAX_DIMENSION,
+                 compact_scratchpad: bool = True, scratchpad_token_budget: int = SCRATCHPAD_TOKEN_BUDGET,
+                 **kwargs):
         super().__init__(model_name, temperature, **kwargs)
         self.location = location
         self.project_id = project_id
-        self._tmp_paths: List[str] = []
+        self.snapshot_deltas = snapshot_deltas
+        self.image_max_bytes = image_max_bytes
+        self.image_max_dimension = image_max_dimension
+        self.compact_scratchpad = compact_scratchpad
+        self.scratchpad_token_budget = scratchpad_token_budget
         
-        # Initialize Anthropic client for direct API calls
-        self.anthropic_client = AnthropicVertex(
+        # Initialize async Anthropic client for direct API calls so the event loop is never blocked
+        from anthropic import AsyncAnthropicVertex
+
+        self.anthropic_client = AsyncAnthropicVertex(
             region=self.location, 
-            project_id=self.project_id
-        )
-        
-        # Initialize LangChain client for agent workflows
-        self.langchain_client = ChatAnthropicVertex(
-            location=self.location,
             project_id=self.project_id,
-            model_name=self.llm_model_name,
-            max_tokens=MAX_LLM_TOKENS,
+            max_retries=0,  # retried by rate_limited, which paces retries with every other request
         )
+        
+        # LangChain client for agent workflows, shared by every client with the same settings
+        self.langchain_client = get_chat_model(self.model_for(NAVIGATION), self.location, self.project_id)
     
     @property
     def _provider(self) -> LLMProvider:
         return LLMProvider.CLAUDE_VERTEX
     
     async def generate_response(self, prompt: str, system_prompt: str, **kwargs) -> str:
-        """Generate a basic response using Anthropic client"""
+        """Generate a basic response using the async Anthropic client, with the model of ``stage``"""
+        stage = kwargs.get("stage", PLANNING)
+        model = self.model_for(stage)
+        max_tokens = kwargs.get("max_tokens", 8192)
         try:
-            response = self.anthropic_client.messages.create(
-                model=self.llm_model_name,  
-                max_tokens=kwargs.get("max_tokens", 8192),
-                temperature=self.temperature,
-                system=system_prompt,
-                messages=[{"role": "user", "content": prompt}]
-            )
+            with span("llm_call", stage=stage, model=model) as llm_span:
+                response = await rate_limited(
+                    model, estimate_tokens(system_prompt) + estimate_tokens(prompt), max_tokens,
+                    lambda: self.anthropic_client.messages.create(
+                        model=model,
+                        max_tokens=max_tokens,
+                        temperature=self.temperature,
+                        system=[{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}],
+                        messages=[{"role": "user", "content": prompt}]
+                    ),
+                    usage=_anthropic_tokens,
+                )
+                llm_span.set(
+                    input_tokens=response.usage.input_tokens,
+                    output_tokens=response.usage.output_tokens,
+                    cache_read_input_tokens=getattr(response.usage, "cache_read_input_tokens", 0) or 0,
+                )
+            current_usage().add_anthropic_usage(response.usage)
             return response.content[0].text
         except Exception as e:
             raise Exception(f"Failed to generate response: {str(e)}")
 
-    
-    async def run_evaluation_with_tools(self, evaluation_prompt: str, thread_id: Optional[int] = None) -> str:
-        """Run evaluation using MCP tools and LangChain agent"""
-
-        await self.initialize_mcp(thread_id)
-        
-        if not self.mcp_manager[thread_id]:
-            raise Exception("MCP manager not initialized")
-        
+    async def stream_response(self, prompt: str, system_prompt: str, **kwargs) -> AsyncIterator[str]:
+        """Stream the response text using the async Anthropic client, with the model of ``stage``"""
+        stage = kwargs.get("stage", PLANNING)
+        model = self.model_for(stage)
+        max_tokens = kwargs.get("max_tokens", 8192)
+        reserved = (estimate_tokens(system_prompt) + estimate_tokens(prompt), max_tokens)
+        # Timed by hand: a span() context would stay current in the consumer across yields
+        started = time.perf_counter()
         try:
-            # Convert MCP tools to LangChain StructuredTools
-            lc_tools: List[StructuredTool] = [
-                self._wrap_mcp_tool(tname, tmeta, thread_id)
-                for tname, tmeta in self.mcp_manager[thread_id].return_documentation().items()
-            ]
-            
-            # Create prompt template
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", "You are an advanced assistant with tool‑use."),
-                MessagesPlaceholder("history"),
-                ("human", "{input}"),
-                MessagesPlaceholder("agent_scratchpad"),
-            ])
-            
-            # Create memory
-            memory = ConversationBufferWindowMemory(
-                k=MEMORY_WINDOW_K,
-                return_messages=True,
-                memory_key="history",
-            )
-            
-            # Create agent and executor
-            agent = create_tool_calling_agent(
-                llm=self.langchain_client, 
-                tools=lc_tools, 
-                prompt=prompt
-            )
-            executor = AgentExecutor(
-                agent=agent,
-                tools=lc_tools,
-                memory=memory,
-                verbose=True,
-                max_iterations=50,
-            )
-            
-            # Run evaluation
-            result = await executor.ainvoke({"input": evaluation_prompt})
-            
+            async def open_stream():
+                # Opening the stream sends the request, so throttling is retried before any text is yielded
+                manager = self.anthropic_client.messages.stream(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=self.temperature,
+                    system=[{"type": "text", "text": system_prompt, "cache_control": CACHE_CONTROL}],
+                    messages=[{"role": "user", "content": prompt}]
+                )
+                return manager, await manager.__aenter__()
+
+            manager, stream = await rate_limited(model, *reserved, open_stream)
             try:
-                await self.cleanup(thread_id)  
-            except Exception as e:
-                print("warning: Error in cleaning up resources")
-                pass
+                async for text in stream.text_stream:
+                    yield text
+                message = await stream.get_final_message()
+            finally:
+                await manager.__aexit__(None, None, None)
+            get_rate_limiter(model).settle(reserved, _anthropic_tokens(message))
+        except Exception as e:
+            add_span("llm_call", time.perf_counter() - started, stage=stage, model=model, stream=True, error=str(e))
+            raise Exception(f"Failed to stream response: {str(e)}")
+
+        add_span(
+            "llm_call", time.perf_counter() - started,
+            stage=stage, model=model, stream=True,
+            input_tokens=message.usage.input_tokens,
+            output_tokens=message.usage.output_tokens,
+            cache_read_input_tokens=getattr(message.usage, "cache_read_input_tokens", 0) or 0,
+        )
+        current_usage().add_anthropic_usage(message.usage)
+
+    async def run_evaluation_with_tools(self, evaluation_prompt: str, system_prompt: Optional[str] = None,
+                                        on_event: Optional[EventCallback] = None,
+                                        manager: Optional[MCPToolManager] = None,
+                                        max_steps: Optional[int] = None) -> str:
+        """Run evaluation using MCP tools and LangChain agent.
+
+        The agent gets ``max_steps`` turns; if it runs out of them or keeps looping, the
+        run is stopped and a partial result is generated from the tool calls made so far.
+        """
+        from langchain.chains.conversation.memory import ConversationBufferWindowMemory
+        from langchain.agents import AgentExecutor
+
+        try:
+            # A caller-provided session (e.g. after a partial replay) keeps its browser state
+            lease = self.session_pool.lease() if manager is None else nullcontext(manager)
+            async with lease as manager:
+                # Compiled tools and agents are shared process-wide; this run's session state
+                # (leased browser, snapshot differ, screenshots, loop monitor) is bound to the task instead
+                monitor = StepMonitor(max_steps or DEFAULT_AGENT_STEPS)
+                session = ToolSession(
+                    manager,
+                    differ=SnapshotDiffer() if self.snapshot_deltas else None,
+                    screenshots=ScreenshotProcessor(self.image_max_dimension, self.image_max_bytes),
+                    monitor=monitor,
+                )
+                with bind_tool_session(session):
+                    lc_tools: List[StructuredTool] = tool_registry.get_tools(
+                        manager.return_documentation(), ClaudeClient._wrap_mcp_tool
+                    )
+                    system_text = AGENT_SYSTEM_PROMPT + (f"\n\n{system_prompt}" if system_prompt else "")
+                    agent = tool_registry.get_agent(
+                        (self.model_for(NAVIGATION), self.model_for(JUDGMENT), self.location, self.project_id,
+                         tool_registry.toolset_key(lc_tools), system_text,
+                         self.scratchpad_token_budget if self.compact_scratchpad else None),
+                        lambda: self._build_agent(lc_tools, system_text),
+                    )
+                    
+                    # Create memory
+                    memory = ConversationBufferWindowMemory(
+                        k=MEMORY_WINDOW_K,
+                        return_messages=True,
+                        memory_key="history",
+                    )
+                    
+                    executor = AgentExecutor(
+                        agent=agent,
+                        tools=lc_tools,
+                        memory=memory,
+                        verbose=AGENT_VERBOSE,
+                        max_iterations=monitor.budget,
+                    )
+                    
+                    # Run evaluation; turns and tool calls are traced as spans instead of verbose stdout
+                    config = {"callbacks": [UsageCallbackHandler(current_usage()), TracingCallbackHandler()]}
+                    stop_reason = None
+                    with span("agent_run", tools=len(lc_tools), budget=monitor.budget) as run_span:
+                        try:
+                            if on_event:
+                                output = await self._stream_agent_events(executor, evaluation_prompt, config, on_event)
+                            else:
+                                output = (await executor.ainvoke({"input": evaluation_prompt}, config=config))["output"]
+                            if isinstance(output, str) and output.startswith(STOPPED_OUTPUT_PREFIX):
+                                stop_reason = f"step budget of {monitor.budget} turns used up"
+                        except AgentStopped as e:
+                            stop_reason = str(e)
+                        run_span.set(tool_calls=len(monitor.steps), loops=monitor.loops, stopped=stop_reason)
+
+            if stop_reason:
+                print(f"⏹️ Agent stopped early after {len(monitor.steps)} tool calls: {stop_reason}")
+                if on_event:
+                    await on_event({"event": "agent_stopped", "reason": stop_reason, "tool_calls": len(monitor.steps)})
+                output = await self._partial_result(evaluation_prompt, monitor, stop_reason)
             
-            return result["output"]
+            return output
             
         except Exception as e:
             raise Exception(f"Failed to run evaluation with tools: {str(e)}")
+
+    async def _partial_result(self, evaluation_prompt: str, monitor: StepMonitor, reason: str) -> str:
+        """Turn the tool calls of a stopped run into a result, marking what it did not get to verify"""
+        with span("partial_result", tool_calls=len(monitor.steps)):
+            response = await self.generate_response(
+                partial_result_prompt.format(task=evaluation_prompt, reason=reason, steps=monitor.describe() or "(none)"),
+                partial_result_system_prompt,
+                stage=JUDGMENT
+            )
+        data = extract_json_block(response)
+        if not isinstance(data, dict):
+            return response
+        data["agent_stopped"] = {"reason": reason, "tool_calls": len(monitor.steps), "budget": monitor.budget}
+        return f"```json\n{json.dumps(data, indent=2)}\n```"
+
+    async def _stream_agent_events(self, executor: "AgentExecutor", evaluation_prompt: str,
+                                   config: Dict[str, Any], on_event: EventCallback) -> str:
+        """Run the executor through LangChain's async event stream, forwarding tool calls as they happen"""
+        output = None
+        async for event in executor.astream_events({"input": evaluation_prompt}, config=config, version="v2"):
+            kind = event["event"]
+            if kind == "on_tool_start":
+                await on_event({"event": "tool_call", "tool": event["name"], "input": event["data"].get("input")})
+            elif kind == "on_tool_end":
+                tool_output = event["data"].get("output")
+                await on_event({
+                    "event": "tool_result",
+                    "tool": event["name"],
+                    "output_chars": len(str(getattr(tool_output, "content", tool_output))),
+                })
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                output = event["data"]["output"]["output"]
+        if output is None:
+            raise RuntimeError("Agent finished without producing an output")
+        return output
     
     
-    def _wrap_mcp_tool(self, name: str, meta: Dict[str, Any], thread_id: Optional[int] = None) -> StructuredTool:
-        ArgsModel = self._schema_to_model(name, meta["parameters_dict"])
+    def _build_agent(self, lc_tools: List[StructuredTool], system_text: str):
+        """Create the tool-calling agent runnable for a tool set and system prompt.
+
+        Tool schemas are sent ahead of the system prompt, so the system breakpoint caches
+        tools + static instructions across runs, and the input breakpoint caches the
+        evaluation prompt across the turns of one run. With ``compact_scratchpad`` only the
+        latest page snapshot stays in full; older tool outputs are sent as summaries.
+
+        Turns are answered by the navigation model; when it has no more tool calls to make,
+        the turn is handed to the judgment model (if it differs) to write the verdict.
+        Every model call goes through the model's process-wide rate limiter.
+        This is ``create_tool_calling_agent`` with a routing step in place of the model.
+        """
+        from langchain.agents.format_scratchpad.tools import format_to_tool_messages
+        from langchain.agents.output_parsers.tools import ToolsAgentOutputParser
+        from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+
+        prompt = ChatPromptTemplate.from_messages([
+            SystemMessage(content=[{"type": "text", "text": system_text, "cache_control": CACHE_CONTROL}]),
+            MessagesPlaceholder("history"),
+            ("human", [{"type": "text", "text": "{input}", "cache_control": CACHE_CONTROL}]),
+            MessagesPlaceholder("agent_scratchpad"),
+        ])
+        message_formatter = (
+            ScratchpadCompactor(self.scratchpad_token_budget) if self.compact_scratchpad else format_to_tool_messages
+        )
+
+        navigation = self._stage_llm(NAVIGATION, lc_tools)
+        judgment = self._stage_llm(JUDGMENT, lc_tools)
+        # The agent is shared process-wide, so its closures must not hold on to this client
+        models = {stage: self.model_for(stage) for stage in (NAVIGATION, JUDGMENT)}
+        routed = models[JUDGMENT] != models[NAVIGATION]
+
+        async def call(stage: str, llm: Any, messages: Any, config: Dict[str, Any]):
+            # Agent turns share the rate limiter of their model with every other request to it
+            return await rate_limited(
+                models[stage], _estimate_prompt_tokens(messages), MAX_LLM_TOKENS,
+                lambda: llm.ainvoke(messages, config), usage=_lc_tokens,
+            )
+
+        async def route(messages: Any, config: Dict[str, Any]):
+            response = await call(NAVIGATION, navigation, messages, config)
+            if response.tool_calls or not routed:
+                return response
+            # The navigation model is ready to answer: the judgment model writes the verdict
+            # (and may still call tools if it wants to check something first)
+            return await call(JUDGMENT, judgment, messages, config)
+
+        llm = RunnableLambda(route, name="stage_router")
+
+        return (
+            RunnablePassthrough.assign(agent_scratchpad=lambda x: message_formatter(x["intermediate_steps"]))
+            | prompt
+            | llm
+            | ToolsAgentOutputParser()
+        )
+
+    def _stage_llm(self, stage: str, lc_tools: List[StructuredTool]):
+        """The chat model of ``stage`` with the tools bound, tagged so its turns are traced under the stage"""
+        model = self.model_for(stage)
+        llm = get_chat_model(model, self.location, self.project_id)
+        return llm.bind_tools(lc_tools).with_config(metadata={"kairos_stage": stage, "kairos_model": model})
+
+    @staticmethod
+    def _wrap_mcp_tool(name: str, meta: Dict[str, Any]) -> StructuredTool:
+        """Compile an MCP tool into a StructuredTool that runs against the task's bound ToolSession.
+
+        Compiled tools are shared process-wide, so they only reference the class, never a client.
+        """
+        ArgsModel = ClaudeClient._schema_to_model(name, meta["parameters_dict"])
 
         async def _arun(**kwargs):
-            success, out = await self.mcp_manager[thread_id].call_tool(name, kwargs)
-            if not success:
-                raise RuntimeError(out["error"])
-            out_json = json.dumps(self._normalise(out), default=self._json_safe)
-            return self._truncate(out_json)
+            session = current_tool_session()
+            with span("tool_call", tool=name) as tool_span:
+                arguments = to_mcp_arguments(kwargs)
+                success, out = await session.manager.call_tool(name, arguments)
+                if not success:
+                    raise RuntimeError(out["error"])
+                attachments: List[Dict[str, Any]] = []
+                normalised = ClaudeClient._normalise(out, session.screenshots, attachments)
+                recorder = current_recorder()
+                if recorder:
+                    recorder.record(name, arguments, normalised)
+                notice = session.monitor.record(name, arguments, output_text(normalised)) if session.monitor else None
+                if session.differ:
+                    normalised = session.differ.encode(normalised, name)
+                out_json = ClaudeClient._truncate(json.dumps(normalised, default=ClaudeClient._json_safe))
+                if notice:
+                    out_json += f"\n\n{notice}"
+                tool_span.set(output_chars=len(out_json), images=len(attachments), loop=bool(notice))
+            if not attachments:
+                return out_json
+            # Multimodal tool result: the model sees the screenshots themselves
+            return [{"type": "text", "text": out_json}, *attachments]
 
         return StructuredTool.from_function(
             name         = name,
@@ -156,67 +471,71 @@ class ClaudeClient(LLMClient):
             return_direct=False,
         )
     
-    def _schema_to_model(self, tool_name: str, schema: Dict[str, Any]) -> type[BaseModel]:
-        """Convert MCP JSON‑Schema → Pydantic model."""
-        props = schema.get("properties", {})
-        required = set(schema.get("required", []))
-        _tmap = {"string": str, "number": float, "integer": int,
-                 "boolean": bool, "array": list, "object": dict}
-        fields: Dict[str, tuple] = {}
-        
-        for pname, pschema in props.items():
-            ptype = _tmap.get(pschema.get("type", "string"), str)
-            default = ... if pname in required else None
-            fields[pname] = (ptype, Field(default, description=pschema.get("description", "")))
-        
-        return create_model(f"{tool_name}_Args", **fields)
+    @staticmethod
+    def _schema_to_model(tool_name: str, schema: Dict[str, Any]) -> type[BaseModel]:
+        """Convert MCP JSON‑Schema → Pydantic model, including nested objects, arrays and enums."""
+        return schema_to_model(f"{tool_name}_Args", schema)
     
-    def _normalise(self, obj: Any) -> Any:
-        """Recursively turn Anthropic blocks & exotic types into JSON‑safe values."""
+    @staticmethod
+    def _normalise(obj: Any, screenshots: Optional[ScreenshotProcessor] = None,
+                   attachments: Optional[List[Dict[str, Any]]] = None) -> Any:
+        """Recursively turn MCP blocks & exotic types into JSON‑safe values.
+
+        Images are kept in memory: with a ``screenshots`` processor they are downscaled,
+        deduplicated and appended to ``attachments`` as multimodal content blocks.
+        """
+        # MCP content blocks only exist once a session has loaded the MCP SDK
+        mcp_types = sys.modules.get("mcp.types")
+        TextContent = getattr(mcp_types, "TextContent", None)
+        ImageContent = getattr(mcp_types, "ImageContent", None)
         if TextContent and isinstance(obj, TextContent):
             return obj.text
         if ImageContent and isinstance(obj, ImageContent):
-            url = getattr(obj, "url", None)
-            if url:
-                return {"type": "image", "url": url}
             data = getattr(obj, "data", None)
-            if data:
-                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".png")
-                tmp.write(data)
-                tmp.close()
-                self._tmp_paths.append(tmp.name)
-                return {"type": "image", "path": tmp.name}
-            return str(obj)
+            mime_type = getattr(obj, "mimeType", None) or getattr(obj, "mime_type", None) or "image/png"
+            if not data or screenshots is None or attachments is None:
+                return {"type": "image", "mime_type": mime_type, "omitted": True}
+            block = screenshots.process(data, mime_type)
+            if block["type"] != "image":
+                return block["text"]
+            attachments.append(block)
+            return {"type": "image", "attached": len(attachments)}
 
         if isinstance(obj, (Path, bytes, bytearray)):
             return str(obj)
+        if isinstance(obj, BaseModel):
+            # Recurse into fields so nested MCP content blocks are normalised too
+            return {k: ClaudeClient._normalise(v, screenshots, attachments) for k, v in obj}
         if hasattr(obj, "model_dump"):
             return obj.model_dump()
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        if isinstance(obj, (np.floating, np.integer)):
-            return obj.item()
+        # Likewise numpy values can only show up if something already imported numpy
+        np = sys.modules.get("numpy")
+        if np is not None:
+            if isinstance(obj, np.ndarray):
+                return obj.tolist()
+            if isinstance(obj, (np.floating, np.integer)):
+                return obj.item()
         if isinstance(obj, dict):
-            return {k: self._normalise(v) for k, v in obj.items()}
+            return {k: ClaudeClient._normalise(v, screenshots, attachments) for k, v in obj.items()}
         if isinstance(obj, (list, tuple, set)):
-            return [self._normalise(v) for v in obj]
+            return [ClaudeClient._normalise(v, screenshots, attachments) for v in obj]
 
         return obj
     
-    def _json_safe(self, o):
+    @staticmethod
+    def _json_safe(o):
         """Fallback JSON encoder."""
         return str(o)
     
-    def _truncate(self, text: str, limit: int = MAX_TOOL_CHARS) -> str:
-        """Simple character‑based truncation to keep tool output small."""
-        return text if len(text) <= limit else text[:limit] + "… [truncated]"
+    @staticmethod
+    def _truncate(text: str, limit: int = MAX_TOOL_CHARS) -> str:
+        """Character‑based truncation that keeps head and tail and says how much was dropped."""
+        if len(text) <= limit:
+            return text
+        head = limit * 3 // 4
+        tail = limit - head
+        return f"{text[:head]}… [{len(text) - limit} chars truncated] …{text[-tail:]}"
     
-    async def cleanup(self, thread_id: Optional[int] = None):
-        """Clean up resources including temp files"""
-        await self.mcp_manager[thread_id].cleanup()
-        for p in self._tmp_paths:
-            try:
-                os.unlink(p)
-            except FileNotFoundError:
-                pass
-        self._tmp_paths.clear()
+    async def cleanup(self):
+        """Nothing to release per run: leased MCP sessions go back to the pool and screenshots live in memory"""
+        pass
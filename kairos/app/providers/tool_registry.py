@@ -0,0 +1,166 @@
+"""
+Process-wide registry of compiled LangChain tools and agents.
+
+MCP tool schemas are identical across sessions and shards, so each tool is
+compiled into a pydantic args model and StructuredTool once, keyed by a hash
+of its name, description and ``inputSchema``. Compiled tools are shared by
+every run; a tool call finds the browser session it belongs to through the
+``ToolSession`` bound to the calling task.
+"""
+import hashlib
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional, Tuple, Union
+
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+from ..agent_budget import StepMonitor
+from ..mcp_node import MCPToolManager
+from ..snapshots import SnapshotDiffer
+from ..images import ScreenshotProcessor
+
+if TYPE_CHECKING:
+    from langchain_core.tools import StructuredTool
+
+_JSON_SCALARS = {"string": str, "number": float, "integer": int, "boolean": bool, "null": type(None)}
+
+
+class ToolSession:
+    """Per-run state behind the shared tools: the leased MCP session, its output encoders and loop monitor."""
+
+    def __init__(self, manager: MCPToolManager, differ: Optional[SnapshotDiffer] = None,
+                 screenshots: Optional[ScreenshotProcessor] = None, monitor: Optional[StepMonitor] = None):
+        self.manager = manager
+        self.differ = differ
+        self.screenshots = screenshots
+        self.monitor = monitor
+
+
+_current_session: ContextVar[Optional[ToolSession]] = ContextVar("kairos_tool_session", default=None)
+
+
+@contextmanager
+def bind_tool_session(session: ToolSession):
+    """Route calls of shared tools made from this task (and its children) to ``session``."""
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+
+
+def current_tool_session() -> ToolSession:
+    session = _current_session.get()
+    if session is None:
+        raise RuntimeError("No MCP tool session is bound to the current task")
+    return session
+
+
+def schema_hash(name: str, description: str, schema: Dict[str, Any]) -> str:
+    payload = json.dumps({"name": name, "description": description, "schema": schema},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _model_name(*parts: str) -> str:
+    return "_".join(p.replace("-", "_") for p in parts if p)
+
+
+def json_schema_type(schema: Dict[str, Any], name: str) -> Any:
+    """Map a JSON-Schema fragment to a Python type, keeping nesting and enums."""
+    if not isinstance(schema, dict) or not schema:
+        return Any
+    if "enum" in schema:
+        return Literal[tuple(schema["enum"])]
+    if "const" in schema:
+        return Literal[schema["const"]]
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [json_schema_type(s, f"{name}_{i}") for i, s in enumerate(schema[key])]
+            return Union[tuple(options)] if len(options) > 1 else options[0]
+
+    stype = schema.get("type")
+    if isinstance(stype, list):
+        options = [json_schema_type({**schema, "type": t}, name) for t in stype]
+        return Union[tuple(options)] if len(options) > 1 else options[0]
+    if stype == "array":
+        return List[json_schema_type(schema.get("items", {}), f"{name}_item")]
+    if stype == "object" or "properties" in schema:
+        if schema.get("properties"):
+            return schema_to_model(name, schema)
+        additional = schema.get("additionalProperties")
+        return Dict[str, json_schema_type(additional, f"{name}_value") if isinstance(additional, dict) else Any]
+    return _JSON_SCALARS.get(stype, Any if stype is None else str)
+
+
+def schema_to_model(name: str, schema: Dict[str, Any]) -> type[BaseModel]:
+    """Convert an MCP JSON-Schema object into a pydantic model, recursing into nested objects."""
+    props = schema.get("properties", {})
+    required = set(schema.get("required", []))
+    fields: Dict[str, tuple] = {}
+
+    for pname, pschema in props.items():
+        ptype = json_schema_type(pschema, _model_name(name, pname))
+        if pname in required:
+            default = ...
+        else:
+            ptype = Optional[ptype]
+            default = pschema.get("default") if isinstance(pschema, dict) else None
+        description = pschema.get("description", "") if isinstance(pschema, dict) else ""
+        fields[pname] = (ptype, Field(default, description=description))
+
+    extra = "allow" if schema.get("additionalProperties") not in (None, False) else "ignore"
+    return create_model(name, __config__=ConfigDict(extra=extra), **fields)
+
+
+def to_mcp_arguments(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn validated tool arguments (possibly nested models) back into plain JSON for MCP."""
+    def plain(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return value.model_dump(exclude_none=True)
+        if isinstance(value, list):
+            return [plain(v) for v in value]
+        if isinstance(value, dict):
+            return {k: plain(v) for k, v in value.items()}
+        return value
+
+    # Drop unset optional arguments instead of sending explicit nulls
+    return {k: plain(v) for k, v in kwargs.items() if v is not None}
+
+
+class ToolRegistry:
+    def __init__(self):
+        self._tools: Dict[str, "StructuredTool"] = {}
+        self._agents: Dict[Tuple, Any] = {}
+        self.compiled = 0
+
+    def get_tools(self, documentation: Dict[str, Dict[str, Any]],
+                  compile_tool: Callable[[str, Dict[str, Any]], "StructuredTool"]) -> List["StructuredTool"]:
+        """Return compiled tools for an MCP tool listing, compiling only unseen schemas."""
+        tools = []
+        for name, meta in documentation.items():
+            key = schema_hash(name, meta["documentation"], meta["parameters_dict"])
+            tool = self._tools.get(key)
+            if tool is None:
+                tool = self._tools[key] = compile_tool(name, meta)
+                self.compiled += 1
+            tools.append(tool)
+        return tools
+
+    def get_agent(self, key: Tuple, build_agent: Callable[[], Any]) -> Any:
+        """Return the agent runnable cached under ``key``, building it on first use."""
+        agent = self._agents.get(key)
+        if agent is None:
+            agent = self._agents[key] = build_agent()
+        return agent
+
+    @staticmethod
+    def toolset_key(tools: List["StructuredTool"]) -> Tuple[int, ...]:
+        return tuple(sorted(id(t) for t in tools))
+
+    def stats(self) -> Dict[str, int]:
+        return {"tools": len(self._tools), "agents": len(self._agents), "compiled": self.compiled}
+
+
+tool_registry = ToolRegistry()
@@ -0,0 +1,231 @@
+"""
+Process-wide rate limiting of LLM requests.
+
+Every evaluation creates its own client, so without coordination concurrent
+evaluations overrun the Vertex quota together. ``RateLimiter`` holds one token
+bucket each for requests, input tokens and output tokens per minute of one
+model, shared by every request to that model on the running event loop.
+A request reserves its estimated input tokens and ``max_tokens`` of output up
+front and is corrected to its real usage once it finishes, the way the
+Anthropic API accounts for output tokens.
+
+Waiting requests are served by priority: interactive requests (the default)
+before batch ones (``use_priority(BATCH_PRIORITY)``, set by the batch job
+workers), first come first served within a priority. A throttled (429/529)
+request pauses the whole limiter for a jittered, exponentially growing
+backoff, honouring ``retry-after``, and is retried.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import sys
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .tracing import add_span
+
+# Configuration constants (0 = unlimited); set them to the model's Vertex quota
+REQUESTS_PER_MINUTE = float(os.getenv("KAIROS_LLM_RPM", "0"))
+INPUT_TOKENS_PER_MINUTE = float(os.getenv("KAIROS_LLM_ITPM", "0"))
+OUTPUT_TOKENS_PER_MINUTE = float(os.getenv("KAIROS_LLM_OTPM", "0"))
+MAX_LLM_RETRIES = int(os.getenv("KAIROS_LLM_MAX_RETRIES", "6"))
+BASE_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+MIN_RECORDED_WAIT_SECONDS = 0.01
+
+INTERACTIVE_PRIORITY = 0
+BATCH_PRIORITY = 1
+
+THROTTLED_STATUS = (429, 529)
+TRANSIENT_STATUS = (500, 502, 503, 504)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Capacity ``per_minute`` refilled continuously; unlimited when ``per_minute`` is 0."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` (at most the capacity) is available."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing * 60 / self.capacity)
+
+    def take(self, amount: float, now: float):
+        if self.capacity > 0:
+            self._refill(now)
+            self.tokens -= amount  # may go negative: the debt delays later requests
+
+
+class RateLimiter:
+    """Request, input-token and output-token buckets of one model, served in priority order."""
+
+    def __init__(self, model: str, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 input_tokens_per_minute: float = INPUT_TOKENS_PER_MINUTE,
+                 output_tokens_per_minute: float = OUTPUT_TOKENS_PER_MINUTE):
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute)
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.output_tokens = TokenBucket(output_tokens_per_minute)
+        self.throttled_count = 0
+        self._paused_until = 0.0
+        self._waiters: List[List[int]] = []  # heap of [priority, sequence]
+        self._seq = itertools.count()
+        self._cond = asyncio.Condition()
+
+    def _delay(self, input_tokens: int, output_tokens: int) -> float:
+        now = time.monotonic()
+        return max(
+            self._paused_until - now,
+            self.requests.wait_time(1, now),
+            self.input_tokens.wait_time(input_tokens, now),
+            self.output_tokens.wait_time(output_tokens, now),
+        )
+
+    async def acquire(self, input_tokens: int, output_tokens: int, priority: Optional[int] = None) -> float:
+        """Wait for room for one request behind every higher-priority one; returns the seconds waited."""
+        priority = current_priority() if priority is None else priority
+        started = time.monotonic()
+        entry = [priority, next(self._seq)]
+        async with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    delay = self._delay(input_tokens, output_tokens) if self._waiters[0] is entry else None
+                    if delay is not None and delay <= 0:
+                        break
+                    try:
+                        # Only the head waits on the clock; the others wait for it to go
+                        await asyncio.wait_for(self._cond.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiters)
+            now = time.monotonic()
+            self.requests.take(1, now)
+            self.input_tokens.take(input_tokens, now)
+            self.output_tokens.take(output_tokens, now)
+            self._cond.notify_all()
+
+        waited = time.monotonic() - started
+        if waited >= MIN_RECORDED_WAIT_SECONDS:
+            add_span("rate_limit_wait", waited, model=self.model, priority=priority)
+        return waited
+
+    def settle(self, reserved: Tuple[int, int], used: Tuple[int, int]):
+        """Correct the token buckets from the reserved (input, output) tokens to the ones actually used."""
+        now = time.monotonic()
+        self.input_tokens.take(used[0] - reserved[0], now)
+        self.output_tokens.take(used[1] - reserved[1], now)
+
+    def throttled(self, delay: float):
+        """The provider throttled a request: hold every request to this model for ``delay`` seconds."""
+        self.throttled_count += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"model": self.model, "waiting": len(self._waiters), "throttled": self.throttled_count}
+
+
+def _status(error: BaseException) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_throttled(error: BaseException) -> bool:
+    """Whether the provider rejected the request for rate or capacity reasons."""
+    return _status(error) in THROTTLED_STATUS or type(error).__name__ in ("RateLimitError", "ResourceExhausted")
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Throttling, a transient server error or a dropped connection."""
+    if is_throttled(error) or _status(error) in TRANSIENT_STATUS:
+        return True
+    # The Anthropic SDK is only loaded by the provider clients
+    anthropic = sys.modules.get("anthropic")
+    return anthropic is not None and isinstance(error, anthropic.APIConnectionError)
+
+
+def backoff_delay(attempt: int, error: Optional[BaseException] = None) -> float:
+    """Jittered exponential backoff for retry ``attempt`` (0-based), at least the server's ``retry-after``."""
+    delay = random.uniform(0.5, 1.0) * min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt)
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(delay, float(headers.get("retry-after", 0)))
+    except (TypeError, ValueError):
+        return delay
+
+
+async def rate_limited(model: str, input_tokens: int, output_tokens: int, call: Callable[[], Awaitable[T]],
+                       usage: Optional[Callable[[T], Tuple[int, int]]] = None) -> T:
+    """Run ``call`` under the model's limiter, retrying throttled and transient failures with backoff.
+
+    ``usage`` maps the result to the (input, output) tokens it actually used, to settle the reservation.
+    """
+    limiter = get_rate_limiter(model)
+    for attempt in itertools.count():
+        await limiter.acquire(input_tokens, output_tokens)
+        try:
+            result = await call()
+        except Exception as e:
+            if not is_retryable(e) or attempt >= MAX_LLM_RETRIES:
+                raise
+            delay = backoff_delay(attempt, e)
+            if is_throttled(e):
+                limiter.throttled(delay)
+            print(f"⏳ {model} request failed ({str(e).splitlines()[0] if str(e) else type(e).__name__}), "
+                  f"retry {attempt + 1}/{MAX_LLM_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            continue
+        if usage is not None:
+            limiter.settle((input_tokens, output_tokens), usage(result))
+        return result
+
+
+_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, RateLimiter]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """Return the limiter shared by every request to ``model`` on the running event loop."""
+    limiters = _limiters.setdefault(asyncio.get_running_loop(), {})
+    if model not in limiters:
+        limiters[model] = RateLimiter(model)
+    return limiters[model]
+
+
+_current_priority: ContextVar[int] = ContextVar("kairos_llm_priority", default=INTERACTIVE_PRIORITY)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+@contextmanager
+def use_priority(priority: int):
+    """Send the LLM requests made inside the block (including child tasks) at ``priority``."""
+    token = _current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(token)
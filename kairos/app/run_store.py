@@ -0,0 +1,244 @@
+"""
+Incremental re-evaluation of successive builds of the same app.
+
+Every incremental run stores the reduced HTML it planned against, the test
+plan and the per-feature verdicts under the app's identity. The next run diffs
+its reduced HTML against the stored one line by line (one tag or script line
+per line), collects the identifiers and words of the changed lines, and marks
+a feature as affected when its name, description, actions, assertions or step
+selectors mention any of them. Only affected features are re-executed; the
+others carry their previous verdict forward.
+
+Changes that cannot be attributed fall back conservatively: a changed script
+line that matches no feature re-runs every feature, and an added element none
+of whose id, labels or visible text any feature mentions (new functionality
+the stored plan does not cover), or a diff touching more than
+``INCREMENTAL_MAX_CHANGE_RATIO`` of the page, re-plans from scratch.
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Set
+
+# Configuration constants
+DEFAULT_STORE_DIR = os.path.join(os.getenv("KAIROS_CACHE_DIR", ".kairos_cache"), "runs")
+INCREMENTAL_MAX_CHANGE_RATIO = 0.3  # beyond this share of changed lines the app is re-planned
+MIN_TOKEN_CHARS = 3
+
+TAG_SPLIT_RE = re.compile(r"(?=<)")
+TAG_NAME_RE = re.compile(r"</?[A-Za-z][\w-]*|\s[\w:-]+=|/?>")
+CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+WORD_RE = re.compile(r"[a-z0-9]+")
+CODE_RE = re.compile(r"[;{}()]")
+# Attributes that name an element to the user or to a test (class names and handlers do not)
+LABEL_ATTR_RE = re.compile(r"""\s(?:id|name|aria-label|placeholder|title|alt|label|value)=(?:"([^"]*)"|'([^']*)')""")
+STOPWORDS = {
+    "the", "and", "for", "with", "that", "this", "from", "into", "are", "was", "not", "all", "any",
+    "true", "false", "null", "undefined", "const", "let", "var", "function", "return", "async", "await",
+    "new", "else", "document", "window", "https", "http", "www", "com", "html", "div", "span",
+}
+
+
+def _words(text: str) -> Set[str]:
+    words = WORD_RE.findall(CAMEL_RE.sub(" ", text).lower())
+    return {w for w in words if len(w) >= MIN_TOKEN_CHARS and w not in STOPWORDS}
+
+
+def dom_lines(html: str) -> List[str]:
+    """Linearise reduced HTML into one line per tag and per script/text line."""
+    lines = []
+    for chunk in TAG_SPLIT_RE.split(html):
+        for line in chunk.splitlines():
+            line = line.strip()
+            if line:
+                lines.append(line)
+    return lines
+
+
+def element_words(line: str) -> Set[str]:
+    """Words of a DOM line's id, labels and visible text (not its classes, handlers or URLs)."""
+    if not line.startswith("<"):
+        return set() if CODE_RE.search(line) else _words(line)  # text, unless it is a script line
+    tag_end = line.find(">")
+    tag, text = (line, "") if tag_end < 0 else (line[:tag_end], line[tag_end + 1:])
+    labels = " ".join(a or b for a, b in LABEL_ATTR_RE.findall(tag))
+    return _words(f"{labels} {text}")
+
+
+class HtmlDiff:
+    """Lines changed between two versions of a page and the words they mention."""
+
+    def __init__(self, changed: List[str], total: int, added: Optional[List[str]] = None):
+        self.changed = changed
+        self.total = total
+        self.tokens: Set[str] = set()
+        self.script_tokens: Set[str] = set()
+        for line in changed:
+            content = TAG_NAME_RE.sub(" ", line)  # attribute values and text, without tag/attribute names
+            words = _words(content)
+            self.tokens |= words
+            if CODE_RE.search(content):  # script lines and inline handlers
+                self.script_tokens |= words
+        # What each added line shows or names, to spot new elements no feature covers
+        self.added_elements: List[Set[str]] = [w for w in map(element_words, added or []) if w]
+
+    @property
+    def ratio(self) -> float:
+        return len(self.changed) / self.total if self.total else 0.0
+
+
+def diff_html(old_html: str, new_html: str) -> HtmlDiff:
+    """Diff two reduced pages; removed and added lines both count as changed."""
+    old, new = dom_lines(old_html), dom_lines(new_html)
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    changed, added = [], []
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op != "equal":
+            changed += old[i1:i2] + new[j1:j2]
+            added += new[j1:j2]
+    return HtmlDiff(changed, max(len(old), len(new)), added)
+
+
+def feature_name(feature: Any) -> str:
+    return feature.get("Test_feature", "") if isinstance(feature, dict) else ""
+
+
+def _normalise_name(name: str) -> str:
+    return " ".join(str(name or "").lower().split())
+
+
+def feature_tokens(feature: Dict[str, Any]) -> Set[str]:
+    """Words a test plan entry uses to refer to the page."""
+    parts = [str(feature.get(k, "")) for k in ("Test_feature", "Description", "Actions", "Assertions")]
+    for step in feature.get("Steps") or []:
+        if isinstance(step, dict):
+            parts += [str(step.get(k, "")) for k in ("selector", "value", "name", "url")]
+    return _words(" ".join(parts))
+
+
+def affected_features(test_plan: List[Dict[str, Any]], diff: HtmlDiff) -> List[Dict[str, Any]]:
+    """Test plan entries whose words overlap the changed lines of ``diff``."""
+    if not diff.changed:
+        return []
+    affected = [f for f in test_plan if not isinstance(f, dict) or feature_tokens(f) & diff.tokens]
+    if diff.script_tokens and not any(isinstance(f, dict) and feature_tokens(f) & diff.script_tokens for f in test_plan):
+        # A script change no feature can be tied to may affect any of them
+        return list(test_plan)
+    return affected
+
+
+def unplanned_elements(test_plan: List[Dict[str, Any]], diff: HtmlDiff) -> List[Set[str]]:
+    """Added elements that no feature of ``test_plan`` mentions by id, label or text, i.e. untested functionality.
+
+    An element sharing any word with a feature (say a button relabelled from
+    "Clear completed" to "Clear finished") is attributed to that feature instead.
+    """
+    planned: Set[str] = set()
+    for feature in test_plan:
+        if isinstance(feature, dict):
+            planned |= feature_tokens(feature)
+    return [words for words in diff.added_elements if not words & planned]
+
+
+class IncrementalPlan:
+    """Which features of a stored run must be re-executed and which verdicts carry forward."""
+
+    def __init__(self, test_plan: List[Dict[str, Any]], rerun: List[Dict[str, Any]],
+                 carried: List[Dict[str, Any]], diff: HtmlDiff):
+        self.test_plan = test_plan
+        self.rerun = rerun
+        self.carried = carried
+        self.diff = diff
+
+
+def plan_incremental_run(previous: Optional[Dict[str, Any]], user_query: str, html: str,
+                         reduction_level: int, prompt_version: str) -> Optional[IncrementalPlan]:
+    """Compare this run against the stored one; None means a full run is needed."""
+    if not previous:
+        return None
+    if (previous.get("user_query", "").strip() != user_query.strip()
+            or previous.get("reduction_level") != reduction_level
+            or previous.get("prompt_version") != prompt_version):
+        return None
+
+    diff = diff_html(previous["html"], html)
+    if diff.ratio > INCREMENTAL_MAX_CHANGE_RATIO:
+        return None
+
+    test_plan = previous["test_plan"]
+    if unplanned_elements(test_plan, diff):
+        return None
+    affected = affected_features(test_plan, diff)
+    verdicts = previous.get("verdicts", {})
+    rerun, carried = [], []
+    for feature in test_plan:
+        verdict = verdicts.get(_normalise_name(feature_name(feature)))
+        if verdict is None or any(feature is f for f in affected):
+            rerun.append(feature)
+        else:
+            carried.append(verdict)
+    return IncrementalPlan(test_plan, rerun, carried, diff)
+
+
+class RunStore:
+    """On-disk store of the latest run per app: reduced HTML, test plan and per-feature verdicts."""
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(app_id: str) -> str:
+        return hashlib.sha256(app_id.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}.json")
+
+    def get(self, app_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(self.make_key(app_id)), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put(self, app_id: str, user_query: str, html: str, reduction_level: int, prompt_version: str,
+            test_plan: List[Dict[str, Any]], verdicts: List[Dict[str, Any]]):
+        entry = {
+            "app_id": app_id,
+            "user_query": user_query,
+            "recorded_at": time.time(),
+            "reduction_level": reduction_level,
+            "prompt_version": prompt_version,
+            "html": html,
+            "test_plan": test_plan,
+            "verdicts": {_normalise_name(v.get("feature_name")): v for v in verdicts if v.get("feature_name")},
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(self.make_key(app_id)))
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len([n for n in os.listdir(self.store_dir) if n.endswith(".json")])}
+
+
+_run_store: Optional[RunStore] = None
+
+
+def get_run_store() -> RunStore:
+    """Return the process-wide run store."""
+    global _run_store
+    if _run_store is None:
+        _run_store = RunStore()
+    return _run_store
@@ -0,0 +1,142 @@
+"""
+Compaction of the agent scratchpad within a single run.
+
+LangChain rebuilds the scratchpad from every (action, observation) pair on
+each turn, so without compaction turn N resends all N-1 earlier tool outputs,
+page snapshots included. ``ScratchpadCompactor`` is the agent's message
+formatter: the latest tool output that carries a full page snapshot and
+everything after it (snapshot deltas are relative to it) are kept as they
+are, and every older output is replaced by a one-line summary of the action,
+its outcome, the page URL, its result and the snapshot changes it caused.
+
+If the scratchpad is still over its token budget, summaries are cut down to
+the action, outcome and a short result, oldest first, and then outputs after the latest
+snapshot are summarised as well. The latest full snapshot is never compacted.
+"""
+import json
+import re
+import time
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .html_reducer import estimate_tokens
+from .snapshots import SNAPSHOT_RE, URL_RE
+from .tracing import add_span
+from .trajectory import output_text
+
+# Configuration constants
+DEFAULT_TOKEN_BUDGET = 24000  # scratchpad tokens (tool outputs and call arguments) per agent turn
+MAX_SUMMARY_ARGUMENT_CHARS = 120
+MAX_SUMMARY_RESULT_CHARS = 200
+MAX_SUMMARY_EFFECTS = 8
+
+COMPACTED_PREFIX = "[compacted]"
+RESULT_RE = re.compile(r"### Result\n(.*?)(?=\n###|\Z)", re.DOTALL)
+ERROR_RE = re.compile(r"^(?:### Error\n)?(.*\berror\b.*)$", re.IGNORECASE | re.MULTILINE)
+DIFF_RE = re.compile(r"```diff\n(.*?)\n```", re.DOTALL)
+
+
+def _observation(observation: Any) -> Tuple[str, bool]:
+    """Plain text of a tool observation and whether the tool reported an error.
+
+    Observations are the JSON-encoded normalised MCP result, possibly truncated,
+    or a list of content blocks when screenshots were attached.
+    """
+    if isinstance(observation, list):
+        observation = " ".join(
+            b.get("text", "") for b in observation if isinstance(b, dict) and b.get("type") == "text"
+        )
+    if not isinstance(observation, str):
+        observation = str(observation)
+    try:
+        data = json.loads(observation)
+    except json.JSONDecodeError:
+        # Truncated output: unescape enough of the JSON string to read its sections
+        return observation.replace("\\n", "\n").replace('\\"', '"'), False
+    return output_text(data), isinstance(data, dict) and bool(data.get("isError"))
+
+
+def summarise_step(tool: str, tool_input: Any, observation: Any, brief: bool = False) -> str:
+    """One-line summary of a tool call: action, outcome, result and (unless ``brief``) URL and effects."""
+    arguments = json.dumps(tool_input, default=str, ensure_ascii=False)
+    if len(arguments) > MAX_SUMMARY_ARGUMENT_CHARS:
+        arguments = arguments[:MAX_SUMMARY_ARGUMENT_CHARS] + "…"
+    text, is_error = _observation(observation)
+    error = ERROR_RE.search(text) if is_error else None
+    parts = [f"{COMPACTED_PREFIX} {tool}({arguments}) → {'error: ' + error.group(1).strip()[:120] if error else 'error' if is_error else 'ok'}"]
+    # Results (e.g. of browser_evaluate) are assertion evidence, so brief summaries keep them too
+    result = RESULT_RE.search(text)
+    if result and result.group(1).strip():
+        limit = MAX_SUMMARY_RESULT_CHARS // 4 if brief else MAX_SUMMARY_RESULT_CHARS
+        parts.append(f"result: {' '.join(result.group(1).split())[:limit]}")
+    if brief:
+        return "; ".join(parts)
+
+    url = URL_RE.search(text)
+    if url:
+        parts.insert(1, f"url {url.group(1)}")
+    diff = DIFF_RE.search(text)
+    if diff:
+        lines = [" ".join(line.split()) for line in diff.group(1).splitlines() if line.strip()]
+        effects = "; ".join(lines[:MAX_SUMMARY_EFFECTS])
+        parts.append(f"effects: {effects}{f' (+{len(lines) - MAX_SUMMARY_EFFECTS} more)' if len(lines) > MAX_SUMMARY_EFFECTS else ''}")
+    elif SNAPSHOT_RE.search(text):
+        parts.append("page snapshot omitted, superseded by a later one")
+    return "; ".join(parts)
+
+
+def _tokens(observation: Any) -> int:
+    if isinstance(observation, str):
+        return estimate_tokens(observation)
+    return estimate_tokens(json.dumps(observation, default=str))
+
+
+def compact_steps(steps: Sequence[Tuple[Any, Any]], token_budget: int = DEFAULT_TOKEN_BUDGET) -> List[Tuple[Any, Any]]:
+    """Return ``steps`` with older observations replaced by summaries, within ``token_budget`` where possible."""
+    steps = list(steps)
+    latest_snapshot: Optional[int] = None
+    for index in range(len(steps) - 1, -1, -1):
+        if SNAPSHOT_RE.search(_observation(steps[index][1])[0]):
+            latest_snapshot = index
+            break
+
+    def summarise(index: int, brief: bool = False) -> Tuple[Any, Any]:
+        action, observation = steps[index]
+        return action, summarise_step(action.tool, action.tool_input, observation, brief)
+
+    # Without any snapshot nothing is superseded and only the budget applies
+    anchor = -1 if latest_snapshot is None else latest_snapshot
+    compacted = [summarise(i) if i < anchor else step for i, step in enumerate(steps)]
+    used = sum(_tokens(o) + _tokens(a.tool_input) for a, o in compacted)
+
+    # Over budget: shorten older summaries, then summarise outputs after the latest snapshot
+    candidates = [(i, True) for i in range(max(anchor, 0))]
+    candidates += [(i, False) for i in range(anchor + 1, len(steps) - 1)]
+    for index, brief in candidates:
+        if used <= token_budget:
+            break
+        replacement = summarise(index, brief)
+        used += _tokens(replacement[1]) - _tokens(compacted[index][1])
+        compacted[index] = replacement
+    return compacted
+
+
+class ScratchpadCompactor:
+    """Agent message formatter that compacts tool observations before they are turned into messages."""
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+
+    def __call__(self, intermediate_steps: Sequence[Tuple[Any, Any]]) -> List[Any]:
+        from langchain.agents.format_scratchpad.tools import format_to_tool_messages
+
+        started = time.perf_counter()
+        compacted = compact_steps(intermediate_steps, self.token_budget)
+        summarised = sum(1 for (_, new), (_, old) in zip(compacted, intermediate_steps) if new is not old)
+        if summarised:
+            add_span(
+                "scratchpad_compaction", time.perf_counter() - started,
+                steps=len(compacted), summarised=summarised,
+                tokens_before=sum(_tokens(o) for _, o in intermediate_steps),
+                tokens_after=sum(_tokens(o) for _, o in compacted),
+            )
+        return format_to_tool_messages(compacted)
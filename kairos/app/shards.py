@@ -0,0 +1,43 @@
+import asyncio
+import math
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+def split_test_plan(test_plan: List[Dict], shard_count: int, shard_size: Optional[int] = None) -> List[List[Dict]]:
+    """Split a test plan into contiguous shards.
+
+    ``shard_size`` fixes the number of features per shard (1 = one feature per
+    shard); otherwise the plan is spread evenly over ``shard_count`` shards.
+    """
+    if not test_plan:
+        return []
+    if not shard_size:
+        shard_size = math.ceil(len(test_plan) / max(1, shard_count))
+    return [test_plan[i:i + shard_size] for i in range(0, len(test_plan), shard_size)]
+
+
+class ShardExecutor:
+    """Run shards as tasks on the caller's event loop with bounded concurrency."""
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def _run_one(self, worker: Callable[[List[Dict], int], Awaitable[Any]], shard: List[Dict], index: int):
+        async with self._semaphore:
+            return await worker(shard, index)
+
+    def submit(self, worker: Callable[[List[Dict], int], Awaitable[Any]], shard: List[Dict], index: int) -> asyncio.Task:
+        """Start ``worker(shard, index)`` as a task now; it waits for a free slot before running"""
+        return asyncio.create_task(self._run_one(worker, shard, index))
+
+    async def run(self, shards: List[List[Dict]], worker: Callable[[List[Dict], int], Awaitable[Any]]) -> List[Any]:
+        """Run ``worker(shard, index)`` for every shard, preserving shard order in the results"""
+        tasks = [self.submit(worker, shard, index) for index, shard in enumerate(shards)]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
@@ -0,0 +1,129 @@
+"""
+Accessibility-snapshot delta encoding for Playwright MCP tool outputs.
+
+Every Playwright MCP action returns the full page snapshot, so consecutive agent
+turns mostly resend the same tree. SnapshotDiffer remembers the previous
+snapshot of one browser session and rewrites later snapshots as a structural
+diff of added, removed and changed nodes. Navigation (or an explicit
+browser_snapshot call) always gets the full snapshot.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configuration constants
+MAX_DIFF_RATIO = 0.6  # send the full snapshot when the diff touches more than this share of nodes
+
+# Tools whose output always carries a full snapshot
+FULL_REFRESH_TOOLS = {
+    "browser_navigate", "browser_navigate_back", "browser_navigate_forward",
+    "browser_tab_select", "browser_tab_new", "browser_tab_close", "browser_snapshot",
+}
+
+SNAPSHOT_RE = re.compile(r"(- Page Snapshot:?[^\n]*\n```yaml\n)(.*?)(\n```)", re.DOTALL)
+URL_RE = re.compile(r"- Page URL: (\S+)")
+REF_RE = re.compile(r"\[ref=([^\]]+)\]")
+
+Node = Tuple[str, str, str]  # (key, parent key, line without indentation)
+
+
+def parse_snapshot(snapshot: str) -> Dict[str, Node]:
+    """Index snapshot lines by node identity: their ``ref`` when present, else parent + content."""
+    nodes: Dict[str, Node] = {}
+    stack: List[Tuple[int, str]] = []  # (indent, key)
+    seen: Dict[str, int] = {}
+    for raw in snapshot.splitlines():
+        if not raw.strip():
+            continue
+        indent = len(raw) - len(raw.lstrip())
+        line = raw.strip()
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1] if stack else ""
+
+        ref = REF_RE.search(line)
+        if ref:
+            key = ref.group(1)
+        else:
+            base = f"{parent}/{line}"
+            seen[base] = seen.get(base, 0) + 1
+            key = f"{base}#{seen[base]}"
+        nodes[key] = (key, parent, line)
+        stack.append((indent, key))
+    return nodes
+
+
+def _label(nodes: Dict[str, Node], key: str) -> str:
+    return f"[ref={key}]" if key in nodes and REF_RE.search(nodes[key][2]) else "root"
+
+
+def _content(line: str) -> str:
+    return line[2:] if line.startswith("- ") else line
+
+
+def diff_snapshots(old: Dict[str, Node], new: Dict[str, Node]) -> List[str]:
+    lines = []
+    for key, (_, parent, line) in new.items():
+        if key not in old:
+            lines.append(f"+ under {_label(new, parent) if parent else 'root'}: {_content(line)}")
+        elif old[key][2] != line:
+            lines.append(f"~ {_content(line)}  (was: {_content(old[key][2])})")
+    for key, (_, parent, line) in old.items():
+        if key not in new:
+            lines.append(f"- {_content(line)}")
+    return lines
+
+
+class SnapshotDiffer:
+    """Remembers the previous snapshot of one browser session and encodes new ones as diffs."""
+
+    def __init__(self):
+        self._url: Optional[str] = None
+        self._nodes: Optional[Dict[str, Node]] = None
+
+    def reset(self):
+        """Forget the previous snapshot so the next output is sent in full."""
+        self._url = None
+        self._nodes = None
+
+    def encode_text(self, text: str, full: bool = False) -> str:
+        match = SNAPSHOT_RE.search(text)
+        if not match:
+            return text
+
+        url_match = URL_RE.search(text)
+        url = url_match.group(1) if url_match else self._url
+        nodes = parse_snapshot(match.group(2))
+        previous, previous_url = self._nodes, self._url
+        self._nodes, self._url = nodes, url
+
+        if full or previous is None or url != previous_url:
+            return text
+
+        changes = diff_snapshots(previous, nodes)
+        if len(changes) > MAX_DIFF_RATIO * max(len(nodes), 1):
+            return text
+
+        body = "\n".join(changes) if changes else "(no changes since previous snapshot)"
+        replacement = (
+            "- Page Snapshot (diff vs previous snapshot; + added, - removed, ~ changed, "
+            f"unchanged nodes omitted):\n```diff\n{body}\n```"
+        )
+        return text[:match.start()] + replacement + text[match.end():]
+
+    def encode(self, output: Any, tool_name: str) -> Any:
+        """Delta-encode every text block of a normalised MCP tool result."""
+        full = tool_name in FULL_REFRESH_TOOLS
+        if isinstance(output, str):
+            return self.encode_text(output, full)
+        if isinstance(output, dict):
+            content = output.get("content")
+            if isinstance(content, list):
+                output = {**output, "content": [self._encode_block(block, full) for block in content]}
+        return output
+
+    def _encode_block(self, block: Any, full: bool) -> Any:
+        if isinstance(block, str):
+            return self.encode_text(block, full)
+        if isinstance(block, dict) and isinstance(block.get("text"), str):
+            return {**block, "text": self.encode_text(block["text"], full)}
+        return block
@@ -0,0 +1,251 @@
+"""
+Per-stage tracing for evaluations and the Prometheus histograms behind ``/metrics``.
+
+Stages wrap themselves in ``span(name, **attributes)``. Finished spans are
+appended to the ``Trace`` of the evaluation running in the current context
+(so they end up on ``EvaluationResult.spans``) and are always observed into
+the process-wide ``metrics`` registry, whether or not a trace is bound.
+"""
+import bisect
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Configuration constants
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKEN_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 200000)
+
+# Spans of LLM requests; with a ``stage`` attribute they are also reported per model stage
+LLM_SPANS = ("llm_call", "llm_turn")
+TOKEN_KINDS = ("input_tokens", "output_tokens", "cache_read_input_tokens")
+
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed stage of an evaluation."""
+
+    def __init__(self, name: str, parent_id: Optional[int] = None, **attributes: Any):
+        self.id = next(_span_ids)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes: Dict[str, Any] = attributes
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+
+    def finish(self, duration: Optional[float] = None):
+        self.duration = duration if duration is not None else time.perf_counter() - self._start_perf
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans recorded for one evaluation, in the order they finished."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def add(self, span: Span):
+        self.spans.append(span)
+
+    def as_list(self) -> List[Dict[str, Any]]:
+        return [s.as_dict() for s in sorted(self.spans, key=lambda s: s.start)]
+
+    def stage_usage(self) -> Dict[str, Dict[str, Any]]:
+        """LLM requests per model stage: the models used, request count, seconds and tokens."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for s in self.spans:
+            stage = s.attributes.get("stage")
+            if s.name not in LLM_SPANS or not stage:
+                continue
+            entry = stages.setdefault(stage, {"models": [], "requests": 0, "seconds": 0.0, **{k: 0 for k in TOKEN_KINDS}})
+            model = s.attributes.get("model")
+            if model and model not in entry["models"]:
+                entry["models"].append(model)
+            entry["requests"] += 1
+            entry["seconds"] = round(entry["seconds"] + (s.duration or 0), 3)
+            for kind in TOKEN_KINDS:
+                entry[kind] += s.attributes.get(kind, 0) or 0
+        return stages
+
+
+class Histogram:
+    """Cumulative Prometheus histogram with one series per label set."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...], label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.label_names = label_names
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = tuple(_label_value(labels.get(n, "")) for n in self.label_names)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total) in sorted(self._series.items()):
+            labels = [f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key)]
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_number(bound)
+                bucket_labels = ",".join([*labels, 'le="%s"' % le])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_format_number(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metric store rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = Histogram(
+            "kairos_stage_duration_seconds", "Duration of evaluation stages.", DURATION_BUCKETS, ("stage",)
+        )
+        self.tool_seconds = Histogram(
+            "kairos_tool_call_duration_seconds", "Latency of MCP tool calls.", DURATION_BUCKETS, ("tool", "success")
+        )
+        self.tool_output_bytes = Histogram(
+            "kairos_tool_output_bytes", "Size of MCP tool outputs sent to the model.", SIZE_BUCKETS, ("tool",)
+        )
+        self.llm_tokens = Histogram(
+            "kairos_llm_tokens", "Tokens per LLM request.", TOKEN_BUCKETS, ("stage", "kind")
+        )
+        self.llm_stage_seconds = Histogram(
+            "kairos_llm_stage_duration_seconds", "Latency of LLM requests per model stage and model.",
+            DURATION_BUCKETS, ("stage", "model"),
+        )
+        self.llm_stage_tokens = Histogram(
+            "kairos_llm_stage_tokens", "Tokens per LLM request per model stage and model.",
+            TOKEN_BUCKETS, ("stage", "model", "kind"),
+        )
+        self.evaluation_seconds = Histogram(
+            "kairos_evaluation_duration_seconds", "End-to-end evaluation time.", DURATION_BUCKETS,
+            ("evaluation_type", "success"),
+        )
+
+    def observe_span(self, span: Span):
+        with self._lock:
+            self.stage_seconds.observe(span.duration or 0, stage=span.name)
+            attrs = span.attributes
+            if span.name == "tool_call":
+                self.tool_seconds.observe(span.duration or 0, tool=attrs.get("tool"), success=span.error is None)
+                if "output_chars" in attrs:
+                    self.tool_output_bytes.observe(attrs["output_chars"], tool=attrs.get("tool"))
+            for kind in TOKEN_KINDS:
+                if kind in attrs:
+                    self.llm_tokens.observe(attrs[kind], stage=span.name, kind=kind)
+            if span.name in LLM_SPANS and attrs.get("stage"):
+                labels = {"stage": attrs["stage"], "model": attrs.get("model", "")}
+                self.llm_stage_seconds.observe(span.duration or 0, **labels)
+                for kind in TOKEN_KINDS:
+                    if kind in attrs:
+                        self.llm_stage_tokens.observe(attrs[kind], kind=kind, **labels)
+
+    def observe_evaluation(self, evaluation_type: str, success: bool, seconds: float):
+        with self._lock:
+            self.evaluation_seconds.observe(seconds, evaluation_type=evaluation_type, success=success)
+
+    def render(self) -> str:
+        with self._lock:
+            histograms = [self.stage_seconds, self.tool_seconds, self.tool_output_bytes,
+                          self.llm_tokens, self.llm_stage_seconds, self.llm_stage_tokens, self.evaluation_seconds]
+            lines = [line for h in histograms for line in h.render()]
+        return "\n".join(lines) + "\n"
+
+
+def _label_value(value: Any) -> str:
+    return str(value).lower() if isinstance(value, bool) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+metrics = MetricsRegistry()
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("kairos_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("kairos_span", default=None)
+
+
+def current_trace() -> Trace:
+    """Trace of the evaluation running in this context (a throwaway one outside evaluations)."""
+    return _current_trace.get() or Trace()
+
+
+@contextmanager
+def track_trace() -> Iterator[Trace]:
+    """Collect spans for everything awaited inside the block, including child tasks."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def record_span(span: Span):
+    """Attach a finished span to the current trace and the metrics registry."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(span)
+    metrics.observe_span(span)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the block as a stage; nested spans (also in child tasks) record it as their parent."""
+    parent = _current_span.get()
+    current = Span(name, parent.id if parent else None, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+        record_span(current)
+
+
+def add_span(name: str, duration: float, **attributes: Any) -> Span:
+    """Record a stage timed elsewhere (e.g. by a callback) under the current span."""
+    parent = _current_span.get()
+    finished = Span(name, parent.id if parent else None, **attributes)
+    finished.start -= duration
+    finished.finish(duration)
+    record_span(finished)
+    return finished
@@ -0,0 +1,297 @@
+"""
+Record-and-replay of per-feature Playwright MCP tool-call trajectories.
+
+While a feature is verified by the agent, every successful tool call is
+recorded together with what made it meaningful: the element it targeted
+(role and name, since snapshot refs are not stable across builds) and the
+snapshot lines the call added or changed, i.e. the effects the agent checked
+its assertions against. The trajectory and the agent's verdict are stored
+per app and feature.
+
+Replay runs the recorded steps straight through ``MCPToolManager``, remapping
+refs by element identity. If every step reproduces its recorded effects the
+recorded verdict stands; at the first step that does not, replay stops and
+reports where it diverged so the agent can take over from that point.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from .mcp_node import MCPToolManager
+from .snapshots import REF_RE, SNAPSHOT_RE
+
+# Configuration constants
+DEFAULT_STORE_DIR = os.path.join(os.getenv("KAIROS_CACHE_DIR", ".kairos_cache"), "trajectories")
+MAX_EFFECTS_PER_STEP = 40
+# Tools that replace the whole page; their effects are not compared, later targets are
+NAVIGATION_TOOLS = {"browser_navigate", "browser_navigate_back", "browser_navigate_forward", "browser_tabs",
+                    "browser_tab_new", "browser_tab_select", "browser_tab_close"}
+# Tools whose output is compared verbatim on replay (no page snapshot to compare against)
+VERBATIM_TOOLS = {"browser_evaluate"}
+# Tools that do not change the page and are skipped on replay
+SKIPPED_TOOLS = {"browser_take_screenshot", "browser_console_messages", "browser_network_requests",
+                 "browser_install", "browser_close"}
+
+ATTRIBUTE_RE = re.compile(r"\s*\[(?:ref|cursor)=[^\]]*\]")
+
+Element = Tuple[str, int]  # (identity line, occurrence among identical lines)
+
+
+def output_text(output: Any) -> str:
+    """Join the text blocks of a normalised MCP tool result."""
+    if isinstance(output, str):
+        return output
+    if isinstance(output, dict):
+        content = output.get("content")
+        if isinstance(content, list):
+            return "\n".join(
+                b if isinstance(b, str) else b.get("text", "") for b in content if isinstance(b, (str, dict))
+            )
+    return json.dumps(output, default=str, sort_keys=True)
+
+
+def element_key(line: str) -> str:
+    """Identity of a snapshot line: role, name and state without refs or cursor hints."""
+    line = ATTRIBUTE_RE.sub("", line.strip())
+    if line.startswith("- "):
+        line = line[2:]
+    return line.rstrip(":").strip()
+
+
+def snapshot_elements(text: str) -> Optional[Dict[str, Element]]:
+    """Map ``ref`` -> element identity for the page snapshot in ``text`` (None without a snapshot)."""
+    match = SNAPSHOT_RE.search(text)
+    if not match:
+        return None
+    elements: Dict[str, Element] = {}
+    seen: Dict[str, int] = {}
+    for raw in match.group(2).splitlines():
+        if not raw.strip():
+            continue
+        key = element_key(raw)
+        seen[key] = seen.get(key, 0) + 1
+        ref = REF_RE.search(raw)
+        elements[ref.group(1) if ref else f"_{len(elements)}"] = (key, seen[key])
+    return elements
+
+
+def _effects(before: Optional[Dict[str, Element]], after: Dict[str, Element]) -> List[str]:
+    """Element lines present after a step but not before it."""
+    previous = set(before.values()) if before else set()
+    added = [key for key, n in after.values() if (key, n) not in previous]
+    return added[:MAX_EFFECTS_PER_STEP]
+
+
+def _find_ref(elements: Dict[str, Element], target: Element) -> Optional[str]:
+    for ref, element in elements.items():
+        if element == target and not ref.startswith("_"):
+            return ref
+    return None
+
+
+class TrajectoryRecorder:
+    """Collects the tool calls of one feature run."""
+
+    def __init__(self):
+        self.steps: List[Dict[str, Any]] = []
+        self.snapshot: Optional[Dict[str, Element]] = None  # latest page snapshot seen
+
+    def record(self, tool: str, arguments: Dict[str, Any], output: Any) -> Optional[Dict[str, Element]]:
+        """Append a step; returns the page snapshot in its output, if any."""
+        text = output_text(output)
+        step: Dict[str, Any] = {"tool": tool, "arguments": arguments}
+
+        ref = arguments.get("ref")
+        if ref and self.snapshot and ref in self.snapshot:
+            step["target"] = list(self.snapshot[ref])
+
+        elements = snapshot_elements(text)
+        if elements is not None:
+            if tool not in NAVIGATION_TOOLS:
+                step["effects"] = _effects(self.snapshot, elements)
+            self.snapshot = elements
+        elif tool in VERBATIM_TOOLS:
+            step["output_digest"] = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.steps.append(step)
+        return elements
+
+
+_current_recorder: ContextVar[Optional[TrajectoryRecorder]] = ContextVar("kairos_trajectory_recorder", default=None)
+
+
+def current_recorder() -> Optional[TrajectoryRecorder]:
+    return _current_recorder.get()
+
+
+@contextmanager
+def record_trajectory(recorder: Optional[TrajectoryRecorder] = None):
+    """Record the tool calls made inside the block (including child tasks)."""
+    recorder = recorder or TrajectoryRecorder()
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+
+
+class ReplayOutcome:
+    """Result of replaying one trajectory.
+
+    ``recorder`` holds the steps as they ran against the current build, so the
+    agent can continue recording from the point of divergence.
+    """
+
+    def __init__(self, completed: bool, recorder: TrajectoryRecorder, reason: str = ""):
+        self.completed = completed
+        self.recorder = recorder
+        self.reason = reason
+
+    @property
+    def executed(self) -> int:
+        return len(self.recorder.steps)
+
+
+def _remap_url(value: Any, recorded_url: str, app_url: str) -> Any:
+    if isinstance(value, str) and recorded_url and value.startswith(recorded_url):
+        return app_url + value[len(recorded_url):]
+    return value
+
+
+def _plain_output(out: Any) -> Any:
+    """Raw CallToolResult -> {"content": [text, ...]}, the shape recording sees after normalisation."""
+    content = getattr(out, "content", None)
+    if content is None:
+        return out
+    return {"content": [getattr(block, "text", "") for block in content]}
+
+
+async def replay_trajectory(trajectory: Dict[str, Any], manager: MCPToolManager, app_url: str) -> ReplayOutcome:
+    """Execute recorded steps through ``manager`` until they finish or diverge."""
+    recorded_url = trajectory.get("app_url", "")
+    recorder = TrajectoryRecorder()
+
+    for index, step in enumerate(trajectory["steps"]):
+        tool = step["tool"]
+        if tool in SKIPPED_TOOLS:
+            continue
+        if tool not in manager.tool_to_server:
+            # Recorded against a different tool set (backend or server version): let the agent take over
+            return ReplayOutcome(False, recorder, f"step {index + 1} ({tool}): tool not available in this session")
+        arguments = {k: _remap_url(v, recorded_url, app_url) for k, v in step["arguments"].items()}
+
+        if "target" in step:
+            target = tuple(step["target"])
+            ref = _find_ref(recorder.snapshot or {}, target)
+            if ref is None:
+                return ReplayOutcome(False, recorder, f"step {index + 1} ({tool}): element '{target[0]}' not found")
+            arguments["ref"] = ref
+
+        success, out = await manager.call_tool(tool, arguments)
+        if not success:
+            return ReplayOutcome(False, recorder, f"step {index + 1} ({tool}) failed: {out['error']}")
+
+        elements = recorder.record(tool, arguments, _plain_output(out))
+        if elements is not None:
+            present = {key for key, _ in elements.values()}
+            missing = [e for e in step.get("effects", []) if e not in present]
+            if missing:
+                return ReplayOutcome(False, recorder, f"step {index + 1} ({tool}): expected '{missing[0]}' after the step")
+        elif "output_digest" in step and recorder.steps[-1].get("output_digest") != step["output_digest"]:
+            return ReplayOutcome(False, recorder, f"step {index + 1} ({tool}): output changed")
+
+    return ReplayOutcome(True, recorder)
+
+
+def describe_steps(steps: List[Dict[str, Any]]) -> str:
+    """Human-readable list of already executed steps, for the agent prompt."""
+    lines = []
+    for i, step in enumerate(steps, 1):
+        target = f" on '{step['target'][0]}'" if step.get("target") else ""
+        args = {k: v for k, v in step["arguments"].items() if k not in ("ref", "element")}
+        lines.append(f"{i}. {step['tool']}{target} {json.dumps(args) if args else ''}".rstrip())
+    return "\n".join(lines)
+
+
+def _check_entry(entry: Dict[str, Any]):
+    """Raise if a stored entry is not a replayable trajectory."""
+    if not isinstance(entry["verdict"], dict):
+        raise TypeError(f"verdict is a {type(entry['verdict']).__name__}")
+    if not isinstance(entry["steps"], list):
+        raise TypeError(f"steps is a {type(entry['steps']).__name__}")
+    for step in entry["steps"]:
+        if not isinstance(step["tool"], str) or not isinstance(step["arguments"], dict):
+            raise TypeError("step without a tool name or arguments")
+
+
+class TrajectoryStore:
+    """On-disk store of recorded trajectories, one JSON file per app and feature."""
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(app_id: str, feature: str) -> str:
+        payload = json.dumps({"app_id": app_id, "feature": " ".join(feature.lower().split())}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}.json")
+
+    def get(self, app_id: str, feature: str) -> Optional[Dict[str, Any]]:
+        path = self._path(self.make_key(app_id, feature))
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            _check_entry(entry)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError, OSError):
+            # Corrupt or foreign entry: drop it so the agent verifies the feature afresh
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return entry
+
+    def put(self, app_id: str, feature: str, app_url: str, steps: List[Dict[str, Any]], verdict: Dict[str, Any]):
+        entry = {
+            "app_id": app_id,
+            "feature": feature,
+            "app_url": app_url,
+            "recorded_at": time.time(),
+            "verdict": {"status": verdict.get("status"), "reason": verdict.get("reason")},
+            "steps": steps,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(self.make_key(app_id, feature)))
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len([n for n in os.listdir(self.store_dir) if n.endswith(".json")])}
+
+
+_trajectory_store: Optional[TrajectoryStore] = None
+
+
+def get_trajectory_store() -> TrajectoryStore:
+    """Return the process-wide trajectory store."""
+    global _trajectory_store
+    if _trajectory_store is None:
+        _trajectory_store = TrajectoryStore()
+    return _trajectory_store
@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+
+class TokenUsage:
+    """Token counters for one evaluation, including prompt-cache reads and writes."""
+
+    def __init__(self):
+        self.requests = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_input_tokens = 0
+        self.cache_creation_input_tokens = 0
+
+    def add(self, input_tokens: int = 0, output_tokens: int = 0,
+            cache_read_input_tokens: int = 0, cache_creation_input_tokens: int = 0):
+        self.requests += 1
+        self.input_tokens += input_tokens or 0
+        self.output_tokens += output_tokens or 0
+        self.cache_read_input_tokens += cache_read_input_tokens or 0
+        self.cache_creation_input_tokens += cache_creation_input_tokens or 0
+
+    def add_anthropic_usage(self, usage: Any):
+        """Record an ``anthropic.types.Usage`` (uncached input tokens are reported separately)."""
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self.add(
+            input_tokens=(getattr(usage, "input_tokens", 0) or 0) + cache_read + cache_creation,
+            output_tokens=getattr(usage, "output_tokens", 0) or 0,
+            cache_read_input_tokens=cache_read,
+            cache_creation_input_tokens=cache_creation,
+        )
+
+    def add_usage_metadata(self, usage_metadata: Dict[str, Any]):
+        """Record LangChain ``UsageMetadata`` (input tokens already include cached tokens)."""
+        details = usage_metadata.get("input_token_details") or {}
+        self.add(
+            input_tokens=usage_metadata.get("input_tokens", 0),
+            output_tokens=usage_metadata.get("output_tokens", 0),
+            cache_read_input_tokens=details.get("cache_read", 0),
+            cache_creation_input_tokens=details.get("cache_creation", 0),
+        )
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_input_tokens": self.cache_read_input_tokens,
+            "cache_creation_input_tokens": self.cache_creation_input_tokens,
+        }
+
+
+_current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("kairos_token_usage", default=None)
+
+
+def current_usage() -> TokenUsage:
+    """Usage counters of the evaluation running in this context (a throwaway one outside evaluations)."""
+    return _current_usage.get() or TokenUsage()
+
+
+@contextmanager
+def track_usage():
+    """Collect token usage for everything awaited inside the block, including child tasks."""
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
@@ -1,9 +1,21 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 from kairos.app.models import UserInput, EvaluationResult, EvaluationType, LLMProvider
+from kairos.app.html_reducer import DEFAULT_REDUCTION_LEVEL
 from kairos.app.providers import create_llm_client
 from kairos.app.evaluator import Evaluator
+from kairos.app.mcp_node import DEFAULT_CONFIG_PATH
+from kairos.app.mcp_pool import get_session_pool, close_session_pools
+from kairos.app.plan_cache import get_plan_cache
+from kairos.app.jobs import JobQueue
+from kairos.app.browser import close_shared_browser
+from kairos.app.tracing import metrics
 
 app = FastAPI(title="MCP Evaluator API", description="Web Application Evaluation API using MCP tools")
 
@@ -13,6 +25,51 @@ class EvalReq(BaseModel):
     url: str
     provider: LLMProvider = LLMProvider.CLAUDE_VERTEX
     temperature: float = 0.1
+    shard_size: Optional[int] = Field(None, ge=1)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    use_plan_cache: bool = True
+    html_reduction_level: int = Field(DEFAULT_REDUCTION_LEVEL, ge=0, le=3)
+    app_id: Optional[str] = None
+    record_trajectories: bool = False
+    replay: bool = False
+    compiled_plans: bool = False
+    incremental: bool = False
+    stream_plan: bool = False
+    parallel_rubrics: bool = False
+    use_capture: bool = False
+    planning_model: Optional[str] = None
+    navigation_model: Optional[str] = None
+    judgment_model: Optional[str] = None
+
+class BatchItemReq(EvalReq):
+    type: EvaluationType = EvaluationType.FEATURE_CORRECTNESS
+
+class BatchReq(BaseModel):
+    items: List[BatchItemReq] = Field(..., min_length=1)
+    priority: int = 0  # higher runs first
+
+def to_user_input(req: EvalReq, evaluation_type: EvaluationType) -> UserInput:
+    """Map a request body onto the evaluator's input; every EvalReq field except url has a UserInput namesake"""
+    return UserInput(app_url=req.url, evaluation_type=evaluation_type, **req.model_dump(exclude={"url", "type"}))
+
+async def run_user_input(user_input: UserInput) -> EvaluationResult:
+    llm_client = create_llm_client(user_input)
+    evaluator = Evaluator(llm_client)
+    return await evaluator.evaluate(user_input)
+
+job_queue = JobQueue(run_user_input)
+
+@app.on_event("startup")
+async def startup():
+    """Start batch workers"""
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop batch workers, close warm MCP sessions and the shared local browser"""
+    await job_queue.stop()
+    await close_session_pools()
+    await close_shared_browser()
 
 @app.get("/")
 def root():
@@ -27,55 +84,135 @@ async def feature_test(req: EvalReq):
     """Legacy endpoint for feature correctness evaluation"""
     try:
         # Convert legacy request to UserInput
-        user_input = UserInput(
-            user_query=req.user_query,
-            app_url=req.url,
-            evaluation_type=EvaluationType.FEATURE_CORRECTNESS,
-            provider=req.provider or LLMProvider.CLAUDE_VERTEX,
-            temperature=req.temperature
-        )
+        user_input = to_user_input(req, EvaluationType.FEATURE_CORRECTNESS)
         
-        llm_client = create_llm_client(user_input)
-        evaluator = Evaluator(llm_client)
-        result = await evaluator.evaluate(user_input)
+        result = await run_user_input(user_input)
         
         return {"result": result.model_dump()}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Feature test failed: {str(e)}")
 
+@app.post("/evaluation/feature-test/stream")
+async def feature_test_stream(req: EvalReq):
+    """Feature correctness evaluation streamed as server-sent events.
+
+    Emits test_plan_ready, shard_started, tool_call, tool_result, feature_verdict,
+    shard_finished and finally summary (or error) as they happen.
+    """
+    user_input = to_user_input(req, EvaluationType.FEATURE_CORRECTNESS)
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def on_event(event: Dict[str, Any]):
+        await events.put(event)
+
+    async def run():
+        try:
+            llm_client = create_llm_client(user_input)
+            await Evaluator(llm_client).evaluate(user_input, on_event=on_event)
+        except Exception as e:
+            await events.put({"event": "error", "detail": f"Feature test failed: {str(e)}"})
+        finally:
+            await events.put(None)
+
+    async def stream():
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            # Client went away: stop the evaluation instead of letting it run unobserved
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
 @app.post("/evaluation/qualitative")  # Legacy endpoint - qualitative-only
 async def qualitative(req: EvalReq):
     """Legacy endpoint for qualitative evaluation"""
     try:
         # Convert legacy request to UserInput
-        user_input = UserInput(
-            user_query=req.user_query,
-            app_url=req.url,
-            evaluation_type=EvaluationType.QUALITATIVE,
-            provider=req.provider or LLMProvider.CLAUDE_VERTEX,
-            temperature=req.temperature
-        )
-
-        llm_client = create_llm_client(user_input)
-        evaluator = Evaluator(llm_client)
-        result = await evaluator.evaluate(user_input)
+        user_input = to_user_input(req, EvaluationType.QUALITATIVE)
+
+        result = await run_user_input(user_input)
         
         return {"result": result.qualitative_feedback or result.error_message}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Qualitative evaluation failed: {str(e)}")
 
+@app.post("/evaluation/batch")
+async def submit_batch(req: BatchReq):
+    """Queue many evaluations and return a job id immediately"""
+    items = [
+        to_user_input(item, item.type)
+        for item in req.items
+    ]
+    job = job_queue.submit(items, priority=req.priority)
+    return job.summary()
+
+@app.get("/evaluation/batch")
+async def list_batches():
+    """List batch jobs, newest first"""
+    return {"jobs": [job.summary() for job in job_queue.list()]}
+
+@app.get("/evaluation/batch/{job_id}")
+async def batch_status(job_id: str):
+    """Status of a batch job and each of its items"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    summary = job.summary()
+    summary["items"] = [
+        {"index": i, "url": item.app_url, "status": status}
+        for i, (item, status) in enumerate(zip(job.items, job.item_status))
+    ]
+    return summary
+
+@app.get("/evaluation/batch/{job_id}/results")
+async def batch_results(job_id: str):
+    """Per-item results of a batch job (null for items still queued or running)"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    return {"job_id": job.id, "status": job.status, "items": job.item_results()}
+
+@app.delete("/evaluation/batch/{job_id}")
+async def delete_batch(job_id: str):
+    """Drop a finished batch job and its results"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Batch job {job_id} not found")
+    if not job_queue.delete(job_id):
+        raise HTTPException(status_code=409, detail=f"Batch job {job_id} is still {job.status.value}")
+    return {"job_id": job_id, "deleted": True}
+
+def mcp_pool_stats() -> Dict[str, Any]:
+    """Session pool stats, or why they are unavailable (e.g. the Playwright config cannot be read)"""
+    try:
+        return get_session_pool(DEFAULT_CONFIG_PATH).stats()
+    except Exception as e:
+        return {"available": False, "error": str(e)}
+
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
         "service": "MCP Evaluator API",
-        "version": "1.0"
+        "version": "1.0",
+        "mcp_pool": mcp_pool_stats(),
+        "test_plan_cache": get_plan_cache().stats(),
+        "batch_queue": job_queue.stats()
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage latency, tool output size and token histograms in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 def main():
     """Main entry point for running the server"""
     import uvicorn
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# The Vertex settings and cache directory are read when kairos is imported
+os.environ.setdefault("MODEL_NAME", "claude-test")
+os.environ.setdefault("LOCATION", "us-east5")
+os.environ.setdefault("PROJECT_ID", "kairos-test")
+os.environ.setdefault("KAIROS_CACHE_DIR", tempfile.mkdtemp(prefix="kairos-test-cache-"))
@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+import pytest
+
+from benchmarks.samples import SAMPLE_ABOUT, SAMPLE_APP, serve_sample_app
+from kairos.app.browser import close_shared_browser, get_shared_browser
+from kairos.app.capture import CaptureStore
+
+PROMO_LINK = b'<a href="/promo">Promo</a></nav>'
+PROMO_PAGE = b"<!doctype html><html><head><title>Promo</title></head><body><h1>Spring sale</h1></body></html>"
+
+
+def test_crawl_survives_paths_that_no_longer_replay(tmp_path):
+    """A branch whose click path stops replaying is skipped; the rest of the capture is kept"""
+    promo_seen = []
+
+    # A one-off promo: the start page links it until it has been opened once
+    def start_page() -> bytes:
+        return SAMPLE_APP if promo_seen else SAMPLE_APP.replace(b"</nav>", PROMO_LINK)
+
+    def promo_page() -> bytes:
+        promo_seen.append(True)
+        return PROMO_PAGE
+
+    server = serve_sample_app({"/": start_page, "/about": SAMPLE_ABOUT, "/promo": promo_page})
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    store = CaptureStore(str(tmp_path))
+
+    async def run():
+        try:
+            async with get_shared_browser().context():
+                pass
+        except Exception as e:
+            return None, e
+        try:
+            return await store.get_or_capture("sample", url, "<html>build 1</html>"), None
+        finally:
+            await close_shared_browser()
+
+    try:
+        capture, unavailable = asyncio.run(run())
+    finally:
+        server.shutdown()
+    if unavailable is not None:
+        pytest.skip(f"no local Chromium: {unavailable}")
+
+    titles = [state["title"] for state in capture.states]
+    assert titles[0] == "Bench Todo"
+    assert "About Bench Todo" in titles
+    assert "Promo" in titles  # recorded before its path stopped replaying
+    assert len([t for t in titles if t == "About Bench Todo"]) >= 2  # the tabs were explored too
+    assert os.path.exists(os.path.join(capture.directory, "capture.json"))
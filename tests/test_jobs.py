@@ -0,0 +1,57 @@
+import asyncio
+
+from kairos.app.jobs import JobQueue
+from kairos.app.models import EvaluationResult, EvaluationType, LLMProvider, UserInput
+
+
+async def _succeed(user_input: UserInput) -> EvaluationResult:
+    return EvaluationResult(evaluation_type=user_input.evaluation_type, provider_used=LLMProvider.CLAUDE_VERTEX,
+                            success=True)
+
+
+def _item(index: int) -> UserInput:
+    return UserInput(user_query=f"query {index}", app_url=f"https://app-{index}.test",
+                     evaluation_type=EvaluationType.FEATURE_CORRECTNESS)
+
+
+def test_finished_jobs_are_evicted_by_count_and_age():
+    async def run():
+        queue = JobQueue(_succeed, workers=1, max_finished_jobs=2)
+        await queue.start()
+        try:
+            jobs = [queue.submit([_item(i)]) for i in range(3)]
+            await queue._queue.join()
+            # Only the two most recently finished jobs are kept
+            assert [job.id for job in queue.list()] == [jobs[2].id, jobs[1].id]
+
+            queue.retention_seconds = 0
+            assert queue.list() == []
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_delete_drops_only_finished_jobs():
+    async def run():
+        release = asyncio.Event()
+
+        async def wait_for_release(user_input: UserInput) -> EvaluationResult:
+            await release.wait()
+            return await _succeed(user_input)
+
+        queue = JobQueue(wait_for_release, workers=1)
+        await queue.start()
+        try:
+            job = queue.submit([_item(0)])
+            assert queue.delete(job.id) is None
+            assert queue.get(job.id) is job
+
+            release.set()
+            await queue._queue.join()
+            assert queue.delete(job.id) is job
+            assert queue.get(job.id) is None
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
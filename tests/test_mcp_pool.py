@@ -0,0 +1,28 @@
+import asyncio
+
+import yaml
+
+from benchmarks.bench_hot_paths import STUB_CONFIG
+from kairos.app.mcp_pool import MCPSessionPool
+
+
+def test_overflow_lease_does_not_wait_for_a_busy_pool(tmp_path):
+    config_path = tmp_path / "stub.config.yml"
+    config_path.write_text(yaml.safe_dump(STUB_CONFIG))
+
+    async def run():
+        pool = MCPSessionPool(str(config_path), size=1)
+        try:
+            async with pool.lease() as pooled:
+                async with asyncio.timeout(30):
+                    async with pool.lease(overflow=True) as extra:
+                        assert extra is not pooled
+                        assert pool.stats()["overflow"] == 1
+                        assert pool.busy == 1
+            # The temporary session is closed, the pooled one goes back to the pool
+            stats = pool.stats()
+            assert (stats["overflow"], stats["idle"], stats["busy"]) == (0, 1, 0)
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
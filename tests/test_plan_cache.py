@@ -0,0 +1,36 @@
+import json
+import os
+import time
+
+import pytest
+
+from kairos.app import plan_cache
+
+PLAN = [{"Test_feature": "Add todo", "Actions": "type a todo, click Add", "Assertions": "the todo is listed"}]
+
+
+@pytest.mark.parametrize("content", ['[{"Test_feature": "x"}]', '{"created_at": 1}', '{"test_plan": "oops"}', "{"])
+def test_malformed_entries_are_misses_and_removed(tmp_path, content):
+    cache = plan_cache.TestPlanCache(str(tmp_path))
+    path = tmp_path / "key.json"
+    path.write_text(content)
+
+    assert cache.get("key") is None
+    assert not path.exists()
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_age_is_time_since_last_use(tmp_path):
+    cache = plan_cache.TestPlanCache(str(tmp_path), max_age_seconds=60)
+    cache.put("key", PLAN)
+    path = tmp_path / "key.json"
+    # Written long ago but used recently: still fresh
+    entry = json.loads(path.read_text())
+    entry["created_at"] = time.time() - 3600
+    path.write_text(json.dumps(entry))
+    assert cache.get("key") == PLAN
+
+    stale = time.time() - 120
+    os.utime(path, (stale, stale))
+    assert cache.get("key") is None
+    assert not path.exists()
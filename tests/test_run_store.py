@@ -0,0 +1,39 @@
+from kairos.app.run_store import plan_incremental_run
+
+QUERY = "Test the todo app"
+PLAN = [
+    {"Test_feature": "Add todo", "Actions": "type a todo, click Add", "Assertions": "the todo is listed"},
+    {"Test_feature": "Clear completed", "Actions": "tick a todo, click Clear completed", "Assertions": "ticked todos are removed"},
+    {"Test_feature": "Toggle todo", "Actions": "tick a todo", "Assertions": "the todo is struck through"},
+]
+FILLER = "".join(f'<li class="item">Item {i}</li>' for i in range(12))
+PAGE = (
+    '<h1>Todos</h1><input id="new-todo" placeholder="What needs doing?"><button id="add">Add</button>'
+    f'<ul>{FILLER}</ul>'
+    '<button id="clear" class="btn" onclick="done()" aria-label="Clear list">{label}</button>'
+)
+
+
+def _stored_run():
+    return {
+        "user_query": QUERY,
+        "reduction_level": 1,
+        "prompt_version": "v1",
+        "html": PAGE.replace("{label}", "Clear completed"),
+        "test_plan": PLAN,
+        "verdicts": {f["Test_feature"].lower(): {"feature_name": f["Test_feature"], "status": "PASS"} for f in PLAN},
+    }
+
+
+def test_relabelled_button_reruns_only_its_feature():
+    html = PAGE.replace("{label}", "Clear finished")
+    incremental = plan_incremental_run(_stored_run(), QUERY, html, 1, "v1")
+
+    assert incremental is not None
+    assert [f["Test_feature"] for f in incremental.rerun] == ["Clear completed"]
+    assert sorted(v["feature_name"] for v in incremental.carried) == ["Add todo", "Toggle todo"]
+
+
+def test_new_unplanned_element_triggers_a_full_run():
+    html = PAGE.replace("{label}", "Clear completed") + '<button id="export">Export report</button>'
+    assert plan_incremental_run(_stored_run(), QUERY, html, 1, "v1") is None
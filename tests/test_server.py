@@ -0,0 +1,88 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+from anthropic.resources.messages import AsyncMessages
+
+from benchmarks.samples import serve_sample_app
+from kairos.app.models import EvaluationType
+from kairos import server
+from kairos.server import BatchItemReq, app, to_user_input
+
+PLAN_CALL_SECONDS = 0.5
+
+
+def test_concurrent_feature_tests_overlap_plan_generation(monkeypatch):
+    """Test-plan generation of one request must not block the event loop for the others"""
+    calls = []
+
+    async def create(self, **kwargs):
+        started = time.monotonic()
+        await asyncio.sleep(PLAN_CALL_SECONDS)
+        calls.append((started, time.monotonic()))
+        usage = SimpleNamespace(input_tokens=10, output_tokens=5, cache_read_input_tokens=0,
+                                cache_creation_input_tokens=0)
+        # An empty plan ends the evaluation before any browser session is needed
+        return SimpleNamespace(content=[SimpleNamespace(text="```json\n[]\n```")], usage=usage)
+
+    monkeypatch.setattr(AsyncMessages, "create", create)
+    server = serve_sample_app()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://kairos", timeout=30) as client:
+            return await asyncio.gather(*(
+                client.post("/evaluation/feature-test",
+                            json={"user_query": f"Test adding todos {i}", "url": url, "use_plan_cache": False})
+                for i in range(2)
+            ))
+
+    try:
+        responses = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    for response in responses:
+        assert response.status_code == 200
+        assert response.json()["result"]["success"], response.json()["result"]["error_message"]
+    assert len(calls) == 2
+    (first_start, first_end), (second_start, _) = sorted(calls)
+    assert second_start < first_end
+
+
+def test_request_fields_reach_user_input():
+    item = BatchItemReq(user_query="q", url="http://app", type=EvaluationType.QUALITATIVE,
+                        shard_size=2, max_concurrency=3, html_reduction_level=0, parallel_rubrics=True)
+    user_input = to_user_input(item, item.type)
+
+    assert user_input.app_url == "http://app"
+    assert user_input.evaluation_type == EvaluationType.QUALITATIVE
+    assert (user_input.shard_size, user_input.max_concurrency, user_input.html_reduction_level) == (2, 3, 0)
+    assert user_input.parallel_rubrics
+
+
+def _get_health():
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://kairos") as client:
+            return await client.get("/health")
+
+    return asyncio.run(run())
+
+
+def test_health_works_from_another_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    response = _get_health()
+
+    assert response.status_code == 200
+    assert response.json()["mcp_pool"]["size"] >= 1
+
+
+def test_health_reports_an_unreadable_pool_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "DEFAULT_CONFIG_PATH", str(tmp_path / "missing.yml"))
+    response = _get_health()
+
+    assert response.status_code == 200
+    assert response.json()["mcp_pool"]["available"] is False
@@ -0,0 +1,19 @@
+import gc
+import weakref
+
+from benchmarks.samples import load_tool_documentation
+from kairos.app.providers.claude_client import ClaudeClient
+from kairos.app.providers.tool_registry import ToolRegistry
+
+
+def test_shared_tools_and_agents_do_not_keep_the_client_alive():
+    registry = ToolRegistry()
+    client = ClaudeClient(model_name="claude-test", location="us-east5", project_id="kairos-test")
+    tools = registry.get_tools(load_tool_documentation(), client._wrap_mcp_tool)
+    agent = registry.get_agent(("key",), lambda: client._build_agent(tools, "system"))
+    assert tools and agent is not None
+
+    client_ref = weakref.ref(client)
+    del client
+    gc.collect()
+    assert client_ref() is None
@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+import pytest
+
+from kairos.app.trajectory import TrajectoryStore, replay_trajectory
+
+
+class FakeManager:
+    """Tool manager exposing only ``browser_snapshot``."""
+
+    def __init__(self):
+        self.tool_to_server = {"browser_snapshot": None}
+        self.calls = []
+
+    async def call_tool(self, tool_name, tool_args):
+        if tool_name not in self.tool_to_server:
+            raise ValueError(f"Tool '{tool_name}' not found in any registered server.")
+        self.calls.append(tool_name)
+        return True, {"content": ["### Page state\n- Page Snapshot:\n```yaml\n- button \"Add\" [ref=e1]\n```"]}
+
+
+@pytest.mark.parametrize("entry", [
+    {"app_id": "app", "feature": "Add todo", "verdict": {"status": "SUCCESS"}},
+    {"app_id": "app", "feature": "Add todo", "verdict": {"status": "SUCCESS"}, "steps": [{"arguments": {}}]},
+    {"app_id": "app", "feature": "Add todo", "verdict": "SUCCESS", "steps": []},
+])
+def test_malformed_trajectory_is_a_miss_and_removed(tmp_path, entry):
+    store = TrajectoryStore(str(tmp_path))
+    path = tmp_path / f"{store.make_key('app', 'Add todo')}.json"
+    path.write_text(json.dumps(entry))
+
+    assert store.get("app", "Add todo") is None
+    assert not path.exists()
+
+
+def test_unknown_tool_diverges_instead_of_failing():
+    trajectory = {
+        "app_url": "http://old",
+        "verdict": {"status": "SUCCESS"},
+        "steps": [
+            {"tool": "browser_snapshot", "arguments": {}},
+            {"tool": "browser_press_key", "arguments": {"key": "Enter"}},
+        ],
+    }
+    manager = FakeManager()
+    outcome = asyncio.run(replay_trajectory(trajectory, manager, "http://new"))
+
+    assert not outcome.completed
+    assert outcome.executed == 1
+    assert "browser_press_key" in outcome.reason
+    assert manager.calls == ["browser_snapshot"]